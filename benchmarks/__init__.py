@@ -0,0 +1 @@
+"""Performance benchmarks for the Product Hunt mining module."""
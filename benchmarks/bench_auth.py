@@ -0,0 +1,51 @@
+"""Micro-benchmark of the authentication overhead per request.
+
+Measures the `authenticate` dependency with a token that is verified on every
+call (cache cleared) against a token served from the verification cache.
+
+Usage:
+    python -m benchmarks.bench_auth [--rounds 20000]
+"""
+import argparse
+import time
+
+from jose import jwt
+
+from parma_mining.mining_common.jwt_handler import JWTHandler
+from parma_mining.producthunt.api.dependencies.auth import authenticate
+
+
+def measure(authorization: str, rounds: int, cached: bool) -> float:
+    """Return the time per call in microseconds."""
+    authenticate(authorization)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        if not cached:
+            JWTHandler.clear_cache()
+        authenticate(authorization)
+    return (time.perf_counter() - start) / rounds * 1_000_000
+
+
+def main():
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20000)
+    args = parser.parse_args()
+
+    token = jwt.encode(
+        {"sub": "analytics", "exp": int(time.time()) + 3600},
+        JWTHandler.SHARED_SECRET_KEY,
+        algorithm=JWTHandler.ALGORITHM,
+    )
+    authorization = f"Bearer {token}"
+
+    uncached = measure(authorization, args.rounds, cached=False)
+    cached = measure(authorization, args.rounds, cached=True)
+
+    print(f"full verification:  {uncached:8.2f} us / request")
+    print(f"cached token:       {cached:8.2f} us / request")
+    print(f"speed-up:           {uncached / cached:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""End-to-end benchmark of `/companies` and `/discover` against local stand-ins.
+
+The API runs in-process and is called through an ASGI transport, while Product
+Hunt and the analytics backend are replaced by the stand-ins of
+`benchmarks.standin`. For every scenario the throughput, the p50/p99 latency of
+a single product scrape or search and the peak RSS of the process are reported.
+The peak RSS only grows, so scenarios are run from small to large.
+
+The per-host rate limit of the scraper is raised by default, since the
+stand-in is local; pass `--rate-limit 5` to measure with the production limit.
+
+Usage:
+    python -m benchmarks.bench_end_to_end [--companies 10 100 1000]
+        [--latency 0.05] [--error-rate 0.01] [--rate-limit 1000]
+"""
+import argparse
+import asyncio
+import resource
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+from typing import NamedTuple
+
+import httpx
+
+from benchmarks.standin import StandInServers
+from parma_mining.producthunt.api import main
+from parma_mining.producthunt.api.dependencies.auth import authenticate
+from parma_mining.producthunt.rate_limiter import RateLimiter
+
+TOKEN = "benchmark-token"
+
+
+class Result(NamedTuple):
+    """Measurements of one scenario."""
+
+    scenario: str
+    companies: int
+    seconds: float
+    latencies: list[float]
+    peak_rss_mb: float
+
+    def row(self) -> str:
+        """Format the result as a table row."""
+        quantiles = statistics.quantiles(self.latencies, n=100, method="inclusive")
+        return (
+            f"{self.scenario:<10} {self.companies:>9} {self.seconds:>9.2f}"
+            f" {self.companies / self.seconds:>13.1f}"
+            f" {quantiles[49] * 1000:>9.1f} {quantiles[98] * 1000:>9.1f}"
+            f" {self.peak_rss_mb:>13.1f}"
+        )
+
+
+HEADER = (
+    f"{'scenario':<10} {'companies':>9} {'seconds':>9} {'products/sec':>13}"
+    f" {'p50 ms':>9} {'p99 ms':>9} {'peak RSS MB':>13}"
+)
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _record_latency(
+    function: Callable[..., Awaitable], latencies: list[float]
+) -> Callable[..., Awaitable]:
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await function(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    return wrapper
+
+
+async def run_companies(
+    api: httpx.AsyncClient, servers: StandInServers, companies: int, task_id: int
+) -> Result:
+    """Crawl one product per company through `/companies`."""
+    latencies: list[float] = []
+    scraper = main.producthunt_scraper
+    scrape = scraper.scrape_product_page
+    scraper.scrape_product_page = _record_latency(scrape, latencies)
+    body = {
+        "task_id": task_id,
+        "companies": {
+            f"company-{i}": {
+                "producthunt_url": [f"{servers.producthunt_url}products/product-{i}"]
+            }
+            for i in range(companies)
+        },
+    }
+    start = time.perf_counter()
+    try:
+        response = await api.post("/companies", json=body)
+        response.raise_for_status()
+        while (await api.get(f"/tasks/{task_id}")).json()["status"] not in (
+            "finished",
+            "failed",
+        ):
+            await asyncio.sleep(0.01)
+    finally:
+        scraper.scrape_product_page = scrape
+    return Result(
+        "companies", companies, time.perf_counter() - start, latencies, _peak_rss_mb()
+    )
+
+
+async def run_discover(api: httpx.AsyncClient, companies: int) -> Result:
+    """Discover the products of distinct company names through `/discover`."""
+    latencies: list[float] = []
+    scraper = main.producthunt_scraper
+    search = scraper.search_organizations
+    scraper.search_organizations = _record_latency(search, latencies)
+    main.discovery_cache.clear()
+    body = [
+        {"company_id": str(i), "name": f"Company {i}"} for i in range(companies)
+    ]
+    start = time.perf_counter()
+    try:
+        response = await api.post("/discover", json=body)
+        response.raise_for_status()
+    finally:
+        scraper.search_organizations = search
+    return Result(
+        "discover", companies, time.perf_counter() - start, latencies, _peak_rss_mb()
+    )
+
+
+def _configure(servers: StandInServers, rate_limit: float):
+    main.producthunt_scraper.base_url = servers.producthunt_url
+    main.producthunt_scraper.rate_limiter = RateLimiter(
+        rate=rate_limit,
+        burst=rate_limit,
+        initial_concurrency=main.producthunt_scraper.initial_concurrency,
+        min_concurrency=main.producthunt_scraper.min_concurrency,
+        max_concurrency=main.producthunt_scraper.max_concurrency,
+    )
+    analytics = main.analytics_client
+    analytics.measurement_url = servers.analytics_url + "source-measurement"
+    analytics.feed_raw_url = servers.analytics_url + "feed-raw-data"
+    analytics.crawling_finished_url = servers.analytics_url + "crawling-finished"
+    main.app.dependency_overrides[authenticate] = lambda: TOKEN
+
+
+async def run(args: argparse.Namespace) -> list[Result]:
+    """Run all scenarios against freshly started stand-ins."""
+    results = []
+    with StandInServers(args.latency, args.error_rate) as servers:
+        _configure(servers, args.rate_limit)
+        async with main.lifespan(main.app), httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=main.app),
+            base_url="http://api",
+            timeout=None,
+        ) as api:
+            for task_id, companies in enumerate(sorted(args.companies), start=1):
+                results.append(await run_discover(api, companies))
+                results.append(
+                    await run_companies(api, servers, companies, task_id)
+                )
+    return results
+
+
+def main_cli():
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=1000)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    print(HEADER)
+    for result in results:
+        print(result.row())
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,102 @@
+"""Micro-benchmark of the HTML extraction on saved fixture pages.
+
+Compares the CPU time of the previous extraction (two BeautifulSoup trees built
+with html.parser, reviews extracted twice) against the single-pass lxml scan.
+
+Usage:
+    python -m benchmarks.bench_extraction [--rounds 200]
+"""
+import argparse
+import time
+from datetime import datetime
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from parma_mining.producthunt.ph_client import (
+    _extract_followers,
+    _extract_overall_rating,
+    _extract_product_name,
+    _extract_reviews,
+    _scan_page,
+)
+
+FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+
+
+def _legacy_reviews(soup: BeautifulSoup) -> list:
+    reviews = []
+    for review_div in soup.find_all(
+        "div",
+        class_="flex direction-column",
+        id=lambda x: x and x.startswith("review-"),
+    ):
+        review_text_div = review_div.find("div", class_="styles_htmlText__iftLe")
+        review_text = review_text_div.get_text(strip=True) if review_text_div else None
+        time_tag = review_div.find("time")
+        review_date = (
+            datetime.fromisoformat(time_tag["datetime"]).strftime("%Y-%m-%d %H:%M:%S")
+            if time_tag
+            else None
+        )
+        reviews.append({"text": review_text, "date": review_date})
+    return reviews
+
+
+def legacy_extract(product_html: bytes, reviews_html: bytes) -> dict:
+    """Extraction as implemented before the single-pass scan."""
+    soup = BeautifulSoup(product_html, "html.parser")
+    review_soup = BeautifulSoup(reviews_html, "html.parser")
+    name_div = soup.find("h1", class_="color-darker-grey")
+    rating_div = review_soup.find("div", class_="styles_reviewPositive__JY_9N")
+    followers_div = soup.find("div", class_="styles_count___6_8F")
+    return {
+        "name": name_div.get_text(strip=True) if name_div else None,
+        "overall_rating": rating_div.get_text(strip=True) if rating_div else None,
+        "review_count": len(_legacy_reviews(review_soup)),
+        "followers": followers_div.get_text(strip=True) if followers_div else None,
+        "reviews": _legacy_reviews(review_soup),
+    }
+
+
+def single_pass_extract(product_html: bytes, reviews_html: bytes) -> dict:
+    """Extraction through the single-pass lxml scan."""
+    product_page = _scan_page(product_html)
+    review_page = _scan_page(reviews_html)
+    reviews = _extract_reviews(review_page)
+    return {
+        "name": _extract_product_name(product_page),
+        "overall_rating": _extract_overall_rating(review_page),
+        "review_count": len(reviews),
+        "followers": _extract_followers(product_page),
+        "reviews": reviews,
+    }
+
+
+def measure(extract, product_html: bytes, reviews_html: bytes, rounds: int) -> float:
+    """Return the CPU time per round in milliseconds."""
+    start = time.process_time()
+    for _ in range(rounds):
+        extract(product_html, reviews_html)
+    return (time.process_time() - start) / rounds * 1000
+
+
+def main():
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    product_html = (FIXTURES / "product_page.html").read_bytes()
+    reviews_html = (FIXTURES / "reviews_page.html").read_bytes()
+
+    legacy = measure(legacy_extract, product_html, reviews_html, args.rounds)
+    single_pass = measure(single_pass_extract, product_html, reviews_html, args.rounds)
+
+    print(f"legacy BeautifulSoup:   {legacy:8.3f} ms CPU / product")
+    print(f"single-pass lxml scan:  {single_pass:8.3f} ms CPU / product")
+    print(f"speed-up:               {legacy / single_pass:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
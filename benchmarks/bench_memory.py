@@ -0,0 +1,120 @@
+"""Memory benchmark of the in-memory representation of scraped reviews.
+
+Compares the former representation, a pydantic `Review` per review dumped to a
+dict with a formatted date string, against the compact `Review` records with
+epoch dates and pooled texts. Reviews are built from freshly parsed strings, as
+they would be from fetched pages, and every variant runs in its own process, so
+the peak RSS of one does not hide the other. Both variants are checked to send
+the same reviews to the analytics.
+
+Usage:
+    python -m benchmarks.bench_memory [--reviews 100000] [--distinct-texts 0.3]
+"""
+import argparse
+import multiprocessing
+import random
+import resource
+from collections.abc import Iterator
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+from parma_mining.producthunt.model import ProductInfo
+from parma_mining.producthunt.ph_client import ScannedReview, _extract_review
+from parma_mining.producthunt.text_pool import TextPool
+
+WORDS = (
+    "great product team love simple clean useful integration workflow design "
+    "support fast easy amazing tool launch congrats"
+).split()
+SHORT_TEXTS = ["Great product!", "Love it!", "Congrats on the launch!", "Amazing"]
+
+
+class LegacyReview(BaseModel):
+    """Former pydantic review model."""
+
+    id: str | None = Field(default=None, exclude=True)
+    text: str | None
+    date: str | None
+
+
+def _scanned_reviews(count: int, distinct_texts: float) -> Iterator[ScannedReview]:
+    """Yield reviews with new string objects, like reviews read from pages."""
+    rng = random.Random(42)
+    for index in range(count):
+        if rng.random() < distinct_texts:
+            text = " ".join(rng.choices(WORDS, k=rng.randint(8, 40)))
+        else:
+            # short reviews repeat, but every page holds its own copy
+            text = "".join(list(rng.choice(SHORT_TEXTS)))
+        day = 1 + index % 28
+        yield ScannedReview(str(index), text, f"2023-11-{day:02d}T10:00:00.000Z")
+
+
+def _legacy(count: int, distinct_texts: float) -> list:
+    return [
+        LegacyReview(
+            id=review.id,
+            text=review.text,
+            date=datetime.fromisoformat(review.date).strftime("%Y-%m-%d %H:%M:%S"),
+        ).model_dump()
+        for review in _scanned_reviews(count, distinct_texts)
+    ]
+
+
+def _compact(count: int, distinct_texts: float) -> list:
+    texts = TextPool(10000)
+    return [
+        _extract_review(review, texts)
+        for review in _scanned_reviews(count, distinct_texts)
+    ]
+
+
+VARIANTS = {"pydantic + dicts": _legacy, "compact records": _compact}
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _wire(reviews: list) -> list[dict]:
+    if reviews and isinstance(reviews[0], dict):
+        return reviews
+    return ProductInfo(reviews=reviews).model_dump()["reviews"]
+
+
+def _measure(variant: str, count: int, distinct_texts: float) -> tuple[float, list]:
+    """Return the peak RSS growth in MB and the first reviews as they are sent."""
+    baseline = _peak_rss_mb()
+    reviews = VARIANTS[variant](count, distinct_texts)
+    grown = _peak_rss_mb() - baseline
+    return grown, _wire(reviews[:100])
+
+
+def main():
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reviews", type=int, default=100000)
+    parser.add_argument("--distinct-texts", type=float, default=0.3)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for variant in VARIANTS:
+        with context.Pool(1) as pool:
+            results[variant] = pool.apply(
+                _measure, (variant, args.reviews, args.distinct_texts)
+            )
+
+    legacy, compact = (results[variant] for variant in VARIANTS)
+    assert legacy[1] == compact[1], "the variants send different reviews"
+
+    per_10k = 10000 / args.reviews
+    for variant, (grown, _) in results.items():
+        print(f"{variant:<18} {grown * per_10k:8.2f} MB peak RSS / 10k reviews")
+    print(f"{'reduction':<18} {legacy[0] / compact[0]:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
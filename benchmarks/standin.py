@@ -0,0 +1,165 @@
+"""Local stand-ins for Product Hunt and the analytics backend.
+
+Both are served by a minimal HTTP/1.1 server with keep-alive on top of asyncio
+streams, so benchmarks run offline and without extra dependencies:
+
+- the Product Hunt stand-in serves the recorded product, reviews and search
+  pages with a configurable latency and rate of `429 Too Many Requests` answers,
+- the analytics stand-in accepts `/feed-raw-data`, `/source-measurement` and
+  `/crawling-finished` and counts the requests it received.
+
+`StandInServers` runs both in a child process, so they do not compete with the
+code under test for the event loop and are not part of its memory usage.
+"""
+import asyncio
+import json
+import multiprocessing
+import random
+import re
+import urllib.parse
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+TEST_FIXTURES = ROOT.parent / "tests" / "fixtures"
+BENCHMARK_FIXTURES = ROOT / "fixtures"
+
+Handler = Callable[[str, str, bytes], Awaitable[tuple[int, dict[str, str], bytes]]]
+
+_REASONS = {200: "OK", 404: "Not Found", 429: "Too Many Requests"}
+_EMPTY_PAGE = b"<html><body></body></html>"
+
+
+async def _handle_connection(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, handler: Handler
+):
+    try:
+        while request_line := await reader.readline():
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length") or 0))
+
+            status, response_headers, content = await handler(method, target, body)
+            head = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}"]
+            response_headers = {**response_headers, "Content-Length": len(content)}
+            head += [f"{name}: {value}" for name, value in response_headers.items()]
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + content)
+            await writer.drain()
+            if headers.get("connection", "").lower() == "close":
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+class ProductHuntStandIn:
+    """Serves recorded Product Hunt pages for any product slug."""
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.product_page = (TEST_FIXTURES / "product_page.html").read_bytes()
+        self.reviews_page = (TEST_FIXTURES / "reviews_page.html").read_bytes()
+        self.search_page = (BENCHMARK_FIXTURES / "search_page.html").read_text()
+
+    async def __call__(self, method: str, target: str, body: bytes):
+        """Answer a request after the configured latency."""
+        if self.latency:
+            await asyncio.sleep(self.latency * random.uniform(0.5, 1.5))
+        if random.random() < self.error_rate:
+            return 429, {"Retry-After": "0"}, b""
+
+        url = urllib.parse.urlsplit(target)
+        query = urllib.parse.parse_qs(url.query)
+        html = {"Content-Type": "text/html; charset=utf-8"}
+        if url.path == "/search":
+            name = query.get("q", [""])[0]
+            slug = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+            page = self.search_page.replace("__SLUG__", slug).replace("__NAME__", name)
+            return 200, html, page.encode("utf-8")
+        if url.path.startswith("/products/") and url.path.endswith("/reviews"):
+            first_page = query.get("page", ["1"])[0] == "1"
+            return 200, html, self.reviews_page if first_page else _EMPTY_PAGE
+        if url.path.startswith("/products/"):
+            return 200, html, self.product_page
+        return 404, {}, b""
+
+
+class AnalyticsStandIn:
+    """Accepts the requests of the analytics client and counts them."""
+
+    def __init__(self):
+        self.requests: dict[str, int] = {}
+        self._measurement_id = 0
+
+    async def __call__(self, method: str, target: str, body: bytes):
+        """Answer a request of the analytics client."""
+        path = urllib.parse.urlsplit(target).path
+        self.requests[path] = self.requests.get(path, 0) + 1
+        json_headers = {"Content-Type": "application/json"}
+        if path == "/source-measurement":
+            self._measurement_id += 1
+            response = {"id": self._measurement_id}
+        elif path in ("/feed-raw-data", "/crawling-finished"):
+            response = {"result": "ok"}
+        elif path == "/stats":
+            response = self.requests
+        else:
+            return 404, {}, b""
+        return 200, json_headers, json.dumps(response).encode("utf-8")
+
+
+async def _serve(ready, latency: float, error_rate: float):
+    servers = [
+        await asyncio.start_server(
+            lambda reader, writer, handler=handler: _handle_connection(
+                reader, writer, handler
+            ),
+            "127.0.0.1",
+            0,
+        )
+        for handler in (ProductHuntStandIn(latency, error_rate), AnalyticsStandIn())
+    ]
+    ready.put([server.sockets[0].getsockname()[1] for server in servers])
+    await asyncio.gather(*(server.serve_forever() for server in servers))
+
+
+def _run(ready, latency: float, error_rate: float):
+    asyncio.run(_serve(ready, latency, error_rate))
+
+
+class StandInServers:
+    """Context manager running both stand-ins in a child process.
+
+    `producthunt_url` and `analytics_url` are the base urls of the stand-ins.
+    """
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.producthunt_url = ""
+        self.analytics_url = ""
+        self._process: multiprocessing.Process | None = None
+
+    def __enter__(self) -> "StandInServers":
+        """Start the stand-ins and wait until they accept connections."""
+        context = multiprocessing.get_context("spawn")
+        ready = context.Queue()
+        self._process = context.Process(
+            target=_run, args=(ready, self.latency, self.error_rate), daemon=True
+        )
+        self._process.start()
+        producthunt_port, analytics_port = ready.get(timeout=30)
+        self.producthunt_url = f"http://127.0.0.1:{producthunt_port}/"
+        self.analytics_url = f"http://127.0.0.1:{analytics_port}/"
+        return self
+
+    def __exit__(self, *exc_info):
+        """Stop the stand-ins."""
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
@@ -4,8 +4,11 @@ from parma_mining.mining_common.exceptions import BaseError
 from parma_mining.producthunt.model import ErrorInfoModel
 
 
+def error_info(e: BaseError) -> ErrorInfoModel:
+    """Describe an error in the format reported to the analytics."""
+    return ErrorInfoModel(error_type=e.__class__.__name__, error_description=e.message)
+
+
 def collect_errors(company_id: str, errors: dict, e: BaseError):
     """Collect errors in required dict format."""
-    errors[company_id] = ErrorInfoModel(
-        error_type=e.__class__.__name__, error_description=e.message
-    )
+    errors[company_id] = error_info(e)
@@ -2,9 +2,22 @@
 
 This module contains the JWTHandler class which is designed to verify JWTs. The
 verification process supports shared secret keys to enable authentication.
+
+Verified tokens are cached by their digest until they expire, at most for
+`CACHE_MAX_AGE` seconds, so callers reusing a token skip the signature check.
+The secret key can be rotated without a restart through `rotate_keys` or by
+replacing the file named by `PARMA_SHARED_SECRET_KEY_FILE`; tokens signed with
+the replaced key keep being accepted for `PREVIOUS_KEYS_TTL` seconds after the
+rotation. Previous keys configured in the environment are accepted until the
+UNIX timestamp `PREVIOUS_KEYS_EXPIRE_AT`, so restarting a process does not
+extend their grace period.
 """
+import hashlib
 import logging
 import os
+import threading
+import time
+from collections import OrderedDict
 
 from jose import jwt
 from jose.exceptions import ExpiredSignatureError, JWTError
@@ -18,8 +31,34 @@ class JWTHandler:
     SHARED_SECRET_KEY: str = str(
         os.getenv("PARMA_SHARED_SECRET_KEY") or "PARMA_SHARED_SECRET_KEY"
     )
+    # keys that are still accepted while a new shared secret key rolls out
+    PREVIOUS_SECRET_KEYS: list[str] = [
+        key for key in (os.getenv("PARMA_PREVIOUS_SHARED_SECRET_KEYS") or "").split(",")
+        if key
+    ]
+    # UNIX timestamp until which the configured previous keys are accepted
+    PREVIOUS_KEYS_EXPIRE_AT: float = float(
+        os.getenv("PARMA_PREVIOUS_SHARED_SECRET_KEYS_EXPIRE_AT") or "-inf"
+    )
+    # seconds a replaced key is accepted after a rotation
+    PREVIOUS_KEYS_TTL: float = float(
+        os.getenv("PARMA_PREVIOUS_SHARED_SECRET_KEYS_TTL") or 3600
+    )
+    # file holding the shared secret key, re-read when it changes
+    SHARED_SECRET_KEY_FILE: str | None = os.getenv("PARMA_SHARED_SECRET_KEY_FILE")
+    KEY_FILE_CHECK_INTERVAL: float = 5
     ALGORITHM: str = "HS256"
 
+    CACHE_SIZE: int = int(os.getenv("JWT_CACHE_SIZE") or 1024)
+    CACHE_MAX_AGE: float = float(os.getenv("JWT_CACHE_MAX_AGE") or 300)
+
+    # token digest -> (end of the cache entry, expiry of the token)
+    _cache: OrderedDict[bytes, tuple[float, float]] = OrderedDict()
+    _lock = threading.Lock()
+    _previous_keys_expire_at: float = PREVIOUS_KEYS_EXPIRE_AT
+    _key_file_mtime: float | None = None
+    _key_file_checked_at: float = float("-inf")
+
     @staticmethod
     def verify_jwt(token: str) -> bool:
         """Verify a JWT using the shared secret key.
@@ -31,14 +70,141 @@ class JWTHandler:
             True if the verification is successful.
             False otherwise.
         """
-        try:
-            jwt.decode(
-                token, JWTHandler.SHARED_SECRET_KEY, algorithms=[JWTHandler.ALGORITHM]
-            )
+        JWTHandler._reload_key_file()
+        digest = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        now = time.time()
+        with JWTHandler._lock:
+            cached = JWTHandler._cache.get(digest)
+            if cached is not None:
+                cached_until, expires_at = cached
+                if now < cached_until:
+                    JWTHandler._cache.move_to_end(digest)
+                    return True
+                del JWTHandler._cache[digest]
+                if now >= expires_at:
+                    logger.error("JWT has expired.")
+                    return False
+
+        # verifications with a previous key are not cached beyond its grace period
+        keys = [(JWTHandler.SHARED_SECRET_KEY, float("inf"))]
+        if now < JWTHandler._previous_keys_expire_at:
+            keys += [
+                (key, JWTHandler._previous_keys_expire_at)
+                for key in JWTHandler.PREVIOUS_SECRET_KEYS
+            ]
+        for key, accepted_until in keys:
+            try:
+                claims = jwt.decode(token, key, algorithms=[JWTHandler.ALGORITHM])
+            except ExpiredSignatureError:
+                logger.error("JWT has expired.")
+                return False
+            except JWTError:
+                continue
+            JWTHandler._remember(digest, claims, now, accepted_until)
             return True
-        except ExpiredSignatureError:
-            logger.error("JWT has expired.")
-        except JWTError:
-            logger.error("Invalid JWT, unable to decode.")
 
+        logger.error("Invalid JWT, unable to decode.")
         return False
+
+    @staticmethod
+    def _remember(digest: bytes, claims, now: float, accepted_until: float):
+        expiry = claims.get("exp") if isinstance(claims, dict) else None
+        expires_at = float(expiry) if isinstance(expiry, int | float) else float("inf")
+        with JWTHandler._lock:
+            JWTHandler._cache[digest] = (
+                min(expires_at, now + JWTHandler.CACHE_MAX_AGE, accepted_until),
+                expires_at,
+            )
+            JWTHandler._cache.move_to_end(digest)
+            if len(JWTHandler._cache) > JWTHandler.CACHE_SIZE:
+                JWTHandler._cache.popitem(last=False)
+
+    @staticmethod
+    def token_expiry(token: str) -> float | None:
+        """Return the expiry of a JWT as a UNIX timestamp, if it has one.
+
+        The claims are read without checking the signature, so only pass tokens
+        that were verified before.
+
+        Args:
+            token: The JWT token.
+
+        Returns:
+            The `exp` claim of the token, None if it has none or is no JWT.
+        """
+        try:
+            expiry = jwt.get_unverified_claims(token).get("exp")
+        except JWTError:
+            return None
+        return float(expiry) if isinstance(expiry, int | float) else None
+
+    @staticmethod
+    def rotate_keys(
+        secret_key: str,
+        previous_keys: list[str] | None = None,
+        previous_keys_ttl: float | None = None,
+        previous_keys_expire_at: float | None = None,
+    ):
+        """Replace the shared secret key and drop the cached verifications.
+
+        Args:
+            secret_key: The new shared secret key.
+            previous_keys: Keys still accepted during the rotation, by default the
+                key that is replaced.
+            previous_keys_ttl: Seconds the previous keys are accepted, by default
+                `PREVIOUS_KEYS_TTL`.
+            previous_keys_expire_at: UNIX timestamp until which the previous keys
+                are accepted, takes precedence over `previous_keys_ttl`.
+        """
+        if previous_keys_ttl is None:
+            previous_keys_ttl = JWTHandler.PREVIOUS_KEYS_TTL
+        if previous_keys_expire_at is None:
+            previous_keys_expire_at = time.time() + previous_keys_ttl
+        with JWTHandler._lock:
+            if previous_keys is None:
+                previous_keys = [JWTHandler.SHARED_SECRET_KEY]
+            JWTHandler.SHARED_SECRET_KEY = secret_key
+            JWTHandler.PREVIOUS_SECRET_KEYS = [
+                key for key in previous_keys if key != secret_key
+            ]
+            JWTHandler._previous_keys_expire_at = previous_keys_expire_at
+            JWTHandler._cache.clear()
+        logger.info("Rotated the shared secret key.")
+
+    @staticmethod
+    def clear_cache():
+        """Drop all cached verifications."""
+        with JWTHandler._lock:
+            JWTHandler._cache.clear()
+
+    @staticmethod
+    def _reload_key_file():
+        path = JWTHandler.SHARED_SECRET_KEY_FILE
+        now = time.monotonic()
+        if not path or now - JWTHandler._key_file_checked_at < (
+            JWTHandler.KEY_FILE_CHECK_INTERVAL
+        ):
+            return
+        JWTHandler._key_file_checked_at = now
+        try:
+            mtime = os.stat(path).st_mtime
+            if mtime == JWTHandler._key_file_mtime:
+                return
+            with open(path) as key_file:
+                secret_key = key_file.read().strip()
+        except OSError as e:
+            logger.error(f"Unable to read the shared secret key file: {e}")
+            return
+        first_load = JWTHandler._key_file_mtime is None
+        JWTHandler._key_file_mtime = mtime
+        if not secret_key or secret_key == JWTHandler.SHARED_SECRET_KEY:
+            return
+        if first_load:
+            # the key file replaces the configured key, not a rotation
+            JWTHandler.rotate_keys(
+                secret_key,
+                JWTHandler.PREVIOUS_SECRET_KEYS,
+                previous_keys_expire_at=JWTHandler._previous_keys_expire_at,
+            )
+        else:
+            JWTHandler.rotate_keys(secret_key)
@@ -2,23 +2,41 @@
 
 AnalyticsClient class is used to send data to the analytics service.
 """
-import json
+import asyncio
+import copy
+import gzip
 import logging
 import os
+import time
 import urllib.parse
 
 import httpx
+import orjson
+import zstandard
 from dotenv import load_dotenv
 from fastapi import status
+from pydantic import BaseModel
 
 from parma_mining.mining_common.exceptions import AnalyticsError
+from parma_mining.producthunt.metrics import ANALYTICS_REQUEST_SECONDS
 from parma_mining.producthunt.model import ResponseModel
 
 logger = logging.getLogger(__name__)
 
 
+def _compress(encoding: str, content: bytes) -> tuple[str, bytes]:
+    """Compress a request body with zstd or gzip."""
+    if encoding == "zstd":
+        return "zstd", zstandard.ZstdCompressor(level=3).compress(content)
+    return "gzip", gzip.compress(content, compresslevel=5)
+
+
 class AnalyticsClient:
-    """AnalyticsClient class is used to send data to the analytics service."""
+    """AnalyticsClient class is used to send data to the analytics service.
+
+    Requests go through one long-lived, connection-pooled HTTP session which is
+    opened with `open` and released with `aclose`.
+    """
 
     load_dotenv()
     analytics_base = str(os.getenv("ANALYTICS_BASE_URL") or "")
@@ -27,14 +45,80 @@ class AnalyticsClient:
     feed_raw_url = urllib.parse.urljoin(analytics_base, "/feed-raw-data")
     crawling_finished_url = urllib.parse.urljoin(analytics_base, "/crawling-finished")
 
-    def send_post_request(self, token: str, api_endpoint, data):
-        """Send a POST request to the given API endpoint with the given data."""
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {token}",
-        }
+    max_connections = int(os.getenv("ANALYTICS_MAX_CONNECTIONS") or 20)
+    timeout = float(os.getenv("ANALYTICS_TIMEOUT") or 120)
+
+    feed_batch_size = int(os.getenv("ANALYTICS_FEED_BATCH_SIZE") or 20)
+    feed_batch_max_age = float(os.getenv("ANALYTICS_FEED_BATCH_MAX_AGE") or 0.5)
+    feed_queue_size = int(os.getenv("ANALYTICS_FEED_QUEUE_SIZE") or 100)
+
+    # gzip or zstd compression of request bodies, if the backend accepts it
+    request_compression = (os.getenv("ANALYTICS_REQUEST_COMPRESSION") or "").lower()
+    compression_min_bytes = int(os.getenv("ANALYTICS_COMPRESSION_MIN_BYTES") or 16384)
+
+    def __init__(self):
+        self._client: httpx.AsyncClient | None = None
+        self._client_loop: asyncio.AbstractEventLoop | None = None
+        # registered measurements and annotated mapping per source module
+        self._registrations: dict = {}
+        # mappings of failed registrations, holding the ids registered so far
+        self._partial_registrations: dict = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Return the shared HTTP session, opening it on first use."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop != loop:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_connections),
+                timeout=self.timeout,
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def open(self):
+        """Open the shared HTTP session."""
+        _ = self.client
+
+    async def aclose(self):
+        """Close the shared HTTP session and its pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._client_loop = None
+
+    def _encode(self, data) -> tuple[bytes, dict[str, str]]:
+        """Serialize a payload to JSON bytes, compressed if it is large enough."""
+        if isinstance(data, BaseModel):
+            content = data.model_dump_json().encode("utf-8")
+        else:
+            content = orjson.dumps(data)
+
+        headers = {"Content-Type": "application/json"}
+        if self.request_compression and len(content) >= self.compression_min_bytes:
+            encoding, content = _compress(self.request_compression, content)
+            headers["Content-Encoding"] = encoding
+        return content, headers
 
-        response = httpx.post(api_endpoint, json=data, headers=headers, timeout=120)
+    async def send_post_request(self, token: str, api_endpoint, data):
+        """Send a POST request to the given API endpoint with the given data.
+
+        `data` is either a JSON-serializable object or a pydantic model, which is
+        serialized straight to JSON bytes.
+        """
+        content, headers = self._encode(data)
+        headers["Authorization"] = f"Bearer {token}"
+
+        endpoint = urllib.parse.urlsplit(str(api_endpoint)).path
+        start = time.perf_counter()
+        try:
+            response = await self.client.post(
+                api_endpoint, content=content, headers=headers
+            )
+        finally:
+            ANALYTICS_REQUEST_SECONDS.labels(endpoint).observe(
+                time.perf_counter() - start
+            )
 
         if response.status_code in [status.HTTP_200_OK, status.HTTP_201_CREATED]:
             return response.json()
@@ -48,28 +132,87 @@ class AnalyticsClient:
                 f"response: {response.text}"
             )
 
-    def register_measurements(
+    async def register_measurements(
         self, token: str, mapping, parent_id=None, source_module_id=None
     ):
-        """Register the given mapping as a measurement."""
-        result = []
+        """Register the given mapping as a measurement.
 
-        for field_mapping in mapping["Mappings"]:
-            measurement_data = {
-                "source_module_id": source_module_id,
-                "type": field_mapping["DataType"],
-                "measurement_name": field_mapping["MeasurementName"],
-            }
+        Sibling measurements are registered concurrently, nested measurements once
+        the id of their parent is known. The ids are added to a copy of the mapping,
+        which is returned with the registered measurements. Registrations of a
+        `source_module_id` are cached, repeating them returns the cached result.
+        When some of its measurements fail to register, the others are kept and a
+        retry only registers the missing ones.
+        """
+        cached_by_module = source_module_id is not None and parent_id is None
+        if cached_by_module:
+            cached = self._registrations.get(source_module_id)
+            if cached is not None:
+                logger.debug(f"Measurements of {source_module_id} already registered")
+                return copy.deepcopy(cached)
+            mapping = self._partial_registrations.get(source_module_id, mapping)
 
-            if parent_id is not None:
-                measurement_data["parent_measurement_id"] = parent_id
-            else:
-                logger.debug(
-                    f"No parent id provided for "
-                    f"measurement {measurement_data['measurement_name']}"
+        mapping = copy.deepcopy(mapping)
+        if cached_by_module:
+            # ids are added to the mapping as the measurements are registered
+            self._partial_registrations[source_module_id] = mapping
+        result = await self._register_mappings(
+            token, mapping["Mappings"], parent_id, source_module_id
+        )
+        if cached_by_module:
+            self._registrations[source_module_id] = copy.deepcopy((result, mapping))
+            self._partial_registrations.pop(source_module_id, None)
+        return result, mapping
+
+    async def _register_mappings(
+        self, token: str, field_mappings: list, parent_id, source_module_id
+    ) -> list:
+        results = await asyncio.gather(
+            *(
+                self._register_mapping(
+                    token, field_mapping, parent_id, source_module_id
                 )
+                for field_mapping in field_mappings
+            ),
+            return_exceptions=True,
+        )
+        # every sibling is awaited, so the ids of the successful ones are kept
+        measurements: list = []
+        errors: list[BaseException] = []
+        for result in results:
+            if isinstance(result, BaseException):
+                errors.append(result)
+            else:
+                measurements.extend(result)
+        if errors:
+            logger.error(f"Failed to register {len(errors)} measurements")
+            raise errors[0]
+        return measurements
+
+    async def _register_mapping(
+        self, token: str, field_mapping: dict, parent_id, source_module_id
+    ) -> list:
+        measurement_data = {
+            "source_module_id": source_module_id,
+            "type": field_mapping["DataType"],
+            "measurement_name": field_mapping["MeasurementName"],
+        }
+
+        if parent_id is not None:
+            measurement_data["parent_measurement_id"] = parent_id
+        else:
+            logger.debug(
+                f"No parent id provided for "
+                f"measurement {measurement_data['measurement_name']}"
+            )
 
-            response = self.send_post_request(
+        if field_mapping.get("source_measurement_id") is not None:
+            # registered by an earlier attempt
+            measurement_data["source_measurement_id"] = field_mapping[
+                "source_measurement_id"
+            ]
+        else:
+            response = await self.send_post_request(
                 token, self.measurement_url, measurement_data
             )
             measurement_data["source_measurement_id"] = response.get("id")
@@ -79,29 +222,158 @@ class AnalyticsClient:
                 "source_measurement_id"
             ]
 
-            if "NestedMappings" in field_mapping:
-                nested_measurements = self.register_measurements(
+        result = []
+        if "NestedMappings" in field_mapping:
+            result.extend(
+                await self._register_mappings(
                     token,
-                    {"Mappings": field_mapping["NestedMappings"]},
-                    parent_id=measurement_data["source_measurement_id"],
-                    source_module_id=source_module_id,
-                )[0]
-                result.extend(nested_measurements)
-            result.append(measurement_data)
-        return result, mapping
+                    field_mapping["NestedMappings"],
+                    measurement_data["source_measurement_id"],
+                    source_module_id,
+                )
+            )
+        result.append(measurement_data)
+        return result
 
-    def feed_raw_data(self, token: str, input_data: ResponseModel):
+    async def feed_raw_data(self, token: str, input_data: ResponseModel):
         """Feed the raw data to the analytics service."""
-        organization_json = json.loads(input_data.raw_data.model_dump_json())
+        return await self.send_post_request(token, self.feed_raw_url, input_data)
 
-        data = {
-            "source_name": input_data.source_name,
-            "company_id": input_data.company_id,
-            "raw_data": organization_json,
-        }
+    async def crawling_finished(self, token, data):
+        """Notify crawling is finished to the analytics."""
+        return await self.send_post_request(token, self.crawling_finished_url, data)
 
-        return self.send_post_request(token, self.feed_raw_url, data)
+    def raw_data_batcher(self, token: str) -> "RawDataBatcher":
+        """Create a batching sink for `feed_raw_data` with the configured limits."""
+        return RawDataBatcher(
+            self,
+            token,
+            batch_size=self.feed_batch_size,
+            max_age=self.feed_batch_max_age,
+            max_queue_size=self.feed_queue_size,
+        )
 
-    def crawling_finished(self, token, data):
-        """Notify crawling is finished to the analytics."""
-        return self.send_post_request(token, self.crawling_finished_url, data)
+
+class RawDataBatcher:
+    """Batching sink that delivers raw data to the analytics service.
+
+    Submitted `ResponseModel`s are put into a bounded queue. A background worker
+    drains the queue in batches, flushing as soon as `batch_size` items are
+    buffered or the oldest buffered item is `max_age` seconds old. The items of a
+    batch are sent as concurrent requests over the pooled analytics session.
+
+    Every submission returns a future that resolves with the analytics response or
+    fails with an `AnalyticsError`, so failures can still be attributed to the
+    company they belong to. Use the batcher as an async context manager; leaving
+    the context flushes everything that is still buffered, unless it is left with
+    an error, e.g. because it was cancelled.
+    """
+
+    _closed = object()
+
+    def __init__(
+        self,
+        analytics_client: AnalyticsClient,
+        token: str,
+        batch_size: int,
+        max_age: float,
+        max_queue_size: int,
+    ):
+        self.analytics_client = analytics_client
+        self.token = token
+        self.batch_size = batch_size
+        self.max_age = max_age
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._worker: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "RawDataBatcher":
+        """Start the background flush worker."""
+        self._worker = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, exc_type, *exc_info):
+        """Flush remaining items and stop the worker.
+
+        When the context is left with an error the worker is cancelled instead, and
+        the items that were not delivered yet are cancelled with it.
+        """
+        if exc_type is None:
+            await self.close()
+        else:
+            await self.abort()
+
+    async def submit(self, data: ResponseModel) -> asyncio.Future:
+        """Queue raw data for delivery, waiting while the queue is full."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((data, future))
+        return future
+
+    async def close(self):
+        """Flush the buffered items and stop the background worker."""
+        if self._worker is None:
+            return
+        await self._queue.put(self._closed)
+        await self._worker
+        self._worker = None
+
+    async def abort(self):
+        """Stop the background worker without flushing the buffered items."""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        await asyncio.gather(self._worker, return_exceptions=True)
+        self._worker = None
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not self._closed:
+                item[1].cancel()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        closing = False
+        batch: list[tuple[ResponseModel, asyncio.Future]] = []
+        try:
+            while not closing:
+                item = await self._queue.get()
+                if item is self._closed:
+                    break
+                batch = [item]
+                deadline = loop.time() + self.max_age
+                while len(batch) < self.batch_size:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), remaining)
+                    except TimeoutError:
+                        break
+                    if item is self._closed:
+                        closing = True
+                        break
+                    batch.append(item)
+                await self._flush(batch)
+        except asyncio.CancelledError:
+            # the items of an unfinished batch are not delivered
+            for _, future in batch:
+                future.cancel()
+            raise
+
+    async def _flush(self, batch: list[tuple[ResponseModel, asyncio.Future]]):
+        logger.debug(f"Flushing {len(batch)} raw data items to the analytics")
+        results = await asyncio.gather(
+            *(
+                self.analytics_client.feed_raw_data(self.token, data)
+                for data, _ in batch
+            ),
+            return_exceptions=True,
+        )
+        for (data, future), result in zip(batch, results):
+            if not isinstance(result, Exception):
+                future.set_result(result)
+            elif isinstance(result, AnalyticsError):
+                future.set_exception(result)
+            else:
+                logger.error(
+                    f"Failed to send raw data of {data.company_id}. Error: {result}"
+                )
+                future.set_exception(AnalyticsError(str(result)))
@@ -1,29 +1,61 @@
 """Main entrypoint for the API routes in of parma-analytics."""
+import asyncio
+import itertools
 import json
 import logging
 import os
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Collection
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 
-from fastapi import Depends, FastAPI, status
+from fastapi import Depends, FastAPI, HTTPException, Header, Response, status
+from fastapi.responses import StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 from parma_mining.mining_common.exceptions import (
     AnalyticsError,
     ClientInvalidBodyError,
     CrawlingError,
+    CrawlingInternalError,
 )
-from parma_mining.mining_common.helper import collect_errors
-from parma_mining.producthunt.analytics_client import AnalyticsClient
+from parma_mining.mining_common.helper import collect_errors, error_info
+from parma_mining.mining_common.jwt_handler import JWTHandler
+from parma_mining.producthunt.analytics_client import AnalyticsClient, RawDataBatcher
 from parma_mining.producthunt.api.dependencies.auth import authenticate
+from parma_mining.producthunt.checkpoint_store import (
+    CheckpointStore,
+    SQLiteCheckpointStore,
+)
+from parma_mining.producthunt.discovery import DiscoveryCache, normalize_company_name
 from parma_mining.producthunt.model import (
     CompaniesRequest,
     CrawlingFinishedInputModel,
+    DiscoveryModel,
     DiscoveryRequest,
     DiscoveryResponse,
+    DiscoveryStreamEntry,
+    DiscoveryStreamTrailer,
     ErrorInfoModel,
+    ProductInfo,
     ResponseModel,
+    TaskStatusModel,
 )
 from parma_mining.producthunt.normalization_map import ProductHuntNormalizationMap
 from parma_mining.producthunt.ph_client import ProductHuntClient
+from parma_mining.producthunt.scheduler import JobScheduler
+from parma_mining.producthunt.watermark_store import (
+    SQLiteWatermarkStore,
+    Watermark,
+    WatermarkStore,
+)
+from parma_mining.producthunt.work_queue import (
+    FinishedTask,
+    QueueWorker,
+    WorkQueue,
+    WorkUnit,
+    create_work_queue,
+)
 
 env = os.getenv("DEPLOYMENT_ENV", "local")
 
@@ -37,11 +69,90 @@ else:
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+# maximum number of product handles crawled concurrently across all tasks
+crawl_concurrency = int(os.getenv("CRAWL_CONCURRENCY") or 8)
+# default time budget of a task in seconds, tasks are unbounded without one
+crawl_time_budget = float(os.getenv("CRAWL_TASK_TIME_BUDGET") or 0) or None
+# share of the time of a task kept to deliver its data and notify the analytics
+crawl_delivery_share = float(os.getenv("CRAWL_TASK_DELIVERY_SHARE") or 0.1)
+
+# maximum number of concurrent searches within one discovery request
+discovery_concurrency = int(os.getenv("DISCOVERY_CONCURRENCY") or 8)
+# discovered identifiers are valid, and cached, for this long
+discovery_validity = timedelta(days=180)
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# incremental review crawling is enabled by configuring a watermark database
+watermark_db_path = os.getenv("WATERMARK_DB_PATH")
+# interrupted tasks are resumed when a checkpoint database is configured
+checkpoint_db_path = os.getenv("CHECKPOINT_DB_PATH")
+# a task is given up after this many runs, or this many seconds after it started
+checkpoint_max_attempts = int(os.getenv("CHECKPOINT_MAX_ATTEMPTS") or 3)
+checkpoint_max_age = float(os.getenv("CHECKPOINT_MAX_AGE") or 86400)
+# crawl work is shared with the other replicas when a work queue is configured,
+# e.g. redis://host:6379/0 or sqlite:///path/to/queue.db
+work_queue_url = os.getenv("WORK_QUEUE_URL")
+work_queue_lease = float(os.getenv("WORK_QUEUE_LEASE") or 30)
+work_queue_poll_interval = float(os.getenv("WORK_QUEUE_POLL_INTERVAL") or 1)
 
 producthunt_scraper = ProductHuntClient()
 normalization = ProductHuntNormalizationMap()
 analytics_client = AnalyticsClient()
+scheduler = JobScheduler(max_workers=crawl_concurrency)
+discovery_cache = DiscoveryCache(
+    ttl=discovery_validity.total_seconds(),
+    max_entries=int(os.getenv("DISCOVERY_CACHE_SIZE") or 10000),
+)
+watermark_store: WatermarkStore | None = (
+    SQLiteWatermarkStore(watermark_db_path) if watermark_db_path else None
+)
+checkpoint_store: CheckpointStore | None = (
+    SQLiteCheckpointStore(checkpoint_db_path) if checkpoint_db_path else None
+)
+work_queue: WorkQueue | None = (
+    create_work_queue(work_queue_url) if work_queue_url else None
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the pooled HTTP sessions for the lifetime of the app.
+
+    Tasks interrupted by the previous shutdown are resumed on startup. With a work
+    queue the replica claims and crawls units of the queue meanwhile.
+    """
+    await producthunt_scraper.open()
+    await analytics_client.open()
+    resume_tasks()
+    worker = (
+        QueueWorker(
+            work_queue,
+            crawl_unit,
+            finish_distributed_task,
+            concurrency=crawl_concurrency,
+            lease=work_queue_lease,
+            poll_interval=work_queue_poll_interval,
+        )
+        if work_queue
+        else None
+    )
+    if worker:
+        worker.start()
+    yield
+    if worker:
+        await worker.stop()
+    await scheduler.shutdown()
+    await producthunt_scraper.aclose()
+    await analytics_client.aclose()
+    if watermark_store:
+        watermark_store.close()
+    if checkpoint_store:
+        checkpoint_store.close()
+    if work_queue:
+        await work_queue.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 @app.get("/", status_code=status.HTTP_200_OK)
@@ -51,6 +162,12 @@ def root():
     return {"welcome": "at parma-mining-producthunt"}
 
 
+@app.get("/metrics", status_code=status.HTTP_200_OK)
+def metrics():
+    """Endpoint exposing the Prometheus metrics of the module."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/dummy-auth", status_code=status.HTTP_200_OK)
 def dummy_auth(token: str = Depends(authenticate)):
     """Dummy endpoint.
@@ -64,14 +181,16 @@ def dummy_auth(token: str = Depends(authenticate)):
 
 
 @app.get("/initialize", status_code=status.HTTP_200_OK)
-def initialize(source_id: int, token: str = Depends(authenticate)) -> str:
+async def initialize(source_id: int, token: str = Depends(authenticate)) -> str:
     """Initialization endpoint for the API."""
     # init frequency
     time = "weekly"
-    normalization_map = normalization.get_normalization_map()
-    # register the measurements to analytics
-    analytics_client.register_measurements(
-        token=token, mapping=normalization_map, source_module_id=source_id
+    # register the measurements to analytics, the returned copy of the map
+    # carries their ids
+    _, normalization_map = await analytics_client.register_measurements(
+        token=token,
+        mapping=normalization.get_normalization_map(),
+        source_module_id=source_id,
     )
 
     # set and return results
@@ -81,52 +200,374 @@ def initialize(source_id: int, token: str = Depends(authenticate)) -> str:
     return json.dumps(results)
 
 
-@app.post(
-    "/companies",
-    status_code=status.HTTP_200_OK,
-)
-def get_company_details(body: CompaniesRequest, token: str = Depends(authenticate)):
-    """Endpoint to get product data based on a dict with the respective urls."""
+def _count_handles(body: CompaniesRequest) -> int:
+    return sum(
+        len(handles)
+        for company_data in body.companies.values()
+        for data_type, handles in company_data.items()
+        if data_type == "producthunt_url"
+    )
+
+
+def _split_handles(
+    body: CompaniesRequest,
+) -> tuple[list[tuple[str, str]], dict[str, ErrorInfoModel]]:
+    """Return the (company_id, handle) pairs to crawl and the invalid handles.
+
+    Handles are ordered round robin across companies: the first handle of every
+    company comes before the second handle of any company, so a task cut short by
+    its deadline still covers as many companies as possible.
+    """
+    per_company: list[list[tuple[str, str]]] = []
     errors: dict[str, ErrorInfoModel] = {}
     for company_id, company_data in body.companies.items():
+        company_handles = []
         for data_type, handles in company_data.items():
             for handle in handles:
                 if data_type == "producthunt_url":
-                    try:
-                        scraped_data = producthunt_scraper.scrape_product_page(handle)
-                    except CrawlingError as e:
-                        logger.error(
-                            f"Can't fetch Product details from ProductHunt. Error: {e}"
-                        )
-                        collect_errors(company_id, errors, e)
-                        continue
-
-                    data = ResponseModel(
-                        source_name="producthunt",
-                        company_id=company_id,
-                        raw_data=scraped_data,
-                    )
-                    # Write data to db via endpoint in analytics backend
-                    try:
-                        analytics_client.feed_raw_data(token, data)
-                    except AnalyticsError as e:
-                        logger.error(
-                            f"Can't send crawling data to the Analytics. Error: {e}"
-                        )
-                        collect_errors(company_id, errors, e)
-
+                    company_handles.append((company_id, handle))
                 else:
                     msg = f"Unsupported type error for {data_type} in {handle}"
                     logger.error(msg)
                     collect_errors(company_id, errors, ClientInvalidBodyError(msg))
-    return analytics_client.crawling_finished(
+        per_company.append(company_handles)
+    ordered = [
+        pair
+        for pairs in itertools.zip_longest(*per_company)
+        for pair in pairs
+        if pair is not None
+    ]
+    return ordered, errors
+
+
+def _task_deadline(body: CompaniesRequest) -> float | None:
+    """Return the deadline of a task as a UNIX timestamp, if it has one."""
+    deadlines = []
+    if body.deadline is not None:
+        deadlines.append(body.deadline.timestamp())
+    time_budget = body.time_budget or crawl_time_budget
+    if time_budget:
+        deadlines.append(time.time() + time_budget)
+    return min(deadlines, default=None)
+
+
+def _remaining(deadline: float | None) -> float | None:
+    return None if deadline is None else max(deadline - time.time(), 0)
+
+
+def _deadline_exceeded(
+    task_id: int, handle: str, step: str = "crawled"
+) -> CrawlingInternalError:
+    return CrawlingInternalError(
+        f"Deadline of task {task_id} exceeded before {handle} was {step}"
+    )
+
+
+def _out_of_time(
+    task_id: int,
+    errors: dict[str, ErrorInfoModel],
+    company_id: str,
+    handle: str,
+    step: str = "crawled",
+):
+    logger.error(f"Task {task_id} ran out of time for {handle}")
+    collect_errors(company_id, errors, _deadline_exceeded(task_id, handle, step))
+
+
+def _unfinished(jobs: dict[asyncio.Task, tuple[str, str]]) -> list[tuple[str, str]]:
+    return [pair for job, pair in jobs.items() if job.cancelled() or not job.done()]
+
+
+async def _cancel(jobs: Collection[asyncio.Task]):
+    """Cancel jobs and wait until they stopped."""
+    for job in jobs:
+        job.cancel()
+    await asyncio.gather(*jobs, return_exceptions=True)
+
+
+async def _wait_for_crawl_jobs(
+    crawl_jobs: dict[asyncio.Task, tuple[str, str]], timeout: float | None
+) -> list[tuple[str, str]]:
+    """Wait for crawl jobs, cancel those unfinished at the timeout and return them.
+
+    The cancelled jobs are removed from `crawl_jobs`.
+    """
+    if not crawl_jobs:
+        return []
+    done, unfinished = await asyncio.wait(crawl_jobs, timeout=timeout)
+    await _cancel(unfinished)
+    for job in done:
+        job.result()
+    return [crawl_jobs.pop(job) for job in unfinished]
+
+
+async def crawl_companies(body: CompaniesRequest, token: str, task: TaskStatusModel):
+    """Crawl the handles of a task and report the outcome to the analytics.
+
+    Every handle is a job of the scheduler. Scraped data is delivered to the
+    analytics in batches. In incremental mode only reviews newer than the stored
+    watermark are sent, and the watermark advances once the analytics accepted the
+    data. With checkpointing, handles fed by an earlier run of the task are skipped
+    and every accepted handle is recorded right away.
+
+    Crawling and feeding run under the deadline of the task. Handles still being
+    crawled when `crawl_delivery_share` of the remaining time is left are
+    cancelled, data scraped before is still delivered. Handles not crawled or not
+    delivered by the deadline are reported as `CrawlingInternalError`, and the
+    analytics are notified in any case.
+    """
+    errors: dict[str, ErrorInfoModel] = {}
+    settlements: dict[asyncio.Task, tuple[str, str]] = {}
+    fed = checkpoint_store.fed_handles(task.task_id) if checkpoint_store else set()
+
+    async def settle(
+        company_id: str,
+        handle: str,
+        scraped_data: ProductInfo,
+        delivery: asyncio.Future,
+    ):
+        try:
+            await delivery
+        except AnalyticsError as e:
+            logger.error(f"Can't send crawling data to the Analytics. Error: {e}")
+            collect_errors(company_id, errors, e)
+            return
+        if watermark_store and scraped_data.newest_review:
+            watermark_store.set(
+                company_id, handle, Watermark.from_review(scraped_data.newest_review)
+            )
+        if checkpoint_store:
+            checkpoint_store.mark_fed(task.task_id, company_id, handle)
+
+    async def crawl_handle(company_id: str, handle: str, batcher: RawDataBatcher):
+        since = watermark_store.get(company_id, handle) if watermark_store else None
+        try:
+            scraped_data = await scheduler.run_job(
+                task.task_id,
+                lambda: producthunt_scraper.scrape_product_page(handle, since=since),
+            )
+        except CrawlingError as e:
+            logger.error(f"Can't fetch Product details from ProductHunt. Error: {e}")
+            collect_errors(company_id, errors, e)
+            return
+
+        data = ResponseModel(
+            source_name="producthunt",
+            company_id=company_id,
+            raw_data=scraped_data,
+        )
+        # Write data to db via endpoint in analytics backend
+        delivery = await batcher.submit(data)
+        settlement = asyncio.create_task(
+            settle(company_id, handle, scraped_data, delivery)
+        )
+        settlements[settlement] = (company_id, handle)
+
+    handles, invalid_handles = _split_handles(body)
+    errors.update(invalid_handles)
+    crawl_jobs: dict[asyncio.Task, tuple[str, str]] = {}
+    remaining = _remaining(_task_deadline(body))
+    # the crawl stops early enough to deliver its data before the deadline
+    crawl_time = None if remaining is None else remaining * (1 - crawl_delivery_share)
+    try:
+        async with asyncio.timeout(remaining):
+            async with analytics_client.raw_data_batcher(token) as batcher:
+                for company_id, handle in handles:
+                    if (company_id, handle) in fed:
+                        task.completed += 1
+                    elif remaining == 0:
+                        task.failed += 1
+                        _out_of_time(task.task_id, errors, company_id, handle)
+                    else:
+                        job = asyncio.create_task(
+                            crawl_handle(company_id, handle, batcher)
+                        )
+                        crawl_jobs[job] = (company_id, handle)
+                for company_id, handle in await _wait_for_crawl_jobs(
+                    crawl_jobs, crawl_time
+                ):
+                    _out_of_time(task.task_id, errors, company_id, handle)
+            await asyncio.gather(*settlements)
+    except TimeoutError:
+        for jobs, step in ((crawl_jobs, "crawled"), (settlements, "delivered")):
+            for company_id, handle in _unfinished(jobs):
+                _out_of_time(task.task_id, errors, company_id, handle, step)
+        await _cancel([*crawl_jobs, *settlements])
+
+    await analytics_client.crawling_finished(
         token,
-        json.loads(
-            CrawlingFinishedInputModel(
-                task_id=body.task_id, errors=errors
-            ).model_dump_json()
+        CrawlingFinishedInputModel(task_id=body.task_id, errors=errors).model_dump(
+            mode="json"
         ),
     )
+    if checkpoint_store:
+        checkpoint_store.finish_task(task.task_id)
+
+
+async def crawl_unit(unit: WorkUnit) -> ErrorInfoModel | None:
+    """Crawl a unit of the work queue and feed its data to the analytics.
+
+    Units whose task ran out of time are reported as `CrawlingInternalError`.
+    """
+    remaining = _remaining(unit.deadline)
+    if remaining == 0:
+        logger.error(f"Task {unit.task_id} ran out of time for {unit.handle}")
+        return error_info(_deadline_exceeded(unit.task_id, unit.handle))
+    since = (
+        watermark_store.get(unit.company_id, unit.handle) if watermark_store else None
+    )
+    try:
+        async with asyncio.timeout(remaining):
+            scraped_data = await producthunt_scraper.scrape_product_page(
+                unit.handle, since=since
+            )
+            await analytics_client.feed_raw_data(
+                unit.token,
+                ResponseModel(
+                    source_name="producthunt",
+                    company_id=unit.company_id,
+                    raw_data=scraped_data,
+                ),
+            )
+    except TimeoutError:
+        logger.error(f"Task {unit.task_id} ran out of time for {unit.handle}")
+        return error_info(_deadline_exceeded(unit.task_id, unit.handle))
+    except (CrawlingError, AnalyticsError) as e:
+        logger.error(f"Can't crawl {unit.handle} of {unit.company_id}. Error: {e}")
+        return error_info(e)
+    if watermark_store and scraped_data.newest_review:
+        watermark_store.set(
+            unit.company_id,
+            unit.handle,
+            Watermark.from_review(scraped_data.newest_review),
+        )
+    return None
+
+
+async def finish_distributed_task(task: FinishedTask):
+    """Notify the analytics that all units of a distributed task are done."""
+    await analytics_client.crawling_finished(
+        task.token,
+        CrawlingFinishedInputModel(task_id=task.task_id, errors=task.errors).model_dump(
+            mode="json"
+        ),
+    )
+
+
+async def enqueue_task(
+    queue: WorkQueue, body: CompaniesRequest, token: str
+) -> TaskStatusModel:
+    """Split a task into units on the work queue shared by the replicas."""
+    handles, errors = _split_handles(body)
+    task = await queue.enqueue(
+        body.task_id, token, handles, errors, deadline=_task_deadline(body)
+    )
+    if not handles:
+        await finish_distributed_task(FinishedTask(body.task_id, token, errors))
+    return task
+
+
+def submit_task(body: CompaniesRequest, token: str) -> TaskStatusModel:
+    """Hand a crawling task to the scheduler."""
+    return scheduler.submit(
+        body.task_id,
+        lambda task: crawl_companies(body, token, task),
+        total=_count_handles(body),
+    )
+
+
+def _checkpoint_expiry(body: CompaniesRequest, token: str) -> float:
+    """Return when the checkpoint of a task expires.
+
+    A task is not resumed once its token expired, its deadline passed or it is
+    older than `checkpoint_max_age`.
+    """
+    expiries = [time.time() + checkpoint_max_age]
+    if (token_expiry := JWTHandler.token_expiry(token)) is not None:
+        expiries.append(token_expiry)
+    if body.deadline is not None:
+        expiries.append(body.deadline.timestamp())
+    return min(expiries)
+
+
+def start_checkpointed_task(body: CompaniesRequest, token: str) -> TaskStatusModel:
+    """Record the checkpoint of a task and hand the task to the scheduler.
+
+    A task that is still running is not started again, so it does not count as
+    another attempt either.
+    """
+    assert checkpoint_store is not None
+    if scheduler.is_running(body.task_id):
+        return submit_task(body, token)
+    checkpoint_store.start_task(
+        body.task_id, body.model_dump_json(), token, _checkpoint_expiry(body, token)
+    )
+    return submit_task(body, token)
+
+
+def resume_tasks():
+    """Resume the tasks that were interrupted before they finished.
+
+    Expired checkpoints and tasks that ran `checkpoint_max_attempts` times
+    without finishing are dropped instead.
+    """
+    if not checkpoint_store:
+        return
+    for task_id in checkpoint_store.expire_tasks():
+        logger.error(f"Dropped the expired checkpoint of task {task_id}")
+    for checkpoint in checkpoint_store.unfinished_tasks():
+        if checkpoint.attempts >= checkpoint_max_attempts:
+            logger.error(
+                f"Giving up task {checkpoint.task_id} after"
+                f" {checkpoint.attempts} attempts"
+            )
+            checkpoint_store.finish_task(checkpoint.task_id)
+            continue
+        logger.info(f"Resuming task {checkpoint.task_id} from its checkpoint")
+        start_checkpointed_task(
+            CompaniesRequest.model_validate_json(checkpoint.request), checkpoint.token
+        )
+
+
+@app.post(
+    "/companies",
+    response_model=TaskStatusModel,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def get_company_details(
+    body: CompaniesRequest, token: str = Depends(authenticate)
+):
+    """Endpoint to get product data based on a dict with the respective urls.
+
+    The task is handed to the job scheduler and crawled in the background, its
+    progress is available at `/tasks/{task_id}`. The analytics are notified through
+    `crawling_finished` once the task is done.
+
+    With a work queue the task is split into units that any replica can crawl, and
+    the replica completing the last unit notifies the analytics.
+    """
+    if work_queue:
+        return await enqueue_task(work_queue, body, token)
+    if checkpoint_store:
+        return start_checkpointed_task(body, token)
+    return submit_task(body, token)
+
+
+@app.get(
+    "/tasks/{task_id}",
+    response_model=TaskStatusModel,
+    status_code=status.HTTP_200_OK,
+)
+async def get_task_status(task_id: int, token: str = Depends(authenticate)):
+    """Endpoint to get the progress of a crawling task."""
+    task = (
+        await work_queue.status(task_id) if work_queue else scheduler.status(task_id)
+    )
+    if task is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown task {task_id}"
+        )
+    return task
 
 
 @app.post(
@@ -134,24 +575,80 @@ def get_company_details(body: CompaniesRequest, token: str = Depends(authenticat
     response_model=DiscoveryResponse,
     status_code=status.HTTP_200_OK,
 )
-def discover_companies(
-    request: list[DiscoveryRequest], token: str = Depends(authenticate)
+async def discover_companies(
+    request: list[DiscoveryRequest],
+    token: str = Depends(authenticate),
+    accept: str | None = Header(None),
+    stream: bool = False,
 ):
-    """Endpoint to discover products based on provided names."""
+    """Endpoint to discover products based on provided names.
+
+    Names are normalized and deduplicated, so every distinct company name is
+    searched once. Searches run concurrently, bounded by `discovery_concurrency`,
+    and non-empty results are cached for the validity period of the response.
+
+    With `Accept: application/x-ndjson` or `?stream=true` the response is streamed
+    as NDJSON: one `DiscoveryStreamEntry` per company as soon as its search
+    completed, followed by a `DiscoveryStreamTrailer` with the validity.
+    """
     if not request:
         msg = "Request body cannot be empty for discovery"
         logger.error(msg)
         raise ClientInvalidBodyError(msg)
 
-    response_data = {}
-    for company in request:
-        logger.debug(
-            f"Discovering with name: {company.name} for company_id {company.company_id}"
+    semaphore = asyncio.Semaphore(discovery_concurrency)
+
+    async def discover(name: str) -> tuple[str, DiscoveryModel]:
+        products = discovery_cache.get(name)
+        if products is None:
+            async with semaphore:
+                logger.debug(f"Discovering with name: {name}")
+                products = DiscoveryModel.model_validate(
+                    await producthunt_scraper.search_organizations(name)
+                )
+            if products.producthunt_url:
+                discovery_cache.put(name, products)
+        return name, products
+
+    names = {
+        company.company_id: normalize_company_name(company.name) for company in request
+    }
+
+    if stream or (accept and NDJSON_MEDIA_TYPE in accept):
+        return StreamingResponse(
+            _stream_discovery(names, discover), media_type=NDJSON_MEDIA_TYPE
         )
-        products = producthunt_scraper.search_organizations(company.name)
-        response_data[company.company_id] = products
+
+    results = dict(await asyncio.gather(*(discover(n) for n in set(names.values()))))
+    response_data = {company_id: results[name] for company_id, name in names.items()}
 
     current_date = datetime.now()
-    valid_until = current_date + timedelta(days=180)
+    valid_until = current_date + discovery_validity
 
     return DiscoveryResponse(identifiers=response_data, validity=valid_until)
+
+
+async def _stream_discovery(
+    names: dict[str, str],
+    discover: Callable[[str], Awaitable[tuple[str, DiscoveryModel]]],
+) -> AsyncIterator[bytes]:
+    company_ids: dict[str, list[str]] = {}
+    for company_id, name in names.items():
+        company_ids.setdefault(name, []).append(company_id)
+
+    searches = [asyncio.ensure_future(discover(name)) for name in company_ids]
+    try:
+        for search in asyncio.as_completed(searches):
+            name, products = await search
+            for company_id in company_ids[name]:
+                entry = DiscoveryStreamEntry(
+                    company_id=company_id, identifiers=products
+                )
+                yield entry.model_dump_json().encode("utf-8") + b"\n"
+    finally:
+        # the client may disconnect before every search completed
+        for search in searches:
+            search.cancel()
+
+    trailer = DiscoveryStreamTrailer(validity=datetime.now() + discovery_validity)
+    yield trailer.model_dump_json().encode("utf-8") + b"\n"
@@ -0,0 +1,219 @@
+"""Stores for the checkpoints of crawling tasks.
+
+A checkpoint holds the request of a task and the (company_id, handle) pairs
+whose data the analytics already accepted. Tasks that were interrupted, e.g. by a
+restart, are resumed from their checkpoint and skip the handles fed before, so
+every record is written to the analytics once. The checkpoint of a task is
+removed when the analytics were notified that crawling finished.
+
+Checkpoints count the attempts of their task and expire, at the latest when the
+token of the task does: the token is kept in plain text to notify the analytics
+on resumption, so the store must be as protected as the tokens themselves.
+"""
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import NamedTuple
+
+
+class TaskCheckpoint(NamedTuple):
+    """Request of an unfinished task."""
+
+    task_id: int
+    request: str
+    token: str
+    # runs of the task started so far, including the first one
+    attempts: int = 1
+    # the task is given up after this UNIX timestamp, e.g. when its token expired
+    expires_at: float | None = None
+
+
+class CheckpointStore(ABC):
+    """Interface of a store that keeps the checkpoints of unfinished tasks."""
+
+    @abstractmethod
+    def start_task(
+        self, task_id: int, request: str, token: str, expires_at: float | None = None
+    ):
+        """Record a run of a task.
+
+        A task started before keeps the handles already fed and counts one more
+        attempt.
+        """
+
+    @abstractmethod
+    def mark_fed(self, task_id: int, company_id: str, handle: str):
+        """Record that the data of a handle was accepted by the analytics."""
+
+    @abstractmethod
+    def fed_handles(self, task_id: int) -> set[tuple[str, str]]:
+        """Return the (company_id, handle) pairs already fed for a task."""
+
+    @abstractmethod
+    def finish_task(self, task_id: int):
+        """Remove the checkpoint of a finished task."""
+
+    @abstractmethod
+    def unfinished_tasks(self) -> list[TaskCheckpoint]:
+        """Return the tasks that were started but not finished."""
+
+    @abstractmethod
+    def expire_tasks(self, now: float | None = None) -> list[int]:
+        """Remove the checkpoints that expired and return their task ids."""
+
+    def close(self):
+        """Release the resources of the store."""
+
+
+class InMemoryCheckpointStore(CheckpointStore):
+    """Checkpoint store that lives as long as the process."""
+
+    def __init__(self):
+        self._tasks: dict[int, TaskCheckpoint] = {}
+        self._fed: dict[int, set[tuple[str, str]]] = {}
+
+    def start_task(
+        self, task_id: int, request: str, token: str, expires_at: float | None = None
+    ):
+        """Record a run of a task.
+
+        A task started before keeps the handles already fed and counts one more
+        attempt.
+        """
+        started = self._tasks.get(task_id)
+        attempts = started.attempts + 1 if started else 1
+        self._tasks[task_id] = TaskCheckpoint(
+            task_id, request, token, attempts, expires_at
+        )
+        self._fed.setdefault(task_id, set())
+
+    def mark_fed(self, task_id: int, company_id: str, handle: str):
+        """Record that the data of a handle was accepted by the analytics."""
+        self._fed.setdefault(task_id, set()).add((company_id, handle))
+
+    def fed_handles(self, task_id: int) -> set[tuple[str, str]]:
+        """Return the (company_id, handle) pairs already fed for a task."""
+        return set(self._fed.get(task_id, ()))
+
+    def finish_task(self, task_id: int):
+        """Remove the checkpoint of a finished task."""
+        self._tasks.pop(task_id, None)
+        self._fed.pop(task_id, None)
+
+    def unfinished_tasks(self) -> list[TaskCheckpoint]:
+        """Return the tasks that were started but not finished."""
+        return sorted(self._tasks.values())
+
+    def expire_tasks(self, now: float | None = None) -> list[int]:
+        """Remove the checkpoints that expired and return their task ids."""
+        now = time.time() if now is None else now
+        expired = sorted(
+            task.task_id
+            for task in self._tasks.values()
+            if task.expires_at is not None and task.expires_at <= now
+        )
+        for task_id in expired:
+            self.finish_task(task_id)
+        return expired
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """Checkpoint store backed by a local SQLite database in WAL mode."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS crawl_tasks ("
+                " task_id INTEGER PRIMARY KEY,"
+                " request TEXT NOT NULL,"
+                " token TEXT NOT NULL,"
+                " attempts INTEGER NOT NULL DEFAULT 1,"
+                " expires_at REAL)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS crawl_task_handles ("
+                " task_id INTEGER NOT NULL,"
+                " company_id TEXT NOT NULL,"
+                " handle TEXT NOT NULL,"
+                " PRIMARY KEY (task_id, company_id, handle))"
+            )
+
+    def start_task(
+        self, task_id: int, request: str, token: str, expires_at: float | None = None
+    ):
+        """Record a run of a task.
+
+        A task started before keeps the handles already fed and counts one more
+        attempt.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO crawl_tasks (task_id, request, token, expires_at)"
+                " VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (task_id) DO UPDATE SET"
+                " request = excluded.request, token = excluded.token,"
+                " attempts = attempts + 1, expires_at = excluded.expires_at",
+                (task_id, request, token, expires_at),
+            )
+
+    def mark_fed(self, task_id: int, company_id: str, handle: str):
+        """Record that the data of a handle was accepted by the analytics."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO crawl_task_handles (task_id, company_id, handle)"
+                " VALUES (?, ?, ?)",
+                (task_id, company_id, handle),
+            )
+
+    def fed_handles(self, task_id: int) -> set[tuple[str, str]]:
+        """Return the (company_id, handle) pairs already fed for a task."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT company_id, handle FROM crawl_task_handles WHERE task_id = ?",
+                (task_id,),
+            ).fetchall()
+        return {(company_id, handle) for company_id, handle in rows}
+
+    def finish_task(self, task_id: int):
+        """Remove the checkpoint of a finished task."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM crawl_task_handles WHERE task_id = ?", (task_id,)
+            )
+            self._connection.execute(
+                "DELETE FROM crawl_tasks WHERE task_id = ?", (task_id,)
+            )
+
+    def unfinished_tasks(self) -> list[TaskCheckpoint]:
+        """Return the tasks that were started but not finished."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT task_id, request, token, attempts, expires_at"
+                " FROM crawl_tasks ORDER BY task_id"
+            ).fetchall()
+        return [TaskCheckpoint(*row) for row in rows]
+
+    def expire_tasks(self, now: float | None = None) -> list[int]:
+        """Remove the checkpoints that expired and return their task ids."""
+        now = time.time() if now is None else now
+        with self._lock, self._connection:
+            expired = [
+                task_id
+                for (task_id,) in self._connection.execute(
+                    "DELETE FROM crawl_tasks WHERE expires_at <= ? RETURNING task_id",
+                    (now,),
+                ).fetchall()
+            ]
+            self._connection.executemany(
+                "DELETE FROM crawl_task_handles WHERE task_id = ?",
+                [(task_id,) for task_id in expired],
+            )
+        return sorted(expired)
+
+    def close(self):
+        """Close the database connection."""
+        self._connection.close()
@@ -0,0 +1,78 @@
+"""Command line interface of the Product Hunt mining module."""
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Annotated
+
+import typer
+
+from parma_mining.producthunt.reextract import reextract
+
+app = typer.Typer(help="Tools of the Product Hunt mining module.")
+
+
+@app.callback()
+def main():
+    """Tools of the Product Hunt mining module."""
+
+
+@app.command("reextract")
+def reextract_command(
+    archive: Annotated[
+        Path,
+        typer.Argument(
+            help="Page archive directory (PAGE_ARCHIVE_PATH).",
+            exists=True,
+            file_okay=False,
+        ),
+    ],
+    output: Annotated[
+        Path | None,
+        typer.Option("--output", "-o", help="NDJSON file, standard output if unset."),
+    ] = None,
+    workers: Annotated[
+        int,
+        typer.Option(min=0, help="Extraction processes, 0 uses all cores."),
+    ] = 0,
+    prefer_embedded_state: Annotated[
+        bool,
+        typer.Option(
+            "--prefer-embedded-state/--scan-dom",
+            help="Read pages from their embedded state before scanning the DOM.",
+        ),
+    ] = True,
+    until: Annotated[
+        datetime | None,
+        typer.Option(help="Only use crawls started up to this time."),
+    ] = None,
+):
+    """Extract the archived products again and write them as NDJSON.
+
+    Every line holds the product url, the start time of its latest archived crawl
+    and the extracted `ProductInfo`.
+    """
+    stream = output.open("w", encoding="utf-8") if output else sys.stdout
+    count = 0
+    try:
+        for product, info in reextract(
+            str(archive),
+            workers=workers or None,
+            prefer_embedded_state=prefer_embedded_state,
+            until=until.timestamp() if until else None,
+        ):
+            line = {
+                "url": product.url,
+                "crawled_at": product.crawled_at,
+                "product": info.model_dump(mode="json"),
+            }
+            stream.write(json.dumps(line) + "\n")
+            count += 1
+    finally:
+        if output:
+            stream.close()
+    typer.echo(f"Re-extracted {count} products", err=True)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,82 @@
+"""Helpers for discovering Product Hunt products by company name."""
+import re
+import time
+from collections import OrderedDict
+
+from parma_mining.producthunt.model import DiscoveryModel
+
+_LEGAL_SUFFIXES = (
+    "gmbh & co. kg",
+    "gmbh & co kg",
+    "gmbh",
+    "mbh",
+    "ag",
+    "se",
+    "kg",
+    "ug",
+    "inc",
+    "incorporated",
+    "llc",
+    "ltd",
+    "limited",
+    "corp",
+    "corporation",
+    "co",
+    "company",
+    "plc",
+    "bv",
+    "nv",
+    "sa",
+    "sas",
+    "srl",
+    "oy",
+    "ab",
+)
+_LEGAL_SUFFIX_PATTERN = re.compile(
+    r"(?:[\s,]+(?:"
+    + "|".join(re.escape(suffix) for suffix in _LEGAL_SUFFIXES)
+    + r")\.?)+$"
+)
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_company_name(name: str) -> str:
+    """Normalize a company name for searching and deduplication.
+
+    The name is lower-cased, whitespace is collapsed and trailing legal form
+    suffixes such as GmbH or Inc. are removed.
+    """
+    normalized = _WHITESPACE_PATTERN.sub(" ", name).strip().lower()
+    stripped = _LEGAL_SUFFIX_PATTERN.sub("", normalized).strip(" ,")
+    return stripped or normalized
+
+
+class DiscoveryCache:
+    """In-memory cache of discovery results with a TTL and a size bound."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, DiscoveryModel]] = OrderedDict()
+
+    def get(self, name: str) -> DiscoveryModel | None:
+        """Return the cached result for a normalized name unless it expired."""
+        entry = self._entries.get(name)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[name]
+            return None
+        return result
+
+    def put(self, name: str, result: DiscoveryModel):
+        """Cache the result for a normalized name."""
+        self._entries[name] = (time.monotonic(), result)
+        self._entries.move_to_end(name)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached results."""
+        self._entries.clear()
@@ -0,0 +1,86 @@
+"""Reader for the data Product Hunt embeds into its server-rendered pages.
+
+Product Hunt pages are rendered by Next.js and ship the Apollo cache that was used
+to render them as JSON in a `__NEXT_DATA__` script block. Reading that blob is
+much cheaper and more stable than scraping hashed CSS class names.
+"""
+import orjson
+
+_NEXT_DATA_MARKER = b'id="__NEXT_DATA__"'
+_SCRIPT_END = b"</script>"
+_APOLLO_STATE_KEYS = ("apolloState", "__APOLLO_STATE__", "initialApolloState")
+
+
+def read_apollo_state(content: bytes | str) -> dict | None:
+    """Return the Apollo cache embedded in a page, or None if there is none.
+
+    The script block is located with plain byte searches, so no DOM is built.
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    marker = content.find(_NEXT_DATA_MARKER)
+    if marker == -1:
+        return None
+    start = content.find(b">", marker) + 1
+    end = content.find(_SCRIPT_END, start)
+    if start == 0 or end == -1:
+        return None
+
+    try:
+        next_data = orjson.loads(content[start:end])
+    except ValueError:
+        return None
+    if not isinstance(next_data, dict):
+        return None
+
+    props = next_data.get("props") or {}
+    for container in (props, props.get("pageProps") or {}):
+        for key in _APOLLO_STATE_KEYS:
+            state = container.get(key)
+            if isinstance(state, dict) and state:
+                return state
+    return None
+
+
+def _entities(state: dict, typename: str) -> list[tuple[str, dict]]:
+    return [
+        (key, value)
+        for key, value in state.items()
+        if isinstance(value, dict) and value.get("__typename") == typename
+    ]
+
+
+def _ref(value) -> str | None:
+    return value.get("__ref") if isinstance(value, dict) else None
+
+
+def find_product(state: dict, slug: str | None = None) -> tuple[str, dict] | None:
+    """Find the product a page is about.
+
+    With a `slug` only the product with that slug is returned: the cache also
+    holds related and featured products, which must not be taken for it. Without
+    a slug the first product is returned.
+    """
+    products = _entities(state, "Product")
+    if slug:
+        for key, product in products:
+            if product.get("slug") == slug:
+                return key, product
+        return None
+    return products[0] if products else None
+
+
+def find_reviews(state: dict, product_key: str | None = None) -> list[dict]:
+    """Return the reviews in the cache, newest first.
+
+    Reviews that reference a different product than `product_key` are skipped.
+    """
+    reviews = [
+        review
+        for _, review in _entities(state, "Review")
+        if product_key is None
+        or _ref(review.get("product")) in (None, product_key)
+    ]
+    return sorted(
+        reviews, key=lambda review: review.get("createdAt") or "", reverse=True
+    )
@@ -0,0 +1,253 @@
+"""On-disk HTTP response cache used underneath the Product Hunt HTTP session.
+
+Responses to GET requests are stored zstd compressed in a SQLite database. A
+cached response is served without network access while it is younger than the
+request's max age; afterwards it is revalidated with a conditional request
+(`If-None-Match` / `If-Modified-Since`) and a `304 Not Modified` answer is
+served from the cache. Entries expire after a TTL and the least recently used
+entries are evicted once the stored bodies exceed a size cap.
+
+Every response passing through the cache carries the `x-cache` header (`MISS`,
+`HIT` or `REVALIDATED`).
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+import httpx
+import zstandard
+
+CACHE_MAX_AGE_EXTENSION = "cache_max_age"
+CACHE_STATUS_HEADER = "x-cache"
+
+# headers that describe the transfer encoding of the original response, the
+# cached body is stored and served decoded
+_TRANSFER_HEADERS = frozenset(
+    {"content-encoding", "content-length", "transfer-encoding", "connection"}
+)
+
+
+@dataclass
+class CachedResponse:
+    """A response as stored in the cache."""
+
+    status_code: int
+    headers: list[tuple[str, str]]
+    body: bytes
+    stored_at: float
+    etag: str | None = None
+    last_modified: str | None = None
+
+    def age(self, now: float) -> float:
+        """Return the number of seconds since the response was stored."""
+        return now - self.stored_at
+
+
+class ResponseCache:
+    """SQLite store of compressed HTTP responses with TTL and LRU eviction.
+
+    The total size of the stored bodies is tracked with every change, so the
+    table is only scanned for eviction once it exceeds the size cap.
+    """
+
+    def __init__(self, path: str, ttl: float, max_bytes: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._compressor = zstandard.ZstdCompressor(level=3)
+        self._decompressor = zstandard.ZstdDecompressor()
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS http_responses ("
+                " key TEXT PRIMARY KEY,"
+                " status_code INTEGER NOT NULL,"
+                " headers TEXT NOT NULL,"
+                " etag TEXT,"
+                " last_modified TEXT,"
+                " body BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " stored_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS http_responses_accessed_at"
+                " ON http_responses (accessed_at)"
+            )
+            (self.size,) = self._connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM http_responses"
+            ).fetchone()
+
+    def get(self, key: str) -> CachedResponse | None:
+        """Return the cached response for `key` unless it is missing or expired."""
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT status_code, headers, etag, last_modified, body, size,"
+                " stored_at FROM http_responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            status_code, headers, etag, last_modified, body, size, stored_at = row
+            if now - stored_at > self.ttl:
+                self._connection.execute(
+                    "DELETE FROM http_responses WHERE key = ?", (key,)
+                )
+                self.size -= size
+                return None
+            self._connection.execute(
+                "UPDATE http_responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        return CachedResponse(
+            status_code=status_code,
+            headers=[tuple(header) for header in json.loads(headers)],
+            body=self._decompressor.decompress(body),
+            stored_at=stored_at,
+            etag=etag,
+            last_modified=last_modified,
+        )
+
+    def put(self, key: str, response: CachedResponse):
+        """Store a response and evict entries beyond the size cap."""
+        body = self._compressor.compress(response.body)
+        now = time.time()
+        with self._lock, self._connection:
+            replaced = self._connection.execute(
+                "SELECT size FROM http_responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO http_responses (key, status_code, headers,"
+                " etag, last_modified, body, size, stored_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    response.status_code,
+                    json.dumps(response.headers),
+                    response.etag,
+                    response.last_modified,
+                    body,
+                    len(body),
+                    response.stored_at,
+                    now,
+                ),
+            )
+            self.size += len(body) - (replaced[0] if replaced else 0)
+            if self.size > self.max_bytes:
+                self._evict()
+
+    def touch(self, key: str, stored_at: float):
+        """Mark a revalidated entry as fresh again."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE http_responses SET stored_at = ?, accessed_at = ?"
+                " WHERE key = ?",
+                (stored_at, stored_at, key),
+            )
+
+    def _evict(self):
+        """Drop expired entries, then the least recently used ones."""
+        expired = self._connection.execute(
+            "DELETE FROM http_responses WHERE stored_at < ? RETURNING size",
+            (time.time() - self.ttl,),
+        ).fetchall()
+        self.size -= sum(size for (size,) in expired)
+        evicted = []
+        rows = self._connection.execute(
+            "SELECT key, size FROM http_responses ORDER BY accessed_at"
+        )
+        for key, size in rows:
+            if self.size <= self.max_bytes:
+                break
+            evicted.append((key,))
+            self.size -= size
+        rows.close()
+        self._connection.executemany(
+            "DELETE FROM http_responses WHERE key = ?", evicted
+        )
+
+    def close(self):
+        """Close the database connection."""
+        self._connection.close()
+
+
+class CachingTransport(httpx.AsyncBaseTransport):
+    """Transport that answers GET requests from a `ResponseCache` when it can.
+
+    The max age of a request defaults to `default_max_age` and can be set per
+    request with the `cache_max_age` request extension. A max age of 0 makes
+    every request revalidate the cached response. The cache is read and written
+    in worker threads, as that compresses pages and queries the database.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        cache: ResponseCache,
+        default_max_age: float = 0,
+    ):
+        self.transport = transport
+        self.cache = cache
+        self.default_max_age = default_max_age
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Serve the request from the cache, revalidating it when it is stale."""
+        if request.method != "GET":
+            return await self.transport.handle_async_request(request)
+
+        key = str(request.url)
+        max_age = request.extensions.get(CACHE_MAX_AGE_EXTENSION, self.default_max_age)
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            if cached.age(time.time()) < max_age:
+                return self._cached_response(request, cached, "HIT")
+            if cached.etag:
+                request.headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                request.headers["If-Modified-Since"] = cached.last_modified
+
+        response = await self.transport.handle_async_request(request)
+
+        if cached is not None and response.status_code == httpx.codes.NOT_MODIFIED:
+            await response.aclose()
+            await asyncio.to_thread(self.cache.touch, key, time.time())
+            return self._cached_response(request, cached, "REVALIDATED")
+
+        body = await response.aread()
+        headers = [
+            (name, value)
+            for name, value in response.headers.multi_items()
+            if name.lower() not in _TRANSFER_HEADERS
+        ]
+        stored = CachedResponse(
+            status_code=response.status_code,
+            headers=headers,
+            body=body,
+            stored_at=time.time(),
+            etag=response.headers.get("etag"),
+            last_modified=response.headers.get("last-modified"),
+        )
+        if response.status_code == httpx.codes.OK and "no-store" not in (
+            response.headers.get("cache-control", "")
+        ):
+            await asyncio.to_thread(self.cache.put, key, stored)
+        return self._cached_response(request, stored, "MISS")
+
+    @staticmethod
+    def _cached_response(
+        request: httpx.Request, cached: CachedResponse, cache_status: str
+    ) -> httpx.Response:
+        return httpx.Response(
+            status_code=cached.status_code,
+            headers=[*cached.headers, (CACHE_STATUS_HEADER, cache_status)],
+            content=cached.body,
+            request=request,
+        )
+
+    async def aclose(self):
+        """Close the wrapped transport."""
+        await self.transport.aclose()
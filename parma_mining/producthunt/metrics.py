@@ -0,0 +1,117 @@
+"""Prometheus metrics of the Product Hunt mining module.
+
+Label values of the hot paths are resolved once at import time, so recording a
+sample costs a `perf_counter` call and a histogram update.
+"""
+import functools
+import time
+from collections.abc import Callable
+from contextlib import contextmanager
+from typing import ParamSpec, TypeVar
+
+from prometheus_client import Counter, Gauge, Histogram
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+# fetch targets of the Product Hunt client
+PRODUCT_PAGE = "product_page"
+REVIEWS_PAGE = "reviews_page"
+SEARCH = "search"
+
+FETCH_SECONDS = Histogram(
+    "producthunt_fetch_seconds",
+    "Latency of requests to Product Hunt by target.",
+    ["target"],
+)
+FETCH_IN_FLIGHT = Gauge(
+    "producthunt_fetch_in_flight",
+    "Requests to Product Hunt currently in flight.",
+    ["target"],
+)
+DOWNLOADED_BYTES = Counter(
+    "producthunt_downloaded_bytes",
+    "Bytes of content downloaded from Product Hunt by target.",
+    ["target"],
+)
+EXTRACT_SECONDS = Histogram(
+    "producthunt_extract_seconds",
+    "Time spent parsing pages and extracting fields by function.",
+    ["function"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+PARSE_POOL_SECONDS = Histogram(
+    "producthunt_parse_pool_seconds",
+    "Time to read a page in the parse process pool, including the transfer.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+PARSE_MEMO_LOOKUPS = Counter(
+    "producthunt_parse_memo_lookups",
+    "Lookups of parsed pages in the parse memo by result (hit or miss).",
+    ["result"],
+)
+PARSE_MEMO_HITS = PARSE_MEMO_LOOKUPS.labels("hit")
+PARSE_MEMO_MISSES = PARSE_MEMO_LOOKUPS.labels("miss")
+RETRIES = Counter(
+    "producthunt_retries",
+    "Retried requests to Product Hunt by reason.",
+    ["reason"],
+)
+SCRAPED_PRODUCTS = Counter(
+    "producthunt_scraped_products",
+    "Products scraped successfully.",
+)
+COALESCED_SCRAPES = Counter(
+    "producthunt_coalesced_scrapes",
+    "Product scrapes served by a scrape of the same product already in flight.",
+)
+EMPTY_RESULTS = Counter(
+    "producthunt_empty_results",
+    "Operations that failed and produced no data by operation.",
+    ["operation"],
+)
+ANALYTICS_REQUEST_SECONDS = Histogram(
+    "producthunt_analytics_request_seconds",
+    "Latency of requests to the analytics backend by endpoint.",
+    ["endpoint"],
+)
+
+
+def timed(histogram: Histogram) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """Record the duration of every call of the decorated function."""
+
+    def decorator(function: Callable[P, R]) -> Callable[P, R]:
+        @functools.wraps(function)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def timed_block(histogram: Histogram):
+    """Record the duration of the block."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - start)
+
+
+@contextmanager
+def track_fetch(target: str):
+    """Record the latency of a fetch and count it as in flight meanwhile."""
+    in_flight = FETCH_IN_FLIGHT.labels(target)
+    in_flight.inc()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        FETCH_SECONDS.labels(target).observe(time.perf_counter() - start)
+        in_flight.dec()
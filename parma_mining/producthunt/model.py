@@ -1,7 +1,13 @@
 """Model for the ProductHunt data."""
-from datetime import datetime
+import calendar
+from datetime import UTC, datetime
+from typing import Any
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, GetCoreSchemaHandler
+from pydantic_core import core_schema
+
+# date format of the reviews sent to the analytics
+REVIEW_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 
 class CompaniesRequest(BaseModel):
@@ -9,6 +15,9 @@ class CompaniesRequest(BaseModel):
 
     task_id: int
     companies: dict[str, dict[str, list[str]]]
+    # crawling stops at the deadline or once the time budget in seconds is spent
+    deadline: datetime | None = None
+    time_budget: float | None = Field(default=None, gt=0)
 
 
 class DiscoveryRequest(BaseModel):
@@ -31,11 +40,93 @@ class DiscoveryResponse(BaseModel):
     validity: datetime
 
 
-class Review(BaseModel):
-    """Review model."""
+class DiscoveryStreamEntry(BaseModel):
+    """Line of a streamed discovery response with the products of one company."""
+
+    company_id: str
+    identifiers: DiscoveryModel
+
+
+class DiscoveryStreamTrailer(BaseModel):
+    """Last line of a streamed discovery response."""
+
+    validity: datetime
+
 
-    text: str | None
-    date: str | None
+class Review:
+    """Compact record of a scraped review.
+
+    Products can have thousands of reviews, so reviews are slotted records instead
+    of models or dicts. The date is kept as seconds since the epoch of the
+    wall-clock time Product Hunt reports and is only formatted when the review is
+    serialized for the analytics, as `{"text": ..., "date": ...}`. The Product Hunt
+    review id is only used internally and not sent.
+    """
+
+    __slots__ = ("id", "text", "timestamp")
+
+    def __init__(
+        self,
+        id: str | None = None,
+        text: str | None = None,
+        timestamp: int | None = None,
+    ):
+        """Initialize the review."""
+        self.id = id
+        self.text = text
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_date(
+        cls,
+        id: str | None,
+        text: str | None,
+        date: str | None,
+    ) -> "Review":
+        """Create a review with an ISO 8601 date, keeping its wall-clock time."""
+        timestamp = (
+            calendar.timegm(datetime.fromisoformat(date).timetuple()) if date else None
+        )
+        return cls(id, text, timestamp)
+
+    @property
+    def date(self) -> str | None:
+        """Return the date in the format sent to the analytics."""
+        if self.timestamp is None:
+            return None
+        return datetime.fromtimestamp(self.timestamp, UTC).strftime(REVIEW_DATE_FORMAT)
+
+    def to_wire(self) -> dict[str, str | None]:
+        """Return the review as it is sent to the analytics."""
+        return {"text": self.text, "date": self.date}
+
+    def __eq__(self, other: object) -> bool:
+        """Compare reviews by their fields."""
+        if not isinstance(other, Review):
+            return NotImplemented
+        return (self.id, self.text, self.timestamp) == (
+            other.id,
+            other.text,
+            other.timestamp,
+        )
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        """Return a readable representation of the review."""
+        return f"Review(id={self.id!r}, text={self.text!r}, date={self.date!r})"
+
+    @classmethod
+    def __get_pydantic_core_schema__(
+        cls, source_type: Any, handler: GetCoreSchemaHandler
+    ) -> core_schema.CoreSchema:
+        """Accept reviews as they are and serialize them to the wire format."""
+        return core_schema.is_instance_schema(
+            cls,
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                cls.to_wire
+            ),
+        )
 
 
 class ProductInfo(BaseModel):
@@ -43,9 +134,12 @@ class ProductInfo(BaseModel):
 
     name: str | None = None
     overall_rating: float | None = None
-    review_count: int = 0
+    # None when only new reviews were collected and no total was reported
+    review_count: int | None = 0
     followers: int = 0
-    reviews: list = []
+    reviews: list[Review] = []
+    # newest collected review, the watermark for incremental crawling
+    newest_review: Review | None = Field(default=None, exclude=True)
 
 
 class ResponseModel(BaseModel):
@@ -68,3 +162,15 @@ class CrawlingFinishedInputModel(BaseModel):
 
     task_id: int
     errors: dict[str, ErrorInfoModel] | None = None
+
+
+class TaskStatusModel(BaseModel):
+    """Progress of a crawling task run by the job scheduler."""
+
+    task_id: int
+    status: str = "queued"
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+    created_at: datetime
+    finished_at: datetime | None = None
@@ -0,0 +1,165 @@
+"""Archive of the raw pages fetched from Product Hunt.
+
+Pages are stored content-addressed under the digest of their bytes and zstd
+compressed, so a page that did not change between crawls is stored once. Every
+fetch is recorded in a SQLite index by url and fetch time, together with the
+crawl of the product it belongs to. When Product Hunt changes its markup and an
+extractor is fixed, the pages of the archived crawls can be extracted again
+offline instead of crawling everything again.
+"""
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from pathlib import Path
+from typing import NamedTuple
+
+import zstandard
+
+from parma_mining.producthunt.parse_memo import page_digest
+
+
+class ArchivedCrawl(NamedTuple):
+    """A crawl of a product, the pages fetched by one product scrape."""
+
+    crawl_id: str
+    product_url: str
+    started_at: float
+    # only the reviews newer than a watermark were fetched
+    incremental: bool = False
+
+
+def new_crawl(product_url: str, incremental: bool = False) -> ArchivedCrawl:
+    """Start a crawl of a product."""
+    return ArchivedCrawl(uuid.uuid4().hex, product_url, time.time(), incremental)
+
+
+class ArchivedPage(NamedTuple):
+    """A fetch of a page recorded in the archive index."""
+
+    url: str
+    fetched_at: float
+    digest: str
+    target: str
+
+
+class PageArchive:
+    """Content-addressed, compressed archive of raw pages with a fetch index."""
+
+    def __init__(self, path: str):
+        self.root = Path(path)
+        self.objects = self.root / "objects"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            self.root / "index.db", timeout=30, check_same_thread=False
+        )
+        with self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS crawls ("
+                " crawl_id TEXT PRIMARY KEY,"
+                " product_url TEXT NOT NULL,"
+                " started_at REAL NOT NULL,"
+                " incremental INTEGER NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                " url TEXT NOT NULL,"
+                " fetched_at REAL NOT NULL,"
+                " digest TEXT NOT NULL,"
+                " target TEXT NOT NULL,"
+                " crawl_id TEXT NOT NULL REFERENCES crawls (crawl_id))"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS pages_by_url ON pages (url, fetched_at)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS pages_by_crawl ON pages (crawl_id)"
+            )
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects / digest[:2] / f"{digest}.zst"
+
+    def store(
+        self,
+        crawl: ArchivedCrawl,
+        url: str,
+        content: bytes,
+        target: str,
+        fetched_at: float | None = None,
+    ) -> str:
+        """Archive the content of a page fetched by a crawl and return its digest.
+
+        Compresses and writes the page, so call it outside of the event loop.
+        """
+        digest = page_digest(content)
+        path = self._object_path(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            # write to a temporary file first, so readers never see partial pages
+            partial = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+            partial.write_bytes(zstandard.ZstdCompressor(level=3).compress(content))
+            partial.replace(path)
+        if fetched_at is None:
+            fetched_at = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO crawls"
+                " (crawl_id, product_url, started_at, incremental)"
+                " VALUES (?, ?, ?, ?)",
+                (*crawl[:3], int(crawl.incremental)),
+            )
+            self._connection.execute(
+                "INSERT INTO pages (url, fetched_at, digest, target, crawl_id)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (url, fetched_at, digest, target, crawl.crawl_id),
+            )
+        return digest
+
+    def load(self, digest: str) -> bytes:
+        """Return the content of an archived page."""
+        return zstandard.ZstdDecompressor().decompress(
+            self._object_path(digest).read_bytes()
+        )
+
+    def crawls(
+        self, until: float | None = None
+    ) -> Iterator[tuple[ArchivedCrawl, list[ArchivedPage]]]:
+        """Yield the archived crawls with their pages, newest crawl first.
+
+        Only crawls started up to `until` are considered, if given.
+        """
+        with self._lock:
+            crawls = self._connection.execute(
+                "SELECT crawl_id, product_url, started_at, incremental FROM crawls"
+                " WHERE ? IS NULL OR started_at <= ?"
+                " ORDER BY started_at DESC",
+                (until, until),
+            ).fetchall()
+        for crawl_id, product_url, started_at, incremental in crawls:
+            with self._lock:
+                pages = self._connection.execute(
+                    "SELECT url, fetched_at, digest, target FROM pages"
+                    " WHERE crawl_id = ? ORDER BY fetched_at",
+                    (crawl_id,),
+                ).fetchall()
+            yield (
+                ArchivedCrawl(crawl_id, product_url, started_at, bool(incremental)),
+                [ArchivedPage(*page) for page in pages],
+            )
+
+    def history(self, url: str) -> list[ArchivedPage]:
+        """Return all fetches of a url, oldest first."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT url, fetched_at, digest, target FROM pages"
+                " WHERE url = ? ORDER BY fetched_at",
+                (url,),
+            ).fetchall()
+        return [ArchivedPage(*row) for row in rows]
+
+    def close(self):
+        """Close the index database."""
+        self._connection.close()
@@ -0,0 +1,176 @@
+"""Memoization of parsed pages keyed by a hash of their raw content.
+
+Pages whose bytes did not change since the last crawl do not need to be parsed
+again. `ParseMemo` keeps the parse results of recently seen pages in a bounded
+LRU and can write them through to a persistent `MemoBackingStore`, so results
+also survive restarts. In async code `aget` and `aput` access the backing store
+in a worker thread, so the event loop is not blocked on it. Hits and misses are
+counted on the memo and exported as the `producthunt_parse_memo_lookups` metric
+to monitor the hit rate.
+"""
+import asyncio
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+import xxhash
+
+from parma_mining.producthunt.metrics import PARSE_MEMO_HITS, PARSE_MEMO_MISSES
+
+T = TypeVar("T")
+
+
+def page_digest(content: bytes) -> str:
+    """Return a fast, collision-resistant digest of a page's raw content."""
+    return xxhash.xxh3_128_hexdigest(content)
+
+
+class MemoBackingStore(ABC):
+    """Interface of a persistent store for serialized parse results."""
+
+    @abstractmethod
+    def get(self, key: str) -> bytes | None:
+        """Return the serialized result stored under `key`, if any."""
+
+    @abstractmethod
+    def put(self, key: str, value: bytes):
+        """Store a serialized result under `key`."""
+
+    def close(self):
+        """Release the resources of the store."""
+
+
+class SQLiteMemoStore(MemoBackingStore):
+    """Backing store that keeps parse results in a local SQLite database."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS parse_memo ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL)"
+            )
+
+    def get(self, key: str) -> bytes | None:
+        """Return the serialized result stored under `key`, if any."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM parse_memo WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, value: bytes):
+        """Store a serialized result under `key`."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO parse_memo (key, value) VALUES (?, ?)",
+                (key, value),
+            )
+
+    def close(self):
+        """Close the database connection."""
+        self._connection.close()
+
+
+class ParseMemo(Generic[T]):
+    """Bounded LRU of parse results with an optional persistent backing store.
+
+    `dumps` and `loads` convert results to and from bytes for the backing store.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        backing_store: MemoBackingStore | None = None,
+        dumps: Callable[[T], bytes] | None = None,
+        loads: Callable[[bytes], T] | None = None,
+    ):
+        if backing_store is not None and (dumps is None or loads is None):
+            raise ValueError("A backing store needs dumps and loads functions")
+        self.max_entries = max_entries
+        self.backing_store = backing_store
+        self._dumps = dumps
+        self._loads = loads
+        self._entries: OrderedDict[str, T] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> T | None:
+        """Return the memoized result for `key` and count the lookup."""
+        value = self._lookup(key)
+        if value is None and self.backing_store is not None:
+            value = self._load(key, self.backing_store.get(key))
+        return self._count(value)
+
+    async def aget(self, key: str) -> T | None:
+        """Like `get`, reading the backing store in a worker thread."""
+        value = self._lookup(key)
+        if value is None and self.backing_store is not None:
+            stored = await asyncio.to_thread(self.backing_store.get, key)
+            value = self._load(key, stored)
+        return self._count(value)
+
+    def put(self, key: str, value: T):
+        """Memoize the result for `key`."""
+        self._remember(key, value)
+        if self.backing_store is not None and self._dumps is not None:
+            self.backing_store.put(key, self._dumps(value))
+
+    async def aput(self, key: str, value: T):
+        """Like `put`, writing the backing store in a worker thread."""
+        self._remember(key, value)
+        if self.backing_store is not None and self._dumps is not None:
+            await asyncio.to_thread(self.backing_store.put, key, self._dumps(value))
+
+    def _lookup(self, key: str) -> T | None:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def _load(self, key: str, stored: bytes | None) -> T | None:
+        if stored is None or self._loads is None:
+            return None
+        value = self._loads(stored)
+        self._remember(key, value)
+        return value
+
+    def _count(self, value: T | None) -> T | None:
+        if value is None:
+            self.misses += 1
+            PARSE_MEMO_MISSES.inc()
+        else:
+            self.hits += 1
+            PARSE_MEMO_HITS.inc()
+        return value
+
+    def _remember(self, key: str, value: T):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        """Return the share of lookups that were hits."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        """Return the hit/miss counters of the memo."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "entries": len(self._entries),
+        }
+
+    def close(self):
+        """Close the backing store."""
+        if self.backing_store is not None:
+            self.backing_store.close()
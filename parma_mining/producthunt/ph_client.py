@@ -1,53 +1,277 @@
 """Product Hunt client module."""
+import asyncio
+import dataclasses
+import importlib.util
+import json
 import logging
+import math
+import multiprocessing
+import os
 import re
-from datetime import datetime
+import urllib.parse
+from collections.abc import AsyncIterator
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
 
 import httpx
 from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lxml_html
 
-from parma_mining.producthunt.model import DiscoveryModel, ProductInfo
+from parma_mining.mining_common.exceptions import (
+    CrawlingExternalError,
+    CrawlingInternalError,
+)
+from parma_mining.producthunt.embedded_state import (
+    find_product,
+    find_reviews,
+    read_apollo_state,
+)
+from parma_mining.producthunt.http_cache import (
+    CACHE_MAX_AGE_EXTENSION,
+    CachingTransport,
+    ResponseCache,
+)
+from parma_mining.producthunt.metrics import (
+    COALESCED_SCRAPES,
+    DOWNLOADED_BYTES,
+    EMPTY_RESULTS,
+    EXTRACT_SECONDS,
+    PARSE_POOL_SECONDS,
+    PRODUCT_PAGE,
+    REVIEWS_PAGE,
+    SCRAPED_PRODUCTS,
+    SEARCH,
+    timed,
+    timed_block,
+    track_fetch,
+)
+from parma_mining.producthunt.model import DiscoveryModel, ProductInfo, Review
+from parma_mining.producthunt.page_archive import ArchivedCrawl, PageArchive, new_crawl
+from parma_mining.producthunt.parse_memo import ParseMemo, SQLiteMemoStore, page_digest
+from parma_mining.producthunt.rate_limiter import RateLimitedTransport, RateLimiter
+from parma_mining.producthunt.single_flight import SingleFlight
+from parma_mining.producthunt.text_pool import TextPool
+from parma_mining.producthunt.watermark_store import Watermark
 
+# Class tokens and patterns used by the single-pass page scan.
+_PRODUCT_NAME_CLASS = "color-darker-grey"
+_OVERALL_RATING_CLASS = "styles_reviewPositive__JY_9N"
+_FOLLOWERS_CLASS = "styles_count___6_8F"
+_REVIEW_CLASSES = frozenset({"flex", "direction-column"})
+_REVIEW_ID_PREFIX = "review-"
+_REVIEW_TEXT_CLASS = "styles_htmlText__iftLe"
+_FOLLOWERS_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s?[Kk]?")
+# review total in the summary next to the overall rating, "based on 1,234 reviews"
+_REVIEW_TOTAL_PATTERN = re.compile(r"(\d[\d,]*)\s+reviews?\b", re.IGNORECASE)
+_SCAN_EVENTS = ("start", "end")
+_END_OF_LIST_STATUS_CODES = frozenset({httpx.codes.NOT_FOUND, httpx.codes.GONE})
+# part of the parse memo keys, bump it whenever the extraction changes
+_SCAN_VERSION = 2
 
-def _extract_product_name(soup: BeautifulSoup) -> str | None:
-    product_name_div = soup.find("h1", class_="color-darker-grey")
-    return product_name_div.get_text(strip=True) if product_name_div else None
 
+class ScannedReview(NamedTuple):
+    """Raw values of a single review."""
 
-def _extract_overall_rating(soup: BeautifulSoup) -> float | None:
-    overall_rating_div = soup.find("div", class_="styles_reviewPositive__JY_9N")
-    rating = (
-        overall_rating_div.get_text(strip=True).split("/")[0]
-        if overall_rating_div
-        else None
+    id: str | None
+    text: str | None
+    date: str | None
+
+
+@dataclasses.dataclass
+class ScannedPage:
+    """Raw values collected from a page in a single traversal."""
+
+    product_name: str | None = None
+    overall_rating: str | None = None
+    followers: str | None = None
+    review_total: int | None = None
+    reviews: list[ScannedReview] = dataclasses.field(default_factory=list)
+
+
+def _dump_scanned_page(page: ScannedPage) -> bytes:
+    return json.dumps(dataclasses.asdict(page)).encode()
+
+
+def _load_scanned_page(data: bytes) -> ScannedPage:
+    fields = json.loads(data)
+    fields["reviews"] = [ScannedReview(*review) for review in fields["reviews"]]
+    return ScannedPage(**fields)
+
+
+def _element_text(element: lxml_html.HtmlElement) -> str:
+    # same semantics as BeautifulSoup's get_text(strip=True)
+    return "".join(text.strip() for text in element.itertext())
+
+
+def _scan_field(page: ScannedPage, element, tag: str, class_tokens: list[str]):
+    """Store the text of `element` if it is the first match of a page field."""
+    if tag == "h1":
+        if page.product_name is None and _PRODUCT_NAME_CLASS in class_tokens:
+            page.product_name = _element_text(element)
+    elif tag == "div":
+        if page.overall_rating is None and _OVERALL_RATING_CLASS in class_tokens:
+            page.overall_rating = _element_text(element)
+            summary = element.getparent()
+            total_match = _REVIEW_TOTAL_PATTERN.search(
+                _element_text(summary) if summary is not None else ""
+            )
+            if total_match and page.review_total is None:
+                page.review_total = int(total_match.group(1).replace(",", ""))
+        elif page.followers is None and _FOLLOWERS_CLASS in class_tokens:
+            page.followers = _element_text(element)
+
+
+def _scan_page(content: bytes | str) -> ScannedPage:
+    """Parse a page once with lxml and collect all known fields in one pass.
+
+    The tree is walked a single time; the first match of every field wins, and
+    review text and dates are attributed to the review container they appear in.
+    """
+    page = ScannedPage()
+    try:
+        root = lxml_html.document_fromstring(content)
+    except (etree.ParserError, ValueError):
+        return page
+
+    review_element = None
+    review_id: str | None = None
+    review_text: str | None = None
+    review_date: str | None = None
+    for event, element in etree.iterwalk(root, events=_SCAN_EVENTS):
+        if event == "end":
+            if element is review_element:
+                page.reviews.append(ScannedReview(review_id, review_text, review_date))
+                review_element = None
+            continue
+
+        tag = element.tag
+        if tag == "time":
+            if review_element is not None and review_date is None:
+                review_date = element.get("datetime")
+            continue
+        classes = element.get("class")
+        if not classes or not isinstance(tag, str):
+            continue
+        class_tokens = classes.split()
+
+        if review_element is None:
+            element_id = element.get("id", "")
+            if (
+                tag == "div"
+                and _REVIEW_CLASSES.issubset(class_tokens)
+                and element_id.startswith(_REVIEW_ID_PREFIX)
+            ):
+                review_element = element
+                review_id = element_id.removeprefix(_REVIEW_ID_PREFIX)
+                review_text = review_date = None
+                continue
+        elif (
+            tag == "div"
+            and review_text is None
+            and _REVIEW_TEXT_CLASS in class_tokens
+        ):
+            review_text = _element_text(element)
+            continue
+        _scan_field(page, element, tag, class_tokens)
+    return page
+
+
+def _read_embedded_page(content: bytes | str, slug: str | None) -> ScannedPage | None:
+    """Read the page fields from the embedded Apollo state, if the page has one."""
+    state = read_apollo_state(content)
+    if state is None:
+        return None
+    found = find_product(state, slug)
+    if found is None:
+        return None
+
+    product_key, product = found
+    rating = product.get("reviewsRating")
+    followers = product.get("followersCount")
+    review_total = product.get("reviewsCount")
+    return ScannedPage(
+        product_name=product.get("name"),
+        overall_rating=str(rating) if rating else None,
+        followers=str(followers) if followers is not None else None,
+        review_total=int(review_total) if review_total is not None else None,
+        reviews=[
+            ScannedReview(
+                str(review["id"]) if review.get("id") is not None else None,
+                review.get("body") or review.get("text"),
+                review.get("createdAt"),
+            )
+            for review in find_reviews(state, product_key)
+        ],
     )
-    return float(rating)
 
 
-def _extract_reviews(soup: BeautifulSoup) -> list:
-    reviews = []
-    for review_div in soup.find_all(
-        "div",
-        class_="flex direction-column",
-        id=lambda x: x and x.startswith("review-"),
-    ):
-        review_text_div = review_div.find("div", class_="styles_htmlText__iftLe")
-        review_text = review_text_div.get_text(strip=True) if review_text_div else None
-        time_tag = review_div.find("time")
-        review_date = (
-            datetime.fromisoformat(time_tag["datetime"]).strftime("%Y-%m-%d %H:%M:%S")
-            if time_tag
-            else None
+@timed(EXTRACT_SECONDS.labels("_read_page"))
+def _read_page(
+    content: bytes | str, slug: str | None = None, prefer_embedded_state=True
+) -> ScannedPage:
+    """Read a page from its embedded state, falling back to the DOM scan."""
+    if prefer_embedded_state:
+        page = _read_embedded_page(content, slug)
+        if page is not None:
+            return page
+    return _scan_page(content)
+
+
+def normalize_product_url(url: str) -> str:
+    """Return the canonical form of a product url.
+
+    Scheme, host and path are lowercased, trailing slashes are dropped and the
+    query string and fragment are removed, so urls of the same product compare
+    equal.
+    """
+    parts = urllib.parse.urlsplit(url.strip())
+    return urllib.parse.urlunsplit(
+        (
+            parts.scheme.lower(),
+            parts.netloc.lower(),
+            parts.path.rstrip("/").lower(),
+            "",
+            "",
         )
-        reviews.append({"text": review_text, "date": review_date})
-    return reviews
+    )
+
+
+def _product_slug(url: str) -> str:
+    return urllib.parse.urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1]
 
 
-def _extract_followers(soup: BeautifulSoup) -> int:
-    followers_div = soup.find("div", class_="styles_count___6_8F")
-    if followers_div:
-        followers_text = followers_div.get_text(strip=True)
-        followers_match = re.search(r"(\d+(?:\.\d+)?)\s?[Kk]?", followers_text)
+@timed(EXTRACT_SECONDS.labels("_extract_product_name"))
+def _extract_product_name(page: ScannedPage) -> str | None:
+    return page.product_name
+
+
+@timed(EXTRACT_SECONDS.labels("_extract_overall_rating"))
+def _extract_overall_rating(page: ScannedPage) -> float | None:
+    if page.overall_rating is None:
+        return None
+    return float(page.overall_rating.split("/")[0])
+
+
+@timed(EXTRACT_SECONDS.labels("_extract_review"))
+def _extract_review(review: ScannedReview, texts: TextPool | None = None) -> Review:
+    return Review.from_date(
+        review.id,
+        texts.intern(review.text) if texts is not None else review.text,
+        review.date,
+    )
+
+
+@timed(EXTRACT_SECONDS.labels("_extract_reviews"))
+def _extract_reviews(page: ScannedPage, texts: TextPool | None = None) -> list[Review]:
+    return [_extract_review(review, texts) for review in page.reviews]
+
+
+@timed(EXTRACT_SECONDS.labels("_extract_followers"))
+def _extract_followers(page: ScannedPage) -> int:
+    if page.followers:
+        followers_text = page.followers
+        followers_match = _FOLLOWERS_PATTERN.search(followers_text)
         if followers_match:
             followers_str = followers_match.group(1)
             followers_count = float(followers_str)
@@ -60,22 +284,317 @@ def _extract_followers(soup: BeautifulSoup) -> int:
     return 0
 
 
+def _product_info(
+    product_page: ScannedPage,
+    review_page: ScannedPage,
+    reviews: list[Review],
+    review_total: int | None,
+    incremental: bool = False,
+) -> ProductInfo:
+    """Assemble the product info from its pages and its collected reviews.
+
+    The review count is the total Product Hunt reports on the reviews or product
+    page. Without one it is the number of collected reviews, unless only the
+    reviews newer than a watermark were collected (`incremental`): the count is
+    unknown then.
+    """
+    for total in (review_total, review_page.review_total, product_page.review_total):
+        if total is not None:
+            break
+    else:
+        total = None if incremental else len(reviews)
+    return ProductInfo(
+        name=_extract_product_name(product_page),
+        overall_rating=_extract_overall_rating(review_page),
+        review_count=total,
+        followers=_extract_followers(product_page),
+        reviews=reviews,
+        newest_review=reviews[0] if reviews else None,
+    )
+
+
+class ReviewPager:
+    """Async iterator over the reviews of a product, newest first.
+
+    Once the reported total tells the number of pages, review pages are requested
+    concurrently in windows of `concurrency` pages; without a total they are
+    requested one after the other. Reviews are yielded in page order, one `Review`
+    at a time. Paging stops once `max_reviews` or `max_pages` is reached, the
+    reported total is covered, a page brings no new reviews or a page past the
+    first does not exist.
+
+    With a `since` watermark paging also stops at the first review the watermark
+    covers, so only reviews added after it are yielded.
+
+    `total` is the review count Product Hunt reports for the product (None when
+    the page does not expose it); `collected` is the number of reviews yielded
+    and `newest` the first of them. Fetched pages are archived as part of `crawl`.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        client: "ProductHuntClient",
+        url: str,
+        *,
+        max_reviews: int,
+        max_pages: int,
+        concurrency: int,
+        first_page: ScannedPage | None = None,
+        since: Watermark | None = None,
+        crawl: ArchivedCrawl | None = None,
+    ):
+        self.client = client
+        self.url = url
+        self.slug = _product_slug(url)
+        self.max_reviews = max_reviews
+        self.max_pages = max_pages
+        self.concurrency = max(concurrency, 1)
+        self.first_page = first_page
+        self.since = since
+        self.crawl = crawl
+        self.total: int | None = None
+        self.collected = 0
+        self.newest: Review | None = None
+
+    def page_url(self, number: int) -> str:
+        """Return the url of the given reviews page, starting at 1."""
+        page_url = self.url + "/reviews?order=LATEST"
+        return page_url if number == 1 else f"{page_url}&page={number}"
+
+    async def _fetch_page(self, number: int) -> ScannedPage:
+        if number == 1 and self.first_page is not None:
+            return self.first_page
+        try:
+            return await self.client._fetch_page(
+                self.page_url(number), self.slug, REVIEWS_PAGE, self.crawl
+            )
+        except httpx.HTTPStatusError as e:
+            # without a total, a missing page is the end of the list
+            if number > 1 and e.response.status_code in _END_OF_LIST_STATUS_CODES:
+                return ScannedPage()
+            raise
+
+    def _pages_known(self, page_size: int | None) -> bool:
+        return self.total is not None and bool(page_size)
+
+    def _last_page(self, page_size: int | None) -> int:
+        if self.total is None or not page_size:
+            return self.max_pages
+        return min(self.max_pages, math.ceil(self.total / page_size))
+
+    async def reviews(self) -> AsyncIterator[Review]:
+        """Yield the reviews of the product page by page."""
+        seen: set[ScannedReview | str] = set()
+        page_size: int | None = None
+        number = 1
+        while number <= self._last_page(page_size) and not self._exhausted():
+            # pages are only read ahead once the first page told the page size
+            # and the reported total; without a total the next page may not
+            # exist, and incremental paging usually ends early
+            window = (
+                self.concurrency
+                if self._pages_known(page_size) and not self.since
+                else 1
+            )
+            window_end = min(number + window, self._last_page(page_size) + 1)
+            pages = await asyncio.gather(
+                *(self._fetch_page(n) for n in range(number, window_end))
+            )
+            for page in pages:
+                if self.total is None:
+                    self.total = page.review_total
+                page_size = page_size or len(page.reviews)
+                new_reviews = [r for r in page.reviews if (r.id or r) not in seen]
+                if not new_reviews:
+                    return
+                for scanned_review in new_reviews:
+                    seen.add(scanned_review.id or scanned_review)
+                    review = _extract_review(scanned_review, self.client.review_texts)
+                    if self.since is not None and self.since.covers(review):
+                        return
+                    self.newest = self.newest or review
+                    self.collected += 1
+                    yield review
+                    if self._exhausted():
+                        return
+            number = window_end
+
+    def _exhausted(self) -> bool:
+        return self.collected >= self.max_reviews or (
+            self.total is not None and self.collected >= self.total
+        )
+
+
 class ProductHuntClient:
-    """ProductHuntScraper class is used to fetch data from Product Hunt."""
+    """ProductHuntScraper class is used to fetch data from Product Hunt.
+
+    All requests go through one long-lived, connection-pooled HTTP session. The
+    session is opened with `open` and released with `aclose`; when it is used
+    without being opened explicitly it is created on first use.
+
+    With `parse_workers` set, `open` also starts a process pool that reads the
+    fetched pages, so parsing scales across cores while the I/O stays in the event
+    loop. Pages are parsed in the event loop when the pool is not open.
+    """
+
+    max_connections = int(os.getenv("PRODUCTHUNT_MAX_CONNECTIONS") or 20)
+    max_keepalive_connections = int(
+        os.getenv("PRODUCTHUNT_MAX_KEEPALIVE_CONNECTIONS") or 10
+    )
+    keepalive_expiry = float(os.getenv("PRODUCTHUNT_KEEPALIVE_EXPIRY") or 30)
+    timeout = float(os.getenv("PRODUCTHUNT_TIMEOUT") or 30)
+    connect_timeout = float(os.getenv("PRODUCTHUNT_CONNECT_TIMEOUT") or 10)
+    max_reviews = int(os.getenv("PRODUCTHUNT_MAX_REVIEWS") or 1000)
+    max_review_pages = int(os.getenv("PRODUCTHUNT_MAX_REVIEW_PAGES") or 50)
+    review_page_concurrency = int(os.getenv("PRODUCTHUNT_REVIEW_PAGE_CONCURRENCY") or 4)
+    # requests per second and burst of the token bucket of every host
+    rate_limit = float(os.getenv("PRODUCTHUNT_RATE_LIMIT") or 5)
+    rate_burst = float(os.getenv("PRODUCTHUNT_RATE_BURST") or 10)
+    # bounds of the adaptive number of concurrent requests per host
+    initial_concurrency = float(os.getenv("PRODUCTHUNT_INITIAL_CONCURRENCY") or 4)
+    min_concurrency = float(os.getenv("PRODUCTHUNT_MIN_CONCURRENCY") or 1)
+    max_concurrency = float(os.getenv("PRODUCTHUNT_MAX_CONCURRENCY") or 16)
+    max_retries = int(os.getenv("PRODUCTHUNT_MAX_RETRIES") or 4)
+    retry_backoff = float(os.getenv("PRODUCTHUNT_RETRY_BACKOFF") or 0.5)
+    retry_max_backoff = float(os.getenv("PRODUCTHUNT_RETRY_MAX_BACKOFF") or 30)
+    max_retry_after = float(os.getenv("PRODUCTHUNT_MAX_RETRY_AFTER") or 120)
+    # on-disk HTTP cache, enabled by configuring its database path
+    http_cache_path = os.getenv("HTTP_CACHE_PATH")
+    http_cache_ttl = float(os.getenv("HTTP_CACHE_TTL") or 7 * 24 * 3600)
+    http_cache_max_bytes = int(os.getenv("HTTP_CACHE_MAX_BYTES") or 256 * 1024**2)
+    # search results are served from the cache without revalidation for this long
+    search_cache_max_age = float(os.getenv("PRODUCTHUNT_SEARCH_CACHE_MAX_AGE") or 3600)
+    # parsed pages memoized by content hash, optionally persisted to SQLite
+    parse_memo_size = int(os.getenv("PARSE_MEMO_SIZE") or 1024)
+    parse_memo_path = os.getenv("PARSE_MEMO_PATH")
+    # read pages from their embedded Next.js state before scraping the DOM
+    prefer_embedded_state = (
+        os.getenv("PRODUCTHUNT_PREFER_EMBEDDED_STATE") or "true"
+    ).lower() != "false"
+    # number of processes parsing pages, 0 parses them in the event loop
+    parse_workers = int(os.getenv("PRODUCTHUNT_PARSE_WORKERS") or 0)
+    # distinct short review texts shared across products, 0 disables the pool
+    review_text_pool_size = int(os.getenv("PRODUCTHUNT_REVIEW_TEXT_POOL_SIZE") or 10000)
+    # raw pages are archived here for offline re-extraction, if set
+    page_archive_path = os.getenv("PAGE_ARCHIVE_PATH")
 
     def __init__(self):
         """Initialize the Product Hunt client."""
         self.base_url = "https://www.producthunt.com/"
         self.logger = logging.getLogger(__name__)
+        self._client: httpx.AsyncClient | None = None
+        self._client_loop: asyncio.AbstractEventLoop | None = None
+        # kept outside the session, so the learned limits survive new sessions
+        self.rate_limiter = RateLimiter(
+            rate=self.rate_limit,
+            burst=self.rate_burst,
+            initial_concurrency=self.initial_concurrency,
+            min_concurrency=self.min_concurrency,
+            max_concurrency=self.max_concurrency,
+        )
+        self.response_cache = (
+            ResponseCache(
+                self.http_cache_path, self.http_cache_ttl, self.http_cache_max_bytes
+            )
+            if self.http_cache_path
+            else None
+        )
+        self.parse_executor: ProcessPoolExecutor | None = None
+        self.parse_memo: ParseMemo[ScannedPage] = ParseMemo(
+            self.parse_memo_size,
+            SQLiteMemoStore(self.parse_memo_path) if self.parse_memo_path else None,
+            dumps=_dump_scanned_page,
+            loads=_load_scanned_page,
+        )
+        self.review_texts = TextPool(self.review_text_pool_size)
+        self.page_archive = (
+            PageArchive(self.page_archive_path) if self.page_archive_path else None
+        )
+        # product scrapes in flight by normalized url and watermark
+        self.product_scrapes: SingleFlight[
+            tuple[str, Watermark | None], ProductInfo
+        ] = SingleFlight()
+
+    def _create_client(self) -> httpx.AsyncClient:
+        # HTTP/2 needs the optional h2 package, fall back to HTTP/1.1 otherwise
+        http2 = importlib.util.find_spec("h2") is not None
+        transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+        )
+        transport = RateLimitedTransport(
+            transport,
+            self.rate_limiter,
+            max_retries=self.max_retries,
+            backoff=self.retry_backoff,
+            max_backoff=self.retry_max_backoff,
+            max_retry_after=self.max_retry_after,
+        )
+        if self.response_cache is not None:
+            transport = CachingTransport(transport, self.response_cache)
+        return httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Return the shared HTTP session, opening it on first use.
 
-    def search_organizations(self, company_name: str) -> DiscoveryModel:
+        Pooled connections belong to the event loop they were opened in, so a new
+        session is created when the client is used from another loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop != loop:
+            self._client = self._create_client()
+            self._client_loop = loop
+        return self._client
+
+    async def open(self):
+        """Open the shared HTTP session and the parse process pool."""
+        _ = self.client
+        if self.parse_workers > 0 and self.parse_executor is None:
+            self.parse_executor = ProcessPoolExecutor(
+                max_workers=self.parse_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    async def aclose(self):
+        """Close the shared HTTP session and shut the parse process pool down.
+
+        The on-disk response cache, the parse memo store and the page archive are
+        closed as well, so the client is not used afterwards.
+        """
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._client_loop = None
+        if self.parse_executor is not None:
+            await asyncio.to_thread(self.parse_executor.shutdown, cancel_futures=True)
+        self.parse_executor = None
+        if self.response_cache is not None:
+            self.response_cache.close()
+        self.parse_memo.close()
+        if self.page_archive is not None:
+            self.page_archive.close()
+
+    async def search_organizations(self, company_name: str) -> DiscoveryModel:
         """Get links of products by company name."""
         search_url = self.base_url + "search"
         params = {"q": company_name}
 
         try:
-            with httpx.Client() as client:
-                response = client.get(search_url, params=params, timeout=30)
+            with track_fetch(SEARCH):
+                response = await self.client.get(
+                    search_url,
+                    params=params,
+                    extensions={CACHE_MAX_AGE_EXTENSION: self.search_cache_max_age},
+                )
+            DOWNLOADED_BYTES.labels(SEARCH).inc(len(response.content))
 
             soup = BeautifulSoup(response.content, "html.parser")
 
@@ -96,32 +615,144 @@ class ProductHuntClient:
             return DiscoveryModel.model_validate(products)
         except Exception as e:
             self.logger.error(f"Failed to query company products: {e}")
+            EMPTY_RESULTS.labels("search").inc()
             return DiscoveryModel()
 
-    def _get_html_content(self, url: str) -> str:
-        with httpx.Client() as client:
-            response = client.get(url, timeout=30)
-        return response.content
+    async def _fetch_page(
+        self,
+        url: str,
+        slug: str | None = None,
+        target: str = PRODUCT_PAGE,
+        crawl: ArchivedCrawl | None = None,
+    ) -> ScannedPage:
+        """Fetch and read a page, skipping the parse for content seen before.
 
-    def scrape_product_page(self, url: str) -> ProductInfo:
-        """Get Product data with link of product page."""
-        try:
-            product_page_content = self._get_html_content(url)
-            review_page_content = self._get_html_content(url + "/reviews?order=LATEST")
+        With the page archive enabled, pages fetched as part of a `crawl` are
+        archived.
+        """
+        with track_fetch(target):
+            response = await self.client.get(url)
+        response.raise_for_status()
+        content = response.content
+        DOWNLOADED_BYTES.labels(target).inc(len(content))
+        if self.page_archive is not None and crawl is not None:
+            await asyncio.to_thread(
+                self.page_archive.store, crawl, url, content, target
+            )
+        key = ":".join(
+            (
+                str(_SCAN_VERSION),
+                str(int(self.prefer_embedded_state)),
+                slug or "",
+                page_digest(content),
+            )
+        )
+        page = await self.parse_memo.aget(key)
+        if page is None:
+            page = await self._read_page(content, slug)
+            await self.parse_memo.aput(key, page)
+        return page
+
+    async def _read_page(self, content: bytes, slug: str | None) -> ScannedPage:
+        if self.parse_executor is None:
+            return _read_page(content, slug, self.prefer_embedded_state)
+        with timed_block(PARSE_POOL_SECONDS):
+            return await asyncio.get_running_loop().run_in_executor(
+                self.parse_executor,
+                _read_page,
+                content,
+                slug,
+                self.prefer_embedded_state,
+            )
+
+    def review_pager(
+        self,
+        url: str,
+        first_page: ScannedPage | None = None,
+        since: Watermark | None = None,
+        crawl: ArchivedCrawl | None = None,
+    ) -> ReviewPager:
+        """Create a pager over the reviews of a product with the configured limits."""
+        return ReviewPager(
+            self,
+            url,
+            max_reviews=self.max_reviews,
+            max_pages=self.max_review_pages,
+            concurrency=self.review_page_concurrency,
+            first_page=first_page,
+            since=since,
+            crawl=crawl,
+        )
+
+    async def scrape_product_page(
+        self, url: str, since: Watermark | None = None
+    ) -> ProductInfo:
+        """Get Product data with link of product page.
 
-            soup = BeautifulSoup(product_page_content, "html.parser")
-            review_soup = BeautifulSoup(review_page_content, "html.parser")
+        Urls are normalized first. Concurrent scrapes of the same product with the
+        same watermark share one scrape and receive the same `ProductInfo`, which
+        callers must therefore not modify.
+
+        The product page and the first reviews page are fetched concurrently, the
+        remaining reviews pages are followed by a `ReviewPager`. `review_count` is
+        the total Product Hunt reports, or the number of collected reviews if the
+        total is unknown. With a `since` watermark only newer reviews are collected
+        and an unknown total leaves `review_count` empty.
+
+        Raises:
+            CrawlingExternalError: If a page could not be fetched, also after the
+                retries of the rate limited transport.
+            CrawlingInternalError: If the fetched pages could not be processed.
+        """
+        url = normalize_product_url(url)
+        key = (url, since)
+        if self.product_scrapes.in_flight(key):
+            COALESCED_SCRAPES.inc()
+        return await self.product_scrapes.do(
+            key, lambda: self._scrape_product_page(url, since)
+        )
+
+    async def _scrape_product_page(
+        self, url: str, since: Watermark | None
+    ) -> ProductInfo:
+        try:
+            slug = _product_slug(url)
+            crawl = (
+                new_crawl(url, incremental=since is not None)
+                if self.page_archive is not None
+                else None
+            )
+            product_page, review_page = await asyncio.gather(
+                self._fetch_page(url, slug, PRODUCT_PAGE, crawl),
+                self._fetch_page(
+                    url + "/reviews?order=LATEST", slug, REVIEWS_PAGE, crawl
+                ),
+            )
 
             self.logger.debug(f"Retrieving data from: {url}")
 
-            product_info_data = {
-                "name": _extract_product_name(soup),
-                "overall_rating": _extract_overall_rating(review_soup),
-                "review_count": len(_extract_reviews(review_soup)),
-                "followers": _extract_followers(soup),
-                "reviews": _extract_reviews(review_soup),
-            }
-            return ProductInfo(**product_info_data)
+            pager = self.review_pager(
+                url, first_page=review_page, since=since, crawl=crawl
+            )
+            reviews = [review async for review in pager.reviews()]
+            product_info = _product_info(
+                product_page,
+                review_page,
+                reviews,
+                pager.total,
+                incremental=since is not None,
+            )
+        except httpx.HTTPError as e:
+            self.logger.error(f"Failed to fetch product page {url}: {e}")
+            EMPTY_RESULTS.labels("scrape").inc()
+            raise CrawlingExternalError(
+                f"Failed to fetch product page {url}: {e}"
+            ) from e
         except Exception as e:
-            self.logger.error(f"Failed to scrape product page: {e}")
-            return ProductInfo()
+            self.logger.error(f"Failed to scrape product page {url}: {e}")
+            EMPTY_RESULTS.labels("scrape").inc()
+            raise CrawlingInternalError(
+                f"Failed to scrape product page {url}: {e}"
+            ) from e
+        SCRAPED_PRODUCTS.inc()
+        return product_info
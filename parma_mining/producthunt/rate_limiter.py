@@ -0,0 +1,253 @@
+"""Adaptive per-host rate limiting and retries for outgoing HTTP requests.
+
+Every host gets a token bucket that caps the sustained request rate and an
+AIMD (additive increase, multiplicative decrease) concurrency limit: the number
+of requests allowed in flight grows slowly while the host answers and is cut
+whenever it throttles us with `429 Too Many Requests`, answers with a server
+error or the connection fails. A `Retry-After` header pauses all requests to the
+host.
+
+`RateLimitedTransport` applies the limits underneath an `httpx.AsyncClient` and
+retries idempotent requests with jittered exponential backoff. When the retries
+are exhausted the last response is returned, or the last transport error raised.
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+from parma_mining.producthunt.metrics import RETRIES
+
+RETRY_STATUS_CODES = frozenset(
+    {
+        httpx.codes.TOO_MANY_REQUESTS,
+        httpx.codes.BAD_GATEWAY,
+        httpx.codes.SERVICE_UNAVAILABLE,
+        httpx.codes.GATEWAY_TIMEOUT,
+    }
+)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def is_throttled(status_code: int) -> bool:
+    """Return whether a response status signals an overloaded host."""
+    return (
+        status_code == httpx.codes.TOO_MANY_REQUESTS
+        or status_code >= httpx.codes.INTERNAL_SERVER_ERROR
+    )
+
+
+def parse_retry_after(value: str | None, now: float | None = None) -> float | None:
+    """Return the number of seconds a `Retry-After` header asks to wait.
+
+    The header holds either a number of seconds or an HTTP date.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = time.time() if now is None else now
+    return max(retry_at.timestamp() - now, 0.0)
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations instead of blocking.
+
+    Tokens may be overdrawn, every reservation returns how long its caller has
+    to wait for its token, so concurrent callers are queued in order.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self._updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Take a token and return the number of seconds to wait for it."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class HostLimiter:
+    """Rate and adaptive concurrency limit of requests to a single host."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        rate: float,
+        burst: float,
+        initial_concurrency: float,
+        min_concurrency: float = 1,
+        max_concurrency: float = 64,
+        decrease_factor: float = 0.5,
+    ):
+        self.bucket = TokenBucket(rate, burst)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.decrease_factor = decrease_factor
+        self.limit = min(max(initial_concurrency, min_concurrency), max_concurrency)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._last_decrease = float("-inf")
+        self._waiters: deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> float:
+        """Wait for a slot and a token, return the time the request was started."""
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+        try:
+            while (pause := self.paused_until - time.monotonic()) > 0:
+                await asyncio.sleep(pause)
+            if delay := self.bucket.reserve():
+                await asyncio.sleep(delay)
+        except BaseException:
+            self.in_flight -= 1
+            self._wake()
+            raise
+        return time.monotonic()
+
+    def release(
+        self,
+        started_at: float,
+        throttled: bool | None = False,
+        retry_after: float | None = None,
+    ):
+        """Free a slot and adapt the concurrency limit to the outcome.
+
+        Throttled requests that were started before the last decrease belong to the
+        same congestion event and do not decrease the limit again. Requests without
+        an outcome (`throttled=None`), e.g. cancelled ones, keep the limit.
+        """
+        self.in_flight -= 1
+        if retry_after:
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+        if throttled:
+            if started_at > self._last_decrease:
+                self.limit = max(
+                    self.min_concurrency, self.limit * self.decrease_factor
+                )
+                self._last_decrease = time.monotonic()
+        elif throttled is not None:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+        self._wake()
+
+    def _wake(self):
+        free = int(self.limit) - self.in_flight
+        for waiter in list(self._waiters)[: max(free, 0)]:
+            if not waiter.done():
+                waiter.set_result(None)
+
+
+class RateLimiter:
+    """Registry of the `HostLimiter` of every host, created on first use."""
+
+    def __init__(self, **limits):
+        self._limits = limits
+        self._hosts: dict[str, HostLimiter] = {}
+
+    def for_host(self, host: str) -> HostLimiter:
+        """Return the limiter of a host."""
+        limiter = self._hosts.get(host)
+        if limiter is None:
+            limiter = self._hosts[host] = HostLimiter(**self._limits)
+        return limiter
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """Transport that rate limits requests per host and retries failed ones.
+
+    Idempotent requests are retried up to `max_retries` times on transport errors
+    and on the statuses in `RETRY_STATUS_CODES`, waiting a random time of up to
+    `backoff * 2**attempt` seconds, capped at `max_backoff`. A `Retry-After`
+    longer than `max_retry_after` ends the retries right away.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        transport: httpx.AsyncBaseTransport,
+        limiter: RateLimiter,
+        *,
+        max_retries: int = 4,
+        backoff: float = 0.5,
+        max_backoff: float = 30,
+        max_retry_after: float = 120,
+    ):
+        self.transport = transport
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+
+    def _backoff_delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Send the request within the host's limits, retrying when it fails."""
+        host_limiter = self.limiter.for_host(request.url.host)
+        retryable = request.method in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            started_at = await host_limiter.acquire()
+            # cancelled and otherwise failed requests free their slot unjudged
+            throttled: bool | None = None
+            retry_after = None
+            try:
+                response = await self.transport.handle_async_request(request)
+                throttled = is_throttled(response.status_code)
+                if response.status_code in RETRY_STATUS_CODES:
+                    retry_after = parse_retry_after(response.headers.get("retry-after"))
+            except httpx.TransportError as e:
+                # dropped connections and timeouts are treated as overload too
+                throttled = True
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                RETRIES.labels(type(e).__name__).inc()
+                response = None
+            finally:
+                host_limiter.release(
+                    started_at,
+                    throttled,
+                    min(retry_after, self.max_retry_after) if retry_after else None,
+                )
+
+            if response is not None:
+                if (
+                    response.status_code not in RETRY_STATUS_CODES
+                    or not retryable
+                    or attempt >= self.max_retries
+                    or (retry_after or 0) > self.max_retry_after
+                ):
+                    return response
+                RETRIES.labels(str(response.status_code)).inc()
+                await response.aclose()
+
+            await asyncio.sleep(self._backoff_delay(attempt))
+            attempt += 1
+
+    async def aclose(self):
+        """Close the wrapped transport."""
+        await self.transport.aclose()
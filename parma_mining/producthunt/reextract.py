@@ -0,0 +1,178 @@
+"""Offline re-extraction of products from the page archive.
+
+Every product is extracted from the pages of its latest archived crawl: the
+product page and its reviews pages in page order, all fetched by one product
+scrape. Products are read and extracted again with the current extractors in a
+process pool, one product per task, so a changed extractor can be applied to
+everything crawled before without fetching a page.
+"""
+import multiprocessing
+import os
+import urllib.parse
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+from parma_mining.producthunt.metrics import PRODUCT_PAGE, REVIEWS_PAGE
+from parma_mining.producthunt.model import ProductInfo, Review
+from parma_mining.producthunt.page_archive import PageArchive
+from parma_mining.producthunt.ph_client import (
+    ProductHuntClient,
+    _extract_review,
+    _product_info,
+    _product_slug,
+    _read_page,
+)
+from parma_mining.producthunt.text_pool import TextPool
+
+_REVIEWS_PATH = "/reviews"
+
+# archive and options of a re-extraction process, set by its initializer
+_archive: PageArchive | None = None
+_prefer_embedded_state = True
+_texts: TextPool | None = None
+
+
+class ArchivedProduct(NamedTuple):
+    """The archived pages of the latest crawl of a product."""
+
+    url: str
+    crawled_at: float
+    # only the reviews newer than a watermark were crawled
+    incremental: bool
+    product_page: str
+    # digests of the reviews pages, ordered by page number
+    review_pages: list[str]
+
+
+def _reviews_page_of(url: str) -> tuple[str, int] | None:
+    """Return the product url and the page number of a reviews page url."""
+    parts = urllib.parse.urlsplit(url)
+    if not parts.path.endswith(_REVIEWS_PATH):
+        return None
+    product_path = parts.path[: -len(_REVIEWS_PATH)]
+    page = urllib.parse.parse_qs(parts.query).get("page", ["1"])[0]
+    return (
+        urllib.parse.urlunsplit((parts.scheme, parts.netloc, product_path, "", "")),
+        int(page),
+    )
+
+
+def archived_products(
+    archive: PageArchive, until: float | None = None
+) -> list[ArchivedProduct]:
+    """Return the pages of the latest crawl of every archived product by url.
+
+    Only crawls that archived the product page and the first reviews page can be
+    extracted, a product whose latest crawl failed is extracted from the crawl
+    before. With `until` only crawls started up to then are considered.
+    """
+    products: dict[str, ArchivedProduct] = {}
+    for crawl, pages in archive.crawls(until):
+        if crawl.product_url in products:
+            continue
+        product_page = None
+        review_pages: dict[int, str] = {}
+        for page in pages:
+            if page.target == PRODUCT_PAGE:
+                product_page = page.digest
+            elif page.target == REVIEWS_PAGE and (found := _reviews_page_of(page.url)):
+                review_pages[found[1]] = page.digest
+        if product_page is None or 1 not in review_pages:
+            continue
+        products[crawl.product_url] = ArchivedProduct(
+            url=crawl.product_url,
+            crawled_at=crawl.started_at,
+            incremental=crawl.incremental,
+            product_page=product_page,
+            review_pages=[review_pages[n] for n in sorted(review_pages)],
+        )
+    return [products[url] for url in sorted(products)]
+
+
+def extract_product(
+    archive: PageArchive,
+    product: ArchivedProduct,
+    prefer_embedded_state: bool = True,
+    texts: TextPool | None = None,
+) -> ProductInfo:
+    """Extract the product info from the archived pages of a product.
+
+    Reviews are collected page by page and deduplicated like the `ReviewPager`
+    does while crawling.
+    """
+    slug = _product_slug(product.url)
+    product_page = _read_page(
+        archive.load(product.product_page), slug, prefer_embedded_state
+    )
+    review_pages = [
+        _read_page(archive.load(digest), slug, prefer_embedded_state)
+        for digest in product.review_pages
+    ]
+    seen = set()
+    reviews: list[Review] = []
+    for page in review_pages:
+        for scanned_review in page.reviews:
+            if (scanned_review.id or scanned_review) in seen:
+                continue
+            seen.add(scanned_review.id or scanned_review)
+            reviews.append(_extract_review(scanned_review, texts))
+    return _product_info(
+        product_page,
+        review_pages[0],
+        reviews,
+        review_pages[0].review_total,
+        incremental=product.incremental,
+    )
+
+
+def _open_archive(path: str, prefer_embedded_state: bool):
+    global _archive, _prefer_embedded_state, _texts  # noqa: PLW0603
+    _archive = PageArchive(path)
+    _prefer_embedded_state = prefer_embedded_state
+    _texts = TextPool(ProductHuntClient.review_text_pool_size)
+
+
+def _extract_archived(product: ArchivedProduct) -> ProductInfo:
+    assert _archive is not None, "the archive of the process is not open"
+    return extract_product(_archive, product, _prefer_embedded_state, _texts)
+
+
+def reextract(
+    path: str,
+    workers: int | None = None,
+    prefer_embedded_state: bool = True,
+    until: float | None = None,
+) -> Iterator[tuple[ArchivedProduct, ProductInfo]]:
+    """Extract all archived products again, in parallel across processes.
+
+    Products are yielded in url order together with their extracted info.
+    `workers` defaults to the number of cores; with a single worker the products
+    are extracted in this process.
+    """
+    archive = PageArchive(path)
+    try:
+        products = archived_products(archive, until)
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(products) <= 1:
+            texts = TextPool(ProductHuntClient.review_text_pool_size)
+            for product in products:
+                yield product, extract_product(
+                    archive, product, prefer_embedded_state, texts
+                )
+            return
+    finally:
+        archive.close()
+
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(products)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_open_archive,
+        initargs=(path, prefer_embedded_state),
+    ) as executor:
+        chunksize = max(1, len(products) // (workers * 4))
+        yield from zip(
+            products,
+            executor.map(_extract_archived, products, chunksize=chunksize),
+            strict=True,
+        )
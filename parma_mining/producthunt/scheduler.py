@@ -0,0 +1,166 @@
+"""In-process scheduler for crawling tasks.
+
+Every submitted task runs as a background coroutine that hands its units of work
+(one per product handle) to `JobScheduler.run_job`. At most `max_workers` jobs
+run at the same time across all tasks. Free workers are handed to the waiting
+tasks in turn, so a large task cannot starve the tasks submitted after it.
+"""
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from typing import TypeVar
+
+from parma_mining.producthunt.model import TaskStatusModel
+
+T = TypeVar("T")
+
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+
+
+class JobScheduler:
+    """Runs crawling tasks in the background with a bounded number of workers."""
+
+    def __init__(self, max_workers: int, max_finished_tasks: int = 1000):
+        self.max_workers = max_workers
+        self.max_finished_tasks = max_finished_tasks
+        self.logger = logging.getLogger(__name__)
+        self._tasks: OrderedDict[int, TaskStatusModel] = OrderedDict()
+        self._runners: dict[int, asyncio.Task] = {}
+        self._busy = 0
+        # waiting jobs per task, tasks are served round robin in this order
+        self._waiting: OrderedDict[int, deque[asyncio.Future]] = OrderedDict()
+
+    def status(self, task_id: int) -> TaskStatusModel | None:
+        """Return the progress of a task, if it is known."""
+        return self._tasks.get(task_id)
+
+    def is_running(self, task_id: int) -> bool:
+        """Return whether a run of the task is in progress."""
+        return task_id in self._runners
+
+    def submit(
+        self,
+        task_id: int,
+        run: Callable[[TaskStatusModel], Awaitable],
+        total: int = 0,
+    ) -> TaskStatusModel:
+        """Start a task in the background and return its progress.
+
+        `run` receives the progress of the task and is awaited until the task is
+        done. Submitting a task that is still running returns its progress.
+        """
+        if task_id in self._runners:
+            return self._tasks[task_id]
+
+        progress = TaskStatusModel(
+            task_id=task_id, total=total, created_at=datetime.now()
+        )
+        self._tasks.pop(task_id, None)
+        self._tasks[task_id] = progress
+        self._runners[task_id] = asyncio.create_task(self._run_task(progress, run))
+        self._forget_finished_tasks()
+        return progress
+
+    async def _run_task(
+        self, progress: TaskStatusModel, run: Callable[[TaskStatusModel], Awaitable]
+    ):
+        progress.status = RUNNING
+        try:
+            await run(progress)
+        except asyncio.CancelledError:
+            progress.status = FAILED
+            raise
+        except Exception as e:
+            self.logger.error(f"Task {progress.task_id} failed: {e}")
+            progress.status = FAILED
+        else:
+            progress.status = FINISHED
+        finally:
+            progress.finished_at = datetime.now()
+            self._runners.pop(progress.task_id, None)
+
+    def _forget_finished_tasks(self):
+        finished = [
+            task_id for task_id in self._tasks if task_id not in self._runners
+        ]
+        for task_id in finished[: max(len(finished) - self.max_finished_tasks, 0)]:
+            del self._tasks[task_id]
+
+    async def run_job(self, task_id: int, job: Callable[[], Awaitable[T]]) -> T:
+        """Run a unit of work of a task on a free worker and count its outcome.
+
+        Jobs cancelled while they wait for a worker count as failed as well.
+        """
+        progress = self._tasks.get(task_id)
+        try:
+            await self._acquire(task_id)
+        except asyncio.CancelledError:
+            if progress is not None:
+                progress.failed += 1
+            raise
+        try:
+            result = await job()
+        except BaseException:
+            if progress is not None:
+                progress.failed += 1
+            raise
+        else:
+            if progress is not None:
+                progress.completed += 1
+            return result
+        finally:
+            self._release(task_id)
+
+    async def _acquire(self, task_id: int):
+        if self._busy < self.max_workers and not self._waiting:
+            self._busy += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(task_id, deque()).append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # the worker was handed over already, pass it on
+                self._release(task_id)
+            else:
+                self._remove_waiter(task_id, waiter)
+            raise
+
+    def _remove_waiter(self, task_id: int, waiter: asyncio.Future):
+        waiters = self._waiting.get(task_id)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._waiting[task_id]
+
+    def _release(self, task_id: int):
+        # hand the worker to the next task in turn, or free it
+        if task_id in self._waiting:
+            self._waiting.move_to_end(task_id)
+        while self._waiting:
+            next_task_id, waiters = next(iter(self._waiting.items()))
+            waiter = waiters.popleft()
+            if waiters:
+                self._waiting.move_to_end(next_task_id)
+            else:
+                del self._waiting[next_task_id]
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._busy -= 1
+
+    async def shutdown(self):
+        """Cancel the running tasks and wait for them to stop."""
+        runners = list(self._runners.values())
+        for runner in runners:
+            runner.cancel()
+        await asyncio.gather(*runners, return_exceptions=True)
+        self._runners.clear()
+        self._waiting.clear()
+        self._busy = 0
@@ -0,0 +1,58 @@
+"""Coalescing of concurrent calls that produce the same result.
+
+Callers asking for a key that is already in flight wait for the running call
+instead of starting their own, and all of them receive its result or error.
+The call is cancelled only when every waiting caller was cancelled; once it
+completed the key is forgotten, so later callers start a fresh call.
+"""
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+R = TypeVar("R")
+
+
+class _Flight(Generic[R]):
+    """A running call and the number of callers waiting for it."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task[R]):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(Generic[K, R]):
+    """Run at most one call per key at a time and share its outcome."""
+
+    def __init__(self):
+        """Initialize the calls in flight."""
+        self._flights: dict[K, _Flight[R]] = {}
+
+    def in_flight(self, key: K) -> bool:
+        """Return True if a call for `key` is running."""
+        return key in self._flights
+
+    async def do(self, key: K, call: Callable[[], Awaitable[R]]) -> R:
+        """Return the outcome of `call`, sharing a running call for `key`."""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(call()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+
+        flight.waiters += 1
+        try:
+            # a cancelled caller must not cancel the call the others wait for
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _forget(self, key: K, flight: _Flight[R]):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
@@ -0,0 +1,36 @@
+"""Deduplication of repeated review texts.
+
+Short reviews such as "Great product!" recur across products and crawls. Texts
+are looked up by hash in a `TextPool` and equal texts share one string object,
+so each distinct text is stored once. Only short texts are pooled, as long texts
+rarely repeat and would only keep memory alive.
+"""
+
+
+class TextPool:
+    """Bounded pool of short texts that hands out one object per distinct text.
+
+    The pool is cleared once it holds `max_entries` texts.
+    """
+
+    def __init__(self, max_entries: int, max_length: int = 256):
+        """Initialize the pool with its bounds."""
+        self.max_entries = max_entries
+        self.max_length = max_length
+        self._texts: dict[str, str] = {}
+
+    def __len__(self) -> int:
+        """Return the number of pooled texts."""
+        return len(self._texts)
+
+    def intern(self, text: str | None) -> str | None:
+        """Return the pooled object equal to `text`, adding `text` if it is new."""
+        if text is None or len(text) > self.max_length or self.max_entries <= 0:
+            return text
+        pooled = self._texts.get(text)
+        if pooled is not None:
+            return pooled
+        if len(self._texts) >= self.max_entries:
+            self._texts.clear()
+        self._texts[text] = text
+        return text
@@ -0,0 +1,109 @@
+"""Stores for the watermarks of incremental review crawling.
+
+A watermark is the newest review that was delivered to the analytics for a
+company's product. Reviews are paged newest first, so later crawls can stop as
+soon as they reach the watermark and only send the reviews added since.
+"""
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import NamedTuple
+
+from parma_mining.producthunt.model import Review
+
+
+class Watermark(NamedTuple):
+    """Newest review delivered for a product."""
+
+    review_id: str | None
+    review_date: str | None
+
+    @classmethod
+    def from_review(cls, review: Review) -> "Watermark":
+        """Create a watermark pointing at the given review."""
+        return cls(review.id, review.date)
+
+    def covers(self, review: Review) -> bool:
+        """Return True if the review was already seen when the watermark was set."""
+        if self.review_id is not None and review.id == self.review_id:
+            return True
+        return (
+            self.review_date is not None
+            and review.date is not None
+            and review.date < self.review_date
+        )
+
+
+def _product_key(product_url: str) -> str:
+    return product_url.rstrip("/").lower()
+
+
+class WatermarkStore(ABC):
+    """Interface of a store that keeps one watermark per company and product."""
+
+    @abstractmethod
+    def get(self, company_id: str, product_url: str) -> Watermark | None:
+        """Return the watermark of a company's product, if there is one."""
+
+    @abstractmethod
+    def set(self, company_id: str, product_url: str, watermark: Watermark):
+        """Store the watermark of a company's product."""
+
+    def close(self):
+        """Release the resources of the store."""
+
+
+class InMemoryWatermarkStore(WatermarkStore):
+    """Watermark store that lives as long as the process."""
+
+    def __init__(self):
+        self._watermarks: dict[tuple[str, str], Watermark] = {}
+
+    def get(self, company_id: str, product_url: str) -> Watermark | None:
+        """Return the watermark of a company's product, if there is one."""
+        return self._watermarks.get((company_id, _product_key(product_url)))
+
+    def set(self, company_id: str, product_url: str, watermark: Watermark):
+        """Store the watermark of a company's product."""
+        self._watermarks[(company_id, _product_key(product_url))] = watermark
+
+
+class SQLiteWatermarkStore(WatermarkStore):
+    """Watermark store backed by a local SQLite database."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS review_watermarks ("
+                " company_id TEXT NOT NULL,"
+                " product_key TEXT NOT NULL,"
+                " review_id TEXT,"
+                " review_date TEXT,"
+                " PRIMARY KEY (company_id, product_key))"
+            )
+
+    def get(self, company_id: str, product_url: str) -> Watermark | None:
+        """Return the watermark of a company's product, if there is one."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT review_id, review_date FROM review_watermarks"
+                " WHERE company_id = ? AND product_key = ?",
+                (company_id, _product_key(product_url)),
+            ).fetchone()
+        return Watermark(*row) if row else None
+
+    def set(self, company_id: str, product_url: str, watermark: Watermark):
+        """Store the watermark of a company's product."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO review_watermarks"
+                " (company_id, product_key, review_id, review_date)"
+                " VALUES (?, ?, ?, ?)",
+                (company_id, _product_key(product_url), *watermark),
+            )
+
+    def close(self):
+        """Close the database connection."""
+        self._connection.close()
@@ -0,0 +1,774 @@
+"""Shared queues that distribute crawling work across replicas.
+
+In the distributed mode a task is split into work units, one per product handle,
+and the units are placed on a queue shared by all replicas of the module. Every
+replica runs a `QueueWorker` that claims units with a lease, extends the lease
+with heartbeats while it crawls and completes the unit with its outcome. Units
+whose lease expired, e.g. because their replica died, are claimed again by
+another replica, so a unit may be crawled more than once but is counted once.
+The replica completing the last unit of a task receives the outcome of the task
+and notifies the analytics, so `crawling_finished` is sent exactly once.
+
+Units are claimed round robin across tasks: the first unit of every task comes
+before the second unit of any task, so a large task cannot starve the others.
+
+The queues are asynchronous: the Redis queue talks to the server through
+`redis.asyncio` and the SQLite queue runs its transactions in worker threads, so
+a locked database never blocks the event loop.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable
+from contextlib import contextmanager
+from datetime import datetime
+from typing import NamedTuple
+
+from redis import asyncio as aioredis
+from redis.typing import EncodableT, FieldT
+
+from parma_mining.producthunt.model import ErrorInfoModel, TaskStatusModel
+from parma_mining.producthunt.scheduler import FINISHED, QUEUED, RUNNING
+
+logger = logging.getLogger(__name__)
+
+
+class WorkUnit(NamedTuple):
+    """A product handle of a task, claimed by a worker."""
+
+    task_id: int
+    unit_id: int
+    company_id: str
+    handle: str
+    token: str
+    # UNIX timestamp by which the task must be done, if it has one
+    deadline: float | None = None
+
+    def __repr__(self) -> str:
+        """Describe the unit without its token, so it can be logged."""
+        return (
+            f"WorkUnit(task_id={self.task_id}, unit_id={self.unit_id},"
+            f" company_id={self.company_id!r}, handle={self.handle!r})"
+        )
+
+
+class FinishedTask(NamedTuple):
+    """Outcome of a task whose units are all completed."""
+
+    task_id: int
+    token: str
+    errors: dict[str, ErrorInfoModel]
+
+
+def worker_id() -> str:
+    """Return an id of this process that is unique across replicas."""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+class WorkQueue(ABC):
+    """Interface of a queue of work units shared by the replicas."""
+
+    @abstractmethod
+    async def enqueue(
+        self,
+        task_id: int,
+        token: str,
+        handles: list[tuple[str, str]],
+        errors: dict[str, ErrorInfoModel] | None = None,
+        deadline: float | None = None,
+    ) -> TaskStatusModel:
+        """Split a task into one unit per (company_id, handle) and queue them.
+
+        `errors` are errors of the task found before crawling, they are reported
+        with the errors of the units. The `deadline` of the task is handed out with
+        its units. Enqueueing a task that is not finished yet returns its progress.
+        """
+
+    @abstractmethod
+    async def claim(self, owner: str, lease: float) -> WorkUnit | None:
+        """Lease the next pending or abandoned unit to `owner`, if there is one."""
+
+    @abstractmethod
+    async def heartbeat(self, unit: WorkUnit, owner: str, lease: float) -> bool:
+        """Extend the lease of a unit, return False if `owner` lost it."""
+
+    @abstractmethod
+    async def complete(
+        self, unit: WorkUnit, owner: str, error: ErrorInfoModel | None = None
+    ) -> FinishedTask | None:
+        """Record the outcome of a unit.
+
+        Returns the outcome of the task if this was its last unit. Units whose
+        lease was taken over by another owner are ignored.
+        """
+
+    @abstractmethod
+    async def status(self, task_id: int) -> TaskStatusModel | None:
+        """Return the progress of a task, if it is known."""
+
+    async def aclose(self):
+        """Release the resources of the queue."""
+
+
+class InMemoryWorkQueue(WorkQueue):
+    """Work queue of a single process, e.g. for tests."""
+
+    def __init__(self):
+        self._tasks: dict[int, TaskStatusModel] = {}
+        self._tokens: dict[int, str] = {}
+        self._deadlines: dict[int, float | None] = {}
+        self._errors: dict[int, dict[str, ErrorInfoModel]] = {}
+        # (unit_id, task_id) -> (company_id, handle, owner, lease expiry)
+        self._units: dict[tuple[int, int], tuple[str, str, str | None, float]] = {}
+
+    async def enqueue(
+        self,
+        task_id: int,
+        token: str,
+        handles: list[tuple[str, str]],
+        errors: dict[str, ErrorInfoModel] | None = None,
+        deadline: float | None = None,
+    ) -> TaskStatusModel:
+        """Split a task into one unit per (company_id, handle) and queue them."""
+        task = self._tasks.get(task_id)
+        if task is not None and task.status != FINISHED:
+            return task
+        task = TaskStatusModel(
+            task_id=task_id, total=len(handles), created_at=datetime.now()
+        )
+        self._tasks[task_id] = task
+        self._tokens[task_id] = token
+        self._deadlines[task_id] = deadline
+        self._errors[task_id] = dict(errors or {})
+        for unit_id, (company_id, handle) in enumerate(handles):
+            self._units[(unit_id, task_id)] = (company_id, handle, None, 0)
+        if not handles:
+            self._finish(task)
+        return task
+
+    async def claim(self, owner: str, lease: float) -> WorkUnit | None:
+        """Lease the next pending or abandoned unit to `owner`, if there is one."""
+        now = time.time()
+        claimable = [
+            key
+            for key, (_, _, current, expires) in self._units.items()
+            if current is None or expires < now
+        ]
+        if not claimable:
+            return None
+        unit_id, task_id = min(claimable)
+        company_id, handle, _, _ = self._units[(unit_id, task_id)]
+        self._units[(unit_id, task_id)] = (company_id, handle, owner, now + lease)
+        self._tasks[task_id].status = RUNNING
+        return WorkUnit(
+            task_id,
+            unit_id,
+            company_id,
+            handle,
+            self._tokens[task_id],
+            self._deadlines[task_id],
+        )
+
+    async def heartbeat(self, unit: WorkUnit, owner: str, lease: float) -> bool:
+        """Extend the lease of a unit, return False if `owner` lost it."""
+        key = (unit.unit_id, unit.task_id)
+        entry = self._units.get(key)
+        if entry is None or entry[2] != owner:
+            return False
+        self._units[key] = (*entry[:3], time.time() + lease)
+        return True
+
+    async def complete(
+        self, unit: WorkUnit, owner: str, error: ErrorInfoModel | None = None
+    ) -> FinishedTask | None:
+        """Record the outcome of a unit."""
+        key = (unit.unit_id, unit.task_id)
+        entry = self._units.get(key)
+        if entry is None or entry[2] != owner:
+            return None
+        del self._units[key]
+        task = self._tasks[unit.task_id]
+        if error is None:
+            task.completed += 1
+        else:
+            task.failed += 1
+            self._errors[unit.task_id][unit.company_id] = error
+        if task.completed + task.failed < task.total:
+            return None
+        return self._finish(task)
+
+    def _finish(self, task: TaskStatusModel) -> FinishedTask:
+        task.status = FINISHED
+        task.finished_at = datetime.now()
+        return FinishedTask(
+            task.task_id, self._tokens[task.task_id], self._errors[task.task_id]
+        )
+
+    async def status(self, task_id: int) -> TaskStatusModel | None:
+        """Return the progress of a task, if it is known."""
+        return self._tasks.get(task_id)
+
+
+def _text(value: bytes | str) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _dump_errors(errors: dict[str, ErrorInfoModel]) -> str:
+    return json.dumps({key: error.model_dump() for key, error in errors.items()})
+
+
+def _load_errors(data: str | bytes | None) -> dict[str, ErrorInfoModel]:
+    return {
+        key: ErrorInfoModel.model_validate(error)
+        for key, error in json.loads(data or "{}").items()
+    }
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """Work queue in a SQLite database shared by the processes of one host.
+
+    Claims and completions run in immediate transactions, so concurrent processes
+    never lease the same unit or finish the same task twice. The transactions run
+    in worker threads, as they wait for the locks of the other processes.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        with self._transaction():
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS work_tasks ("
+                " task_id INTEGER PRIMARY KEY,"
+                " token TEXT NOT NULL,"
+                " deadline REAL,"
+                " status TEXT NOT NULL,"
+                " total INTEGER NOT NULL,"
+                " completed INTEGER NOT NULL DEFAULT 0,"
+                " failed INTEGER NOT NULL DEFAULT 0,"
+                " errors TEXT NOT NULL,"
+                " created_at TEXT NOT NULL,"
+                " finished_at TEXT)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS work_units ("
+                " task_id INTEGER NOT NULL,"
+                " unit_id INTEGER NOT NULL,"
+                " company_id TEXT NOT NULL,"
+                " handle TEXT NOT NULL,"
+                " owner TEXT,"
+                " lease_expires REAL NOT NULL DEFAULT 0,"
+                " PRIMARY KEY (unit_id, task_id))"
+            )
+
+    @contextmanager
+    def _transaction(self):
+        # take the write lock up front, so concurrent claims are serialized
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+
+    async def enqueue(
+        self,
+        task_id: int,
+        token: str,
+        handles: list[tuple[str, str]],
+        errors: dict[str, ErrorInfoModel] | None = None,
+        deadline: float | None = None,
+    ) -> TaskStatusModel:
+        """Split a task into one unit per (company_id, handle) and queue them."""
+        return await asyncio.to_thread(
+            self._enqueue, task_id, token, handles, errors, deadline
+        )
+
+    def _enqueue(
+        self,
+        task_id: int,
+        token: str,
+        handles: list[tuple[str, str]],
+        errors: dict[str, ErrorInfoModel] | None,
+        deadline: float | None,
+    ) -> TaskStatusModel:
+        with self._lock, self._transaction():
+            task = self._status(task_id)
+            if task is not None and task.status != FINISHED:
+                return task
+            self._connection.execute(
+                "INSERT OR REPLACE INTO work_tasks (task_id, token, deadline,"
+                " status, total, errors, created_at, finished_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    task_id,
+                    token,
+                    deadline,
+                    FINISHED if not handles else QUEUED,
+                    len(handles),
+                    _dump_errors(errors or {}),
+                    datetime.now().isoformat(),
+                    datetime.now().isoformat() if not handles else None,
+                ),
+            )
+            self._connection.executemany(
+                "INSERT INTO work_units (task_id, unit_id, company_id, handle)"
+                " VALUES (?, ?, ?, ?)",
+                (
+                    (task_id, unit_id, company_id, handle)
+                    for unit_id, (company_id, handle) in enumerate(handles)
+                ),
+            )
+            task = self._status(task_id)
+        assert task is not None
+        return task
+
+    async def claim(self, owner: str, lease: float) -> WorkUnit | None:
+        """Lease the next pending or abandoned unit to `owner`, if there is one."""
+        return await asyncio.to_thread(self._claim, owner, lease)
+
+    def _claim(self, owner: str, lease: float) -> WorkUnit | None:
+        now = time.time()
+        with self._lock, self._transaction():
+            row = self._connection.execute(
+                "SELECT u.task_id, u.unit_id, u.company_id, u.handle, t.token,"
+                " t.deadline"
+                " FROM work_units u JOIN work_tasks t USING (task_id)"
+                " WHERE u.owner IS NULL OR u.lease_expires < ?"
+                " ORDER BY u.unit_id, u.task_id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            unit = WorkUnit(*row)
+            self._connection.execute(
+                "UPDATE work_units SET owner = ?, lease_expires = ?"
+                " WHERE task_id = ? AND unit_id = ?",
+                (owner, now + lease, unit.task_id, unit.unit_id),
+            )
+            self._connection.execute(
+                "UPDATE work_tasks SET status = ? WHERE task_id = ?",
+                (RUNNING, unit.task_id),
+            )
+        return unit
+
+    async def heartbeat(self, unit: WorkUnit, owner: str, lease: float) -> bool:
+        """Extend the lease of a unit, return False if `owner` lost it."""
+        return await asyncio.to_thread(self._heartbeat, unit, owner, lease)
+
+    def _heartbeat(self, unit: WorkUnit, owner: str, lease: float) -> bool:
+        with self._lock, self._transaction():
+            cursor = self._connection.execute(
+                "UPDATE work_units SET lease_expires = ?"
+                " WHERE task_id = ? AND unit_id = ? AND owner = ?",
+                (time.time() + lease, unit.task_id, unit.unit_id, owner),
+            )
+        return cursor.rowcount == 1
+
+    async def complete(
+        self, unit: WorkUnit, owner: str, error: ErrorInfoModel | None = None
+    ) -> FinishedTask | None:
+        """Record the outcome of a unit."""
+        return await asyncio.to_thread(self._complete, unit, owner, error)
+
+    def _complete(
+        self, unit: WorkUnit, owner: str, error: ErrorInfoModel | None
+    ) -> FinishedTask | None:
+        with self._lock, self._transaction():
+            cursor = self._connection.execute(
+                "DELETE FROM work_units"
+                " WHERE task_id = ? AND unit_id = ? AND owner = ?",
+                (unit.task_id, unit.unit_id, owner),
+            )
+            if cursor.rowcount != 1:
+                return None
+            token, total, completed, failed, errors = self._connection.execute(
+                "SELECT token, total, completed, failed, errors FROM work_tasks"
+                " WHERE task_id = ?",
+                (unit.task_id,),
+            ).fetchone()
+            task_errors = _load_errors(errors)
+            if error is None:
+                completed += 1
+            else:
+                failed += 1
+                task_errors[unit.company_id] = error
+            finished = completed + failed >= total
+            self._connection.execute(
+                "UPDATE work_tasks SET completed = ?, failed = ?, errors = ?,"
+                " status = ?, finished_at = ? WHERE task_id = ?",
+                (
+                    completed,
+                    failed,
+                    _dump_errors(task_errors),
+                    FINISHED if finished else RUNNING,
+                    datetime.now().isoformat() if finished else None,
+                    unit.task_id,
+                ),
+            )
+        return FinishedTask(unit.task_id, token, task_errors) if finished else None
+
+    def _status(self, task_id: int) -> TaskStatusModel | None:
+        row = self._connection.execute(
+            "SELECT task_id, status, total, completed, failed, created_at,"
+            " finished_at FROM work_tasks WHERE task_id = ?",
+            (task_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        fields = ("task_id", "status", "total", "completed", "failed")
+        return TaskStatusModel(
+            **dict(zip(fields, row[:5], strict=True)),
+            created_at=row[5],
+            finished_at=row[6],
+        )
+
+    async def status(self, task_id: int) -> TaskStatusModel | None:
+        """Return the progress of a task, if it is known."""
+        return await asyncio.to_thread(self._locked_status, task_id)
+
+    def _locked_status(self, task_id: int) -> TaskStatusModel | None:
+        with self._lock:
+            return self._status(task_id)
+
+    async def aclose(self):
+        """Close the database connection."""
+        await asyncio.to_thread(self._connection.close)
+
+
+# KEYS: pending units, leases; ARGV: now, owner, lease, key prefix
+_CLAIM_SCRIPT = """
+local member = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1], 'LIMIT', 0, 1)[1]
+if not member then
+    member = redis.call('ZRANGE', KEYS[1], 0, 0)[1]
+    if not member then
+        return false
+    end
+    redis.call('ZREM', KEYS[1], member)
+end
+redis.call('ZADD', KEYS[2], tonumber(ARGV[1]) + tonumber(ARGV[3]), member)
+local unit = ARGV[4] .. ':unit:' .. member
+redis.call('HSET', unit, 'owner', ARGV[2])
+local task = ARGV[4] .. ':task:' .. redis.call('HGET', unit, 'task_id')
+redis.call('HSET', task, 'status', 'running')
+return {
+    member,
+    redis.call('HGET', unit, 'company_id'),
+    redis.call('HGET', unit, 'handle'),
+    redis.call('HGET', task, 'token'),
+    redis.call('HGET', task, 'deadline'),
+}
+"""
+
+# KEYS: leases, unit; ARGV: member, owner, lease expiry
+_HEARTBEAT_SCRIPT = """
+if redis.call('HGET', KEYS[2], 'owner') ~= ARGV[2]
+    or not redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[1])
+return 1
+"""
+
+# KEYS: leases, unit, task; ARGV: member, owner, company_id, error, finished_at
+_COMPLETE_SCRIPT = """
+if redis.call('HGET', KEYS[2], 'owner') ~= ARGV[2] then
+    return false
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('DEL', KEYS[2])
+if ARGV[4] == '' then
+    redis.call('HINCRBY', KEYS[3], 'completed', 1)
+else
+    redis.call('HINCRBY', KEYS[3], 'failed', 1)
+    redis.call('HSET', KEYS[3] .. ':errors', ARGV[3], ARGV[4])
+end
+local done = tonumber(redis.call('HGET', KEYS[3], 'completed'))
+    + tonumber(redis.call('HGET', KEYS[3], 'failed'))
+if done < tonumber(redis.call('HGET', KEYS[3], 'total')) then
+    return {0}
+end
+redis.call('HSET', KEYS[3], 'status', 'finished', 'finished_at', ARGV[5])
+return {
+    1,
+    redis.call('HGET', KEYS[3], 'token'),
+    redis.call('HGET', KEYS[3], 'errors'),
+    redis.call('HGETALL', KEYS[3] .. ':errors'),
+}
+"""
+
+
+class RedisWorkQueue(WorkQueue):
+    """Work queue in a Redis-compatible server shared by all replicas.
+
+    Pending units are kept in a sorted set by their index within the task and
+    leased units in a sorted set by the expiry of their lease. Claims, heartbeats
+    and completions are Lua scripts, so they are atomic across replicas. An
+    existing `redis.asyncio` `client` is used instead of connecting to `url`.
+    """
+
+    def __init__(
+        self,
+        url: str | None = None,
+        prefix: str = "producthunt:work",
+        client: aioredis.Redis | None = None,
+    ):
+        if client is None:
+            if url is None:
+                raise ValueError("A Redis work queue needs a url or a client")
+            client = aioredis.Redis.from_url(url)
+        self._redis = client
+        self.prefix = prefix
+        self._pending = f"{prefix}:pending"
+        self._leases = f"{prefix}:leases"
+        self._claim = self._redis.register_script(_CLAIM_SCRIPT)
+        self._heartbeat = self._redis.register_script(_HEARTBEAT_SCRIPT)
+        self._complete = self._redis.register_script(_COMPLETE_SCRIPT)
+
+    def _task_key(self, task_id: int) -> str:
+        return f"{self.prefix}:task:{task_id}"
+
+    def _unit_key(self, member: str) -> str:
+        return f"{self.prefix}:unit:{member}"
+
+    async def enqueue(
+        self,
+        task_id: int,
+        token: str,
+        handles: list[tuple[str, str]],
+        errors: dict[str, ErrorInfoModel] | None = None,
+        deadline: float | None = None,
+    ) -> TaskStatusModel:
+        """Split a task into one unit per (company_id, handle) and queue them."""
+        task = await self.status(task_id)
+        if task is not None and task.status != FINISHED:
+            return task
+        task_key = self._task_key(task_id)
+        now = datetime.now().isoformat()
+        fields: dict[FieldT, EncodableT] = {
+            "token": token,
+            "deadline": "" if deadline is None else deadline,
+            "status": QUEUED if handles else FINISHED,
+            "total": len(handles),
+            "completed": 0,
+            "failed": 0,
+            "errors": _dump_errors(errors or {}),
+            "created_at": now,
+        }
+        if not handles:
+            fields["finished_at"] = now
+        pipeline = self._redis.pipeline(transaction=True)
+        pipeline.delete(task_key, f"{task_key}:errors")
+        pipeline.hset(task_key, mapping=fields)
+        for unit_id, (company_id, handle) in enumerate(handles):
+            member = f"{task_id}:{unit_id}"
+            pipeline.hset(
+                self._unit_key(member),
+                mapping={
+                    "task_id": task_id,
+                    "company_id": company_id,
+                    "handle": handle,
+                },
+            )
+            pipeline.zadd(self._pending, {member: unit_id})
+        await pipeline.execute()
+        task = await self.status(task_id)
+        assert task is not None
+        return task
+
+    async def claim(self, owner: str, lease: float) -> WorkUnit | None:
+        """Lease the next pending or abandoned unit to `owner`, if there is one."""
+        result = await self._claim(
+            keys=[self._pending, self._leases],
+            args=[time.time(), owner, lease, self.prefix],
+        )
+        if not result:
+            return None
+        member, company_id, handle, token, deadline = (
+            value.decode() for value in result
+        )
+        task_id, unit_id = member.split(":")
+        return WorkUnit(
+            int(task_id),
+            int(unit_id),
+            company_id,
+            handle,
+            token,
+            float(deadline) if deadline else None,
+        )
+
+    async def heartbeat(self, unit: WorkUnit, owner: str, lease: float) -> bool:
+        """Extend the lease of a unit, return False if `owner` lost it."""
+        member = f"{unit.task_id}:{unit.unit_id}"
+        return bool(
+            await self._heartbeat(
+                keys=[self._leases, self._unit_key(member)],
+                args=[member, owner, time.time() + lease],
+            )
+        )
+
+    async def complete(
+        self, unit: WorkUnit, owner: str, error: ErrorInfoModel | None = None
+    ) -> FinishedTask | None:
+        """Record the outcome of a unit."""
+        member = f"{unit.task_id}:{unit.unit_id}"
+        result = await self._complete(
+            keys=[self._leases, self._unit_key(member), self._task_key(unit.task_id)],
+            args=[
+                member,
+                owner,
+                unit.company_id,
+                error.model_dump_json() if error is not None else "",
+                datetime.now().isoformat(),
+            ],
+        )
+        if not result or not result[0]:
+            return None
+        _, token, errors, unit_errors = result
+        task_errors = _load_errors(errors)
+        for company_id, unit_error in zip(
+            unit_errors[::2], unit_errors[1::2], strict=True
+        ):
+            task_errors[company_id.decode()] = ErrorInfoModel.model_validate_json(
+                unit_error
+            )
+        return FinishedTask(unit.task_id, token.decode(), task_errors)
+
+    async def status(self, task_id: int) -> TaskStatusModel | None:
+        """Return the progress of a task, if it is known."""
+        stored = await self._redis.hgetall(self._task_key(task_id))
+        if not stored:
+            return None
+        fields = {_text(key): _text(value) for key, value in stored.items()}
+        return TaskStatusModel.model_validate(
+            {
+                "task_id": task_id,
+                "status": fields["status"],
+                "total": fields["total"],
+                "completed": fields["completed"],
+                "failed": fields["failed"],
+                "created_at": fields["created_at"],
+                "finished_at": fields.get("finished_at"),
+            }
+        )
+
+    async def aclose(self):
+        """Close the connections to the server."""
+        await self._redis.aclose()
+
+
+def create_work_queue(url: str) -> WorkQueue:
+    """Create the work queue configured by a url.
+
+    `redis://` and `rediss://` urls select a Redis-compatible server,
+    `sqlite:///path` or a plain path a SQLite database and `memory://` a queue
+    that lives in the process.
+    """
+    if url.startswith(("redis://", "rediss://")):
+        return RedisWorkQueue(url)
+    if url == "memory://":
+        return InMemoryWorkQueue()
+    return SQLiteWorkQueue(url.removeprefix("sqlite:///"))
+
+
+class QueueWorker:
+    """Claims units of a work queue and crawls them with bounded concurrency.
+
+    `process` crawls a unit and returns its error, if any; `finish` receives the
+    outcome of every task whose last unit was completed by this worker. Leases
+    are extended every third of their duration while a unit is processed.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        queue: WorkQueue,
+        process: Callable[[WorkUnit], Awaitable[ErrorInfoModel | None]],
+        finish: Callable[[FinishedTask], Awaitable],
+        *,
+        concurrency: int,
+        lease: float = 30,
+        poll_interval: float = 1,
+        owner: str | None = None,
+    ):
+        self.queue = queue
+        self.process = process
+        self.finish = finish
+        self.concurrency = concurrency
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.owner = owner or worker_id()
+        self._runners: list[asyncio.Task] = []
+
+    def start(self):
+        """Start claiming units in the background."""
+        if not self._runners:
+            self._runners = [
+                asyncio.create_task(self._run()) for _ in range(self.concurrency)
+            ]
+
+    async def stop(self):
+        """Stop claiming units; units in progress are left to their lease."""
+        for runner in self._runners:
+            runner.cancel()
+        await asyncio.gather(*self._runners, return_exceptions=True)
+        self._runners = []
+
+    async def _run(self):
+        while True:
+            try:
+                unit = await self.queue.claim(self.owner, self.lease)
+            except Exception as e:
+                logger.error(f"Failed to claim a work unit: {e}")
+                unit = None
+            if unit is None:
+                await asyncio.sleep(self.poll_interval)
+                continue
+            await self.run_unit(unit)
+
+    async def run_unit(self, unit: WorkUnit):
+        """Process a claimed unit while holding its lease, then complete it."""
+        heartbeat = asyncio.create_task(self._keep_leased(unit))
+        try:
+            error = await self.process(unit)
+        except Exception as e:
+            logger.error(f"Work unit {unit} failed: {e}")
+            error = ErrorInfoModel(
+                error_type=e.__class__.__name__, error_description=str(e)
+            )
+        finally:
+            heartbeat.cancel()
+
+        try:
+            finished = await self.queue.complete(unit, self.owner, error)
+        except Exception as e:
+            # the unit is claimed again once its lease expired
+            logger.error(f"Failed to complete work unit {unit}: {e}")
+            return
+        if finished is None:
+            return
+        try:
+            await self.finish(finished)
+        except Exception as e:
+            logger.error(f"Failed to finish task {finished.task_id}: {e}")
+
+    async def _keep_leased(self, unit: WorkUnit):
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                leased = await self.queue.heartbeat(unit, self.owner, self.lease)
+            except Exception as e:
+                logger.error(f"Failed to extend the lease of work unit {unit}: {e}")
+                continue
+            if not leased:
+                logger.warning(f"Lost the lease of work unit {unit}")
+                return
@@ -0,0 +1,521 @@
+import asyncio
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from jose import jwt
+
+from parma_mining.mining_common.exceptions import AnalyticsError, CrawlingError
+from parma_mining.producthunt.api import main
+from parma_mining.producthunt.api.dependencies.auth import authenticate
+from parma_mining.producthunt.api.main import app
+from parma_mining.producthunt.checkpoint_store import InMemoryCheckpointStore
+from parma_mining.producthunt.model import ProductInfo, Review
+from parma_mining.producthunt.watermark_store import InMemoryWatermarkStore, Watermark
+from parma_mining.producthunt.work_queue import InMemoryWorkQueue
+from tests.dependencies.mock_auth import mock_authenticate
+
+HANDLE_COUNT = 3
+
+
+@pytest.fixture
+def client():
+    assert app
+    app.dependency_overrides.update(
+        {
+            authenticate: mock_authenticate,
+        }
+    )
+    # the context keeps the event loop of the background tasks alive
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def mock_scrape(mocker) -> MagicMock:
+    """Mocking ProductHuntClient's scrape_product_page method."""
+    mock = mocker.patch(
+        "parma_mining.producthunt.api.main.ProductHuntClient.scrape_product_page"
+    )
+    mock.return_value = ProductInfo(name="TestProduct")
+    return mock
+
+
+@pytest.fixture
+def mock_feed(mocker) -> MagicMock:
+    """Mocking AnalyticsClient's feed_raw_data method."""
+    return mocker.patch(
+        "parma_mining.producthunt.api.main.AnalyticsClient.feed_raw_data"
+    )
+
+
+@pytest.fixture
+def mock_crawling_finished(mocker) -> MagicMock:
+    """Mocking AnalyticsClient's crawling_finished method."""
+    mock = mocker.patch(
+        "parma_mining.producthunt.api.main.AnalyticsClient.crawling_finished"
+    )
+    mock.return_value = {"result": "ok"}
+    return mock
+
+
+def _wait_for_task(client: TestClient, task_id: int = 1, timeout: float = 5) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        task = client.get(f"/tasks/{task_id}").json()
+        if task["status"] in ("finished", "failed"):
+            return task
+        time.sleep(0.01)
+    raise AssertionError(f"Task {task_id} did not finish in time")
+
+
+def _request_body():
+    return {
+        "task_id": 1,
+        "companies": {
+            "c1": {"producthunt_url": ["https://www.producthunt.com/products/a"]},
+            "c2": {
+                "producthunt_url": [
+                    "https://www.producthunt.com/products/b",
+                    "https://www.producthunt.com/products/c",
+                ]
+            },
+        },
+    }
+
+
+def test_companies_success(
+    client: TestClient,
+    mock_scrape: MagicMock,
+    mock_feed: MagicMock,
+    mock_crawling_finished: MagicMock,
+):
+    """Test that every handle is crawled and fed."""
+    response = client.post("/companies", json=_request_body())
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.json()["task_id"] == 1
+    assert response.json()["total"] == HANDLE_COUNT
+    task = _wait_for_task(client)
+    assert task["status"] == "finished"
+    assert task["completed"] == HANDLE_COUNT
+    assert mock_scrape.call_count == HANDLE_COUNT
+    assert mock_feed.call_count == HANDLE_COUNT
+    finished_data = mock_crawling_finished.call_args.args[1]
+    assert finished_data == {"task_id": 1, "errors": {}}
+
+
+def test_companies_crawls_handles_concurrently(
+    client: TestClient,
+    mock_scrape: MagicMock,
+    mock_feed: MagicMock,
+    mock_crawling_finished: MagicMock,
+):
+    """Test that handles of a task are scraped in parallel."""
+    in_flight = 0
+    max_in_flight = 0
+
+    async def slow_scrape(url, **kwargs):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return ProductInfo()
+
+    mock_scrape.side_effect = slow_scrape
+    client.post("/companies", json=_request_body())
+    _wait_for_task(client)
+
+    assert max_in_flight == HANDLE_COUNT
+
+
+def test_companies_collects_errors(
+    client: TestClient,
+    mock_scrape: MagicMock,
+    mock_feed: MagicMock,
+    mock_crawling_finished: MagicMock,
+):
+    """Test that crawling and analytics errors end up in the error map."""
+
+    async def failing_scrape(url, **kwargs):
+        if url.endswith("/a"):
+            raise CrawlingError("blocked")
+        return ProductInfo()
+
+    mock_scrape.side_effect = failing_scrape
+    mock_feed.side_effect = AnalyticsError("analytics down")
+    body = _request_body()
+    body["companies"]["c3"] = {"unknown_type": ["handle"]}
+
+    client.post("/companies", json=body)
+    task = _wait_for_task(client)
+
+    assert task["failed"] == 1
+    errors = mock_crawling_finished.call_args.args[1]["errors"]
+    assert errors["c1"]["error_type"] == "CrawlingError"
+    assert errors["c2"]["error_type"] == "AnalyticsError"
+    assert errors["c3"]["error_type"] == "ClientInvalidBodyError"
+
+
+def test_companies_incremental_mode(
+    client: TestClient,
+    mocker,
+    mock_scrape: MagicMock,
+    mock_feed: MagicMock,
+    mock_crawling_finished: MagicMock,
+):
+    """Test that watermarks are passed to the scraper and advanced on delivery."""
+    store = InMemoryWatermarkStore()
+    mocker.patch("parma_mining.producthunt.api.main.watermark_store", store)
+    old_watermark = Watermark("1", "2023-10-01 10:00:00")
+    store.set("c1", "https://www.producthunt.com/products/a", old_watermark)
+    newest = Review.from_date("2", "new", "2023-11-01 10:00:00")
+    mock_scrape.return_value = ProductInfo(reviews=[newest], newest_review=newest)
+
+    async def feed(token, data):
+        if data.company_id == "c2":
+            raise AnalyticsError("analytics down")
+
+    mock_feed.side_effect = feed
+    client.post("/companies", json=_request_body())
+    _wait_for_task(client)
+
+    since = {
+        call.args[0]: call.kwargs["since"] for call in mock_scrape.call_args_list
+    }
+    assert since["https://www.producthunt.com/products/a"] == old_watermark
+    assert since["https://www.producthunt.com/products/b"] is None
+    assert store.get("c1", "https://www.producthunt.com/products/a") == (
+        Watermark("2", "2023-11-01 10:00:00")
+    )
+    # failed deliveries keep their watermark so the reviews are sent again
+    assert store.get("c2", "https://www.producthunt.com/products/b") is None
+
+
+def test_task_status_unknown_task(client: TestClient):
+    """Test that the status of an unknown task is not found."""
+    response = client.get("/tasks/404")
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_companies_reports_failed_task(
+    client: TestClient,
+    mock_scrape: MagicMock,
+    mock_feed: MagicMock,
+    mock_crawling_finished: MagicMock,
+):
+    """Test that a task is failed if the analytics cannot be notified."""
+    mock_crawling_finished.side_effect = AnalyticsError("analytics down")
+
+    client.post("/companies", json=_request_body())
+
+    assert _wait_for_task(client)["status"] == "failed"
+
+
+def test_companies_records_checkpoints(
+    client: TestClient,
+    mocker,
+    mock_scrape: MagicMock,
+    mock_feed: MagicMock,
+    mock_crawling_finished: MagicMock,
+):
+    """Test that fed handles are checkpointed until the task finished."""
+    store = InMemoryCheckpointStore()
+    mocker.patch("parma_mining.producthunt.api.main.checkpoint_store", store)
+    fed_handles = []
+
+    async def feed(token, data):
+        fed_handles.append(store.fed_handles(1))
+        if data.company_id == "c2":
+            raise AnalyticsError("analytics down")
+
+    mock_feed.side_effect = feed
+    finished_checkpoints = []
+    mock_crawling_finished.side_effect = lambda token, data: (
+        finished_checkpoints.append(store.fed_handles(1))
+    )
+
+    client.post("/companies", json=_request_body())
+    _wait_for_task(client)
+
+    assert finished_checkpoints == [{("c1", "https://www.producthunt.com/products/a")}]
+    assert store.unfinished_tasks() == []
+
+
+def test_companies_resumes_from_checkpoint(
+    mocker,
+    mock_scrape: MagicMock,
+    mock_feed: MagicMock,
+    mock_crawling_finished: MagicMock,
+):
+    """Test that unfinished tasks resume on startup and skip fed handles."""
+    app.dependency_overrides.update({authenticate: mock_authenticate})
+    store = InMemoryCheckpointStore()
+    mocker.patch("parma_mining.producthunt.api.main.checkpoint_store", store)
+    body = main.CompaniesRequest.model_validate(_request_body())
+    store.start_task(1, body.model_dump_json(), "token")
+    store.mark_fed(1, "c1", "https://www.producthunt.com/products/a")
+
+    with TestClient(app) as client:
+        task = _wait_for_task(client)
+
+    assert task["status"] == "finished"
+    assert task["completed"] == HANDLE_COUNT
+    scraped = {call.args[0] for call in mock_scrape.call_args_list}
+    assert scraped == {
+        "https://www.producthunt.com/products/b",
+        "https://www.producthunt.com/products/c",
+    }
+    assert mock_crawling_finished.call_args.args[0] == "token"
+    assert store.unfinished_tasks() == []
+
+
+def test_companies_gives_up_checkpointed_tasks(
+    mocker,
+    mock_scrape: MagicMock,
+    mock_feed: MagicMock,
+    mock_crawling_finished: MagicMock,
+):
+    """Test that expired tasks and tasks out of attempts are not resumed."""
+    app.dependency_overrides.update({authenticate: mock_authenticate})
+    store = InMemoryCheckpointStore()
+    mocker.patch("parma_mining.producthunt.api.main.checkpoint_store", store)
+    request = main.CompaniesRequest.model_validate(_request_body())
+    for _ in range(main.checkpoint_max_attempts):
+        store.start_task(1, request.model_dump_json(), "token")
+    expired = request.model_copy(update={"task_id": 2})
+    store.start_task(2, expired.model_dump_json(), "token", expires_at=time.time())
+
+    with TestClient(app):
+        pass
+
+    assert store.unfinished_tasks() == []
+    mock_scrape.assert_not_called()
+    mock_crawling_finished.assert_not_called()
+
+
+def test_companies_duplicate_submission_is_no_attempt(
+    client: TestClient,
+    mocker,
+    mock_scrape: MagicMock,
+    mock_feed: MagicMock,
+    mock_crawling_finished: MagicMock,
+):
+    """Test that posting a running task again does not count another attempt."""
+    store = InMemoryCheckpointStore()
+    mocker.patch("parma_mining.producthunt.api.main.checkpoint_store", store)
+    attempts = []
+    release = asyncio.Event()
+
+    async def scrape(url, **kwargs):
+        await release.wait()
+        return ProductInfo()
+
+    mock_scrape.side_effect = scrape
+    mock_crawling_finished.side_effect = lambda token, data: attempts.extend(
+        task.attempts for task in store.unfinished_tasks()
+    )
+
+    client.post("/companies", json=_request_body())
+    client.post("/companies", json=_request_body())
+    client.portal.call(release.set)
+    _wait_for_task(client)
+
+    assert attempts == [1]
+
+
+def test_companies_checkpoint_expires_with_token(
+    client: TestClient,
+    mocker,
+    mock_scrape: MagicMock,
+    mock_feed: MagicMock,
+    mock_crawling_finished: MagicMock,
+):
+    """Test that a checkpoint does not outlive the token of its task."""
+    store = InMemoryCheckpointStore()
+    mocker.patch("parma_mining.producthunt.api.main.checkpoint_store", store)
+    expires_at = time.time() + 60
+    token = jwt.encode({"exp": int(expires_at)}, "secret", algorithm="HS256")
+    app.dependency_overrides[authenticate] = lambda: token
+    started = []
+    mock_crawling_finished.side_effect = lambda token, data: started.extend(
+        store.unfinished_tasks()
+    )
+
+    client.post("/companies", json=_request_body())
+    _wait_for_task(client)
+
+    assert [task.expires_at for task in started] == [int(expires_at)]
+
+
+def test_companies_distributed_mode(
+    mocker,
+    mock_scrape: MagicMock,
+    mock_feed: MagicMock,
+    mock_crawling_finished: MagicMock,
+):
+    """Test that tasks are split into units on the work queue and crawled from it."""
+    app.dependency_overrides.update({authenticate: mock_authenticate})
+    queue = InMemoryWorkQueue()
+    mocker.patch("parma_mining.producthunt.api.main.work_queue", queue)
+    mocker.patch("parma_mining.producthunt.api.main.work_queue_poll_interval", 0.01)
+
+    async def failing_scrape(url, **kwargs):
+        if url.endswith("/a"):
+            raise CrawlingError("blocked")
+        return ProductInfo()
+
+    mock_scrape.side_effect = failing_scrape
+    body = _request_body()
+    body["companies"]["c3"] = {"unknown_type": ["handle"]}
+
+    with TestClient(app) as client:
+        response = client.post("/companies", json=body)
+        task = _wait_for_task(client)
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.json()["total"] == HANDLE_COUNT
+    assert task["completed"] == HANDLE_COUNT - 1
+    assert task["failed"] == 1
+    assert mock_feed.call_count == HANDLE_COUNT - 1
+    mock_crawling_finished.assert_called_once()
+    errors = mock_crawling_finished.call_args.args[1]["errors"]
+    assert errors["c1"]["error_type"] == "CrawlingError"
+    assert errors["c3"]["error_type"] == "ClientInvalidBodyError"
+
+
+def test_companies_stops_at_time_budget(
+    client: TestClient,
+    mock_scrape: MagicMock,
+    mock_feed: MagicMock,
+    mock_crawling_finished: MagicMock,
+):
+    """Test that handles unfinished when the budget runs out are reported."""
+
+    async def scrape(url, **kwargs):
+        if url.endswith("/c"):
+            await asyncio.sleep(10)
+        return ProductInfo()
+
+    mock_scrape.side_effect = scrape
+    body = _request_body()
+    body["time_budget"] = 0.2
+
+    start = time.monotonic()
+    client.post("/companies", json=body)
+    task = _wait_for_task(client)
+
+    assert time.monotonic() - start < 2  # noqa: PLR2004
+    assert (task["status"], task["completed"], task["failed"]) == ("finished", 2, 1)
+    assert mock_feed.call_count == 2  # noqa: PLR2004
+    errors = mock_crawling_finished.call_args.args[1]["errors"]
+    assert errors == {
+        "c2": {
+            "error_type": "CrawlingInternalError",
+            "error_description": (
+                "Deadline of task 1 exceeded before "
+                "https://www.producthunt.com/products/c was crawled"
+            ),
+        }
+    }
+
+
+def test_companies_bounds_delivery_by_time_budget(
+    client: TestClient,
+    mock_scrape: MagicMock,
+    mock_feed: MagicMock,
+    mock_crawling_finished: MagicMock,
+):
+    """Test that data not delivered by the deadline is reported, not waited for."""
+
+    async def feed(token, data):
+        await asyncio.sleep(10)
+
+    mock_feed.side_effect = feed
+    body = _request_body()
+    body["time_budget"] = 0.2
+
+    start = time.monotonic()
+    client.post("/companies", json=body)
+    task = _wait_for_task(client)
+
+    assert time.monotonic() - start < 2  # noqa: PLR2004
+    assert task["status"] == "finished"
+    errors = mock_crawling_finished.call_args.args[1]["errors"]
+    assert errors["c1"] == {
+        "error_type": "CrawlingInternalError",
+        "error_description": (
+            "Deadline of task 1 exceeded before "
+            "https://www.producthunt.com/products/a was delivered"
+        ),
+    }
+    assert set(errors) == {"c1", "c2"}
+
+
+def test_companies_past_deadline(
+    client: TestClient,
+    mock_scrape: MagicMock,
+    mock_feed: MagicMock,
+    mock_crawling_finished: MagicMock,
+):
+    """Test that handles of a task past its deadline are reported, not crawled."""
+    body = _request_body()
+    body["deadline"] = "2020-01-01T00:00:00Z"
+
+    client.post("/companies", json=body)
+    task = _wait_for_task(client)
+
+    assert (task["status"], task["failed"]) == ("finished", HANDLE_COUNT)
+    mock_scrape.assert_not_called()
+    mock_feed.assert_not_called()
+    errors = mock_crawling_finished.call_args.args[1]["errors"]
+    assert set(errors) == {"c1", "c2"}
+    assert {error["error_type"] for error in errors.values()} == {
+        "CrawlingInternalError"
+    }
+
+
+def test_companies_orders_handles_round_robin_by_company():
+    """Test that the first handle of every company is crawled first."""
+    body = main.CompaniesRequest(
+        task_id=1,
+        companies={
+            "c1": {"producthunt_url": ["a1", "a2", "a3"]},
+            "c2": {"producthunt_url": ["b1"], "unknown_type": ["x"]},
+            "c3": {"producthunt_url": ["c1", "c2"]},
+        },
+    )
+
+    handles, errors = main._split_handles(body)
+
+    assert [handle for _, handle in handles] == ["a1", "b1", "c1", "a2", "c2", "a3"]
+    assert set(errors) == {"c2"}
+
+
+def test_companies_distributed_mode_past_deadline(
+    mocker,
+    mock_scrape: MagicMock,
+    mock_feed: MagicMock,
+    mock_crawling_finished: MagicMock,
+):
+    """Test that units of a task past its deadline are reported, not crawled."""
+    app.dependency_overrides.update({authenticate: mock_authenticate})
+    mocker.patch("parma_mining.producthunt.api.main.work_queue", InMemoryWorkQueue())
+    mocker.patch("parma_mining.producthunt.api.main.work_queue_poll_interval", 0.01)
+    body = _request_body()
+    body["deadline"] = "2020-01-01T00:00:00Z"
+
+    with TestClient(app) as client:
+        client.post("/companies", json=body)
+        task = _wait_for_task(client)
+
+    assert task["failed"] == HANDLE_COUNT
+    mock_feed.assert_not_called()
+    errors = mock_crawling_finished.call_args.args[1]["errors"]
+    assert {error["error_type"] for error in errors.values()} == {
+        "CrawlingInternalError"
+    }
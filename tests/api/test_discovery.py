@@ -1,3 +1,5 @@
+import asyncio
+import json
 from unittest.mock import MagicMock
 
 import pytest
@@ -5,9 +7,12 @@ from fastapi import status
 from fastapi.testclient import TestClient
 
 from parma_mining.mining_common.exceptions import ClientInvalidBodyError
+from parma_mining.producthunt.api import main
 from parma_mining.producthunt.api.dependencies.auth import authenticate
 from parma_mining.producthunt.api.main import app
+from parma_mining.producthunt.discovery import DiscoveryCache, normalize_company_name
 from parma_mining.producthunt.model import (
+    DiscoveryModel,
     DiscoveryRequest,
 )
 from tests.dependencies.mock_auth import mock_authenticate
@@ -24,6 +29,11 @@ def client():
     return TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def clear_discovery_cache():
+    main.discovery_cache.clear()
+
+
 @pytest.fixture
 def mock_producthunt_client(mocker) -> MagicMock:
     """Mocking ProductHuntClient's search_organizations method."""
@@ -93,3 +103,154 @@ def test_discover_endpoint_with_producthunt_client_error(
     with pytest.raises(Exception) as exc_info:
         client.post("/discover", json=request_data)
     assert "Mocked Exception" in str(exc_info.value)
+
+
+def test_discover_deduplicates_normalized_names(
+    client: TestClient, mock_producthunt_client: MagicMock
+):
+    """Test that equivalent company names are searched only once."""
+    request_data = [
+        DiscoveryRequest(company_id="1", name="Acme GmbH").model_dump(),
+        DiscoveryRequest(company_id="2", name="  acme ").model_dump(),
+        DiscoveryRequest(company_id="3", name="ACME Inc.").model_dump(),
+        DiscoveryRequest(company_id="4", name="Other").model_dump(),
+    ]
+
+    response = client.post("/discover", json=request_data)
+
+    identifiers = response.json()["identifiers"]
+    assert set(identifiers) == {"1", "2", "3", "4"}
+    searched = sorted(call.args[0] for call in mock_producthunt_client.call_args_list)
+    assert searched == ["acme", "other"]
+
+
+def test_discover_searches_concurrently(
+    client: TestClient, mock_producthunt_client: MagicMock
+):
+    """Test that distinct names are searched in parallel."""
+    in_flight = 0
+    max_in_flight = 0
+
+    async def slow_search(name):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return {"producthunt_url": [f"https://example.com/{name}"]}
+
+    mock_producthunt_client.side_effect = slow_search
+    request_data = [
+        DiscoveryRequest(company_id=str(i), name=f"Company {i}").model_dump()
+        for i in range(3)
+    ]
+
+    client.post("/discover", json=request_data)
+
+    assert max_in_flight == len(request_data)
+
+
+def test_discover_serves_repeated_names_from_cache(
+    client: TestClient, mock_producthunt_client: MagicMock
+):
+    """Test that found products are cached across requests."""
+    request_data = [DiscoveryRequest(company_id="1", name="Acme").model_dump()]
+
+    client.post("/discover", json=request_data)
+    response = client.post("/discover", json=request_data)
+
+    mock_producthunt_client.assert_called_once()
+    assert response.json()["identifiers"]["1"] == {
+        "producthunt_url": ["https://example.com"]
+    }
+
+
+def test_discover_does_not_cache_empty_results(
+    client: TestClient, mock_producthunt_client: MagicMock
+):
+    """Test that names without products are searched again."""
+    mock_producthunt_client.return_value = {}
+    request_data = [DiscoveryRequest(company_id="1", name="Acme").model_dump()]
+
+    client.post("/discover", json=request_data)
+    client.post("/discover", json=request_data)
+
+    assert mock_producthunt_client.call_count == 2  # noqa: PLR2004
+
+
+def test_discover_streams_ndjson_in_completion_order(
+    client: TestClient, mock_producthunt_client: MagicMock
+):
+    """Test that streamed entries arrive as searches complete, then the trailer."""
+    delays = {"slow": 0.05, "fast": 0.0}
+
+    async def search(name):
+        await asyncio.sleep(delays[name])
+        return {"producthunt_url": [f"https://example.com/{name}"]}
+
+    mock_producthunt_client.side_effect = search
+    request_data = [
+        DiscoveryRequest(company_id="1", name="Slow").model_dump(),
+        DiscoveryRequest(company_id="2", name="Fast").model_dump(),
+        DiscoveryRequest(company_id="3", name="fast GmbH").model_dump(),
+    ]
+
+    response = client.post(
+        "/discover", json=request_data, headers={"Accept": "application/x-ndjson"}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line.get("company_id") for line in lines[:-1]] == ["2", "3", "1"]
+    assert lines[0]["identifiers"] == {
+        "producthunt_url": ["https://example.com/fast"]
+    }
+    assert set(lines[-1]) == {"validity"}
+    assert mock_producthunt_client.call_count == 2  # noqa: PLR2004
+
+
+def test_discover_streams_with_query_flag(
+    client: TestClient, mock_producthunt_client: MagicMock
+):
+    """Test that the query flag selects the streaming mode as well."""
+    request_data = [DiscoveryRequest(company_id="1", name="Acme").model_dump()]
+
+    response = client.post("/discover?stream=true", json=request_data)
+
+    entry, trailer = (json.loads(line) for line in response.text.splitlines())
+    assert entry == {
+        "company_id": "1",
+        "identifiers": {"producthunt_url": ["https://example.com"]},
+    }
+    assert "validity" in trailer
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("Acme", "acme"),
+        ("  Acme   Labs ", "acme labs"),
+        ("Acme GmbH", "acme"),
+        ("Acme GmbH & Co. KG", "acme"),
+        ("Acme, Inc.", "acme"),
+        ("Acme Ltd", "acme"),
+        ("Incredible", "incredible"),
+        ("AG", "ag"),
+    ],
+)
+def test_normalize_company_name(name, expected):
+    assert normalize_company_name(name) == expected
+
+
+def test_discovery_cache_expires_entries(mocker):
+    monotonic = mocker.patch(
+        "parma_mining.producthunt.discovery.time.monotonic", return_value=0
+    )
+    cache = DiscoveryCache(ttl=10, max_entries=10)
+    cache.put("acme", DiscoveryModel(producthunt_url=["https://example.com"]))
+
+    monotonic.return_value = 5
+    assert cache.get("acme") is not None
+    monotonic.return_value = 11
+    assert cache.get("acme") is None
@@ -26,6 +26,7 @@ def mock_analytics_client(mocker) -> MagicMock:
     mock = mocker.patch(
         "parma_mining.producthunt.api.main.AnalyticsClient.register_measurements"
     )
+    mock.return_value = ([], {"Source": "producthunt", "Mappings": []})
     return mock
 
 
@@ -0,0 +1,46 @@
+from fastapi import status
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from parma_mining.producthunt.api.main import app
+from parma_mining.producthunt.metrics import (
+    EXTRACT_SECONDS,
+    PRODUCT_PAGE,
+    timed,
+    track_fetch,
+)
+
+
+def test_metrics_endpoint():
+    response = TestClient(app).get("/metrics")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "producthunt_fetch_seconds" in response.text
+    assert "producthunt_scraped_products_total" in response.text
+
+
+def test_timed_records_calls():
+    def count():
+        return REGISTRY.get_sample_value(
+            "producthunt_extract_seconds_count", {"function": "test_function"}
+        )
+
+    @timed(EXTRACT_SECONDS.labels("test_function"))
+    def function(value):
+        return value
+
+    before = count() or 0
+    assert function(42) == 42  # noqa: PLR2004
+    assert count() == before + 1
+
+
+def test_track_fetch_counts_in_flight_requests():
+    def in_flight():
+        return REGISTRY.get_sample_value(
+            "producthunt_fetch_in_flight", {"target": PRODUCT_PAGE}
+        )
+
+    with track_fetch(PRODUCT_PAGE):
+        assert in_flight() == 1
+    assert in_flight() == 0
@@ -1,9 +1,14 @@
-from unittest.mock import MagicMock, patch
+import asyncio
+import gzip
+import json
+from unittest.mock import AsyncMock, patch
 
 import httpx
 import pytest
+import zstandard
 from fastapi import status
 
+from parma_mining.mining_common.exceptions import AnalyticsError
 from parma_mining.producthunt.analytics_client import AnalyticsClient
 from parma_mining.producthunt.model import ProductInfo, ResponseModel, Review
 
@@ -20,7 +25,7 @@ def analytics_client():
 
 @pytest.fixture
 def mock_repository_model():
-    return MagicMock(spec=Review)
+    return Review.from_date("1", "Great product", "2023-11-01T10:00:00Z")
 
 
 @pytest.fixture
@@ -30,7 +35,7 @@ def mock_organization_model(mock_repository_model):
         overall_rating=3.5,
         review_count=3,
         followers=1400,
-        reviews=mock_repository_model,
+        reviews=[mock_repository_model],
     )
 
 
@@ -43,44 +48,307 @@ def mock_response_model(mock_organization_model):
     )
 
 
-@patch("httpx.post")
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
 def test_send_post_request_success(mock_post, analytics_client, token):
     """Test for successful send_post_request."""
     mock_post.return_value = httpx.Response(status.HTTP_200_OK, json={"key": "value"})
-    response = analytics_client.send_post_request(
-        token, "http://example.com", {"data": "test"}
+    response = asyncio.run(
+        analytics_client.send_post_request(
+            token, "http://example.com", {"data": "test"}
+        )
     )
     assert response == {"key": "value"}
 
 
-@patch("httpx.post")
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
 def test_send_post_request_failure(mock_post, analytics_client, token):
     """Test for failed send_post_request."""
     mock_post.return_value = httpx.Response(
         status.HTTP_500_INTERNAL_SERVER_ERROR, text="Internal Server Error"
     )
     with pytest.raises(Exception) as exc_info:
-        analytics_client.send_post_request(
-            token, "http://example.com", {"data": "test"}
+        asyncio.run(
+            analytics_client.send_post_request(
+                token, "http://example.com", {"data": "test"}
+            )
         )
     assert "API request failed" in str(exc_info.value)
 
 
-@patch("httpx.post")
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
 def test_register_measurements(mock_post, analytics_client, token):
     """Test for successful register_measurements."""
     mock_post.return_value = httpx.Response(status.HTTP_200_OK, json={"id": "123"})
     mapping = {"Mappings": [{"DataType": "int", "MeasurementName": "test_metric"}]}
-    result, updated_mapping = analytics_client.register_measurements(token, mapping)
+    result, updated_mapping = asyncio.run(
+        analytics_client.register_measurements(token, mapping)
+    )
     assert "source_measurement_id" in updated_mapping["Mappings"][0]
     assert result[0]["source_measurement_id"] == "123"
 
 
-@patch("httpx.post")
+def _nested_mapping():
+    return {
+        "Mappings": [
+            {"DataType": "int", "MeasurementName": "count"},
+            {
+                "DataType": "nested",
+                "MeasurementName": "reviews",
+                "NestedMappings": [
+                    {"DataType": "comment", "MeasurementName": "text"},
+                    {"DataType": "date", "MeasurementName": "date"},
+                ],
+            },
+        ]
+    }
+
+
+def test_register_measurements_concurrently(analytics_client, token, mocker):
+    """Test that siblings are registered in parallel and children after parents."""
+    ids = {"count": 1, "reviews": 2, "text": 3, "date": 4}
+    in_flight = 0
+    max_in_flight = 0
+    registered = []
+
+    async def post(url, content, headers):
+        nonlocal in_flight, max_in_flight
+        data = json.loads(content)
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        registered.append(data)
+        return httpx.Response(
+            status.HTTP_200_OK, json={"id": ids[data["measurement_name"]]}
+        )
+
+    mocker.patch("httpx.AsyncClient.post", side_effect=post)
+    mapping = _nested_mapping()
+
+    result, updated_mapping = asyncio.run(
+        analytics_client.register_measurements(token, mapping, source_module_id=7)
+    )
+
+    assert max_in_flight == 2  # noqa: PLR2004
+    parents = {
+        data["measurement_name"]: data.get("parent_measurement_id")
+        for data in registered
+    }
+    assert parents == {"count": None, "reviews": None, "text": 2, "date": 2}
+    assert [data["measurement_name"] for data in result] == [
+        "count",
+        "text",
+        "date",
+        "reviews",
+    ]
+    nested = updated_mapping["Mappings"][1]["NestedMappings"]
+    assert [field["source_measurement_id"] for field in nested] == [3, 4]
+    # the mapping passed in is left untouched
+    assert mapping == _nested_mapping()
+
+
+def test_register_measurements_retries_only_failed(analytics_client, token, mocker):
+    """Test that a retry only registers the measurements that failed before."""
+    ids = {"count": 1, "reviews": 2, "text": 3, "date": 4}
+    failing = {"text"}
+    registered = []
+
+    async def post(url, content, headers):
+        data = json.loads(content)
+        if data["measurement_name"] == "count":
+            await asyncio.sleep(0.01)
+        registered.append(data["measurement_name"])
+        if data["measurement_name"] in failing:
+            return httpx.Response(status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return httpx.Response(
+            status.HTTP_200_OK, json={"id": ids[data["measurement_name"]]}
+        )
+
+    mocker.patch("httpx.AsyncClient.post", side_effect=post)
+
+    with pytest.raises(AnalyticsError):
+        asyncio.run(
+            analytics_client.register_measurements(
+                token, _nested_mapping(), source_module_id=7
+            )
+        )
+    # the siblings of the failed measurement were still registered
+    assert sorted(registered) == ["count", "date", "reviews", "text"]
+
+    failing.clear()
+    registered.clear()
+    result, mapping = asyncio.run(
+        analytics_client.register_measurements(
+            token, _nested_mapping(), source_module_id=7
+        )
+    )
+
+    assert registered == ["text"]
+    assert {
+        data["measurement_name"]: data["source_measurement_id"] for data in result
+    } == ids
+    nested = mapping["Mappings"][1]["NestedMappings"]
+    assert [field["source_measurement_id"] for field in nested] == [3, 4]
+
+
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+def test_register_measurements_caches_per_source_module(
+    mock_post, analytics_client, token
+):
+    """Test that repeated registrations of a source module are served from cache."""
+    mock_post.return_value = httpx.Response(status.HTTP_200_OK, json={"id": "123"})
+
+    async def register():
+        first = await analytics_client.register_measurements(
+            token, _nested_mapping(), source_module_id=1
+        )
+        calls = mock_post.call_count
+        second = await analytics_client.register_measurements(
+            token, _nested_mapping(), source_module_id=1
+        )
+        assert mock_post.call_count == calls
+        await analytics_client.register_measurements(
+            token, _nested_mapping(), source_module_id=2
+        )
+        assert mock_post.call_count == 2 * calls
+        return first, second
+
+    first, second = asyncio.run(register())
+
+    assert first == second
+    assert first is not second
+
+
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
 def test_feed_raw_data(mock_post, analytics_client, mock_response_model, token):
     """Test for successful feed_raw_data."""
     mock_post.return_value = httpx.Response(
         status.HTTP_200_OK, json={"result": "success"}
     )
-    result = analytics_client.feed_raw_data(token, mock_response_model)
+    result = asyncio.run(analytics_client.feed_raw_data(token, mock_response_model))
     assert result == {"result": "success"}
+
+
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+def test_feed_raw_data_sends_model_json(mock_post, analytics_client, token):
+    """Test that raw data is serialized once, without the internal fields."""
+    mock_post.return_value = httpx.Response(status.HTTP_200_OK, json={})
+    review = Review.from_date("42", "Great", "2023-11-01 10:00:00")
+    data = ResponseModel(
+        source_name="producthunt",
+        company_id="c1",
+        raw_data=ProductInfo(
+            name="TestProduct", reviews=[review], newest_review=review
+        ),
+    )
+
+    asyncio.run(analytics_client.feed_raw_data(token, data))
+
+    sent = mock_post.call_args.kwargs
+    assert sent["headers"]["Content-Type"] == "application/json"
+    assert "Content-Encoding" not in sent["headers"]
+    payload = json.loads(sent["content"])
+    assert payload["company_id"] == "c1"
+    assert payload["raw_data"]["reviews"] == [
+        {"text": "Great", "date": "2023-11-01 10:00:00"}
+    ]
+    assert "newest_review" not in payload["raw_data"]
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "zstd"])
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+def test_send_post_request_compresses_large_payloads(
+    mock_post, encoding, analytics_client, token
+):
+    """Test that payloads above the threshold are compressed."""
+    mock_post.return_value = httpx.Response(status.HTTP_200_OK, json={})
+    analytics_client.request_compression = encoding
+    analytics_client.compression_min_bytes = 1024
+    data = {"reviews": [{"text": "Great product"}] * 200}
+
+    async def send():
+        await analytics_client.send_post_request(token, "http://analytics", data)
+        await analytics_client.send_post_request(token, "http://analytics", {"a": 1})
+
+    asyncio.run(send())
+
+    large, small = (call.kwargs for call in mock_post.call_args_list)
+    assert large["headers"]["Content-Encoding"] == encoding
+    if encoding == "gzip":
+        body = gzip.decompress(large["content"])
+    else:
+        body = zstandard.ZstdDecompressor().decompress(large["content"])
+    assert json.loads(body) == data
+    assert "Content-Encoding" not in small["headers"]
+    assert json.loads(small["content"]) == {"a": 1}
+
+
+def _response_model(company_id):
+    return ResponseModel(
+        source_name="producthunt",
+        company_id=company_id,
+        raw_data=ProductInfo(name=company_id),
+    )
+
+
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+def test_raw_data_batcher_flushes_by_size(mock_post, analytics_client, token):
+    """Test that a full batch is flushed without waiting for its max age."""
+    mock_post.return_value = httpx.Response(status.HTTP_200_OK, json={"ok": True})
+
+    async def feed():
+        batcher = analytics_client.raw_data_batcher(token)
+        batcher.batch_size = 2
+        batcher.max_age = 60
+        async with batcher:
+            futures = [
+                await batcher.submit(_response_model(company_id))
+                for company_id in ["c1", "c2"]
+            ]
+            return await asyncio.wait_for(asyncio.gather(*futures), timeout=5)
+
+    results = asyncio.run(feed())
+
+    assert results == [{"ok": True}, {"ok": True}]
+    assert mock_post.call_count == len(results)
+
+
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+def test_raw_data_batcher_flushes_on_close(mock_post, analytics_client, token):
+    """Test that buffered items are delivered when the batcher is closed."""
+    mock_post.return_value = httpx.Response(status.HTTP_200_OK, json={"ok": True})
+
+    async def feed():
+        batcher = analytics_client.raw_data_batcher(token)
+        batcher.max_age = 60
+        async with batcher:
+            future = await batcher.submit(_response_model("c1"))
+        return future.done()
+
+    assert asyncio.run(feed())
+    mock_post.assert_called_once()
+
+
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+def test_raw_data_batcher_reports_failures_per_item(
+    mock_post, analytics_client, token
+):
+    """Test that a failed delivery fails only its own future."""
+
+    async def post(url, content, headers):
+        if json.loads(content)["company_id"] == "bad":
+            raise httpx.ConnectError("connection refused")
+        return httpx.Response(status.HTTP_200_OK, json={"ok": True})
+
+    mock_post.side_effect = post
+
+    async def feed():
+        async with analytics_client.raw_data_batcher(token) as batcher:
+            good = await batcher.submit(_response_model("good"))
+            bad = await batcher.submit(_response_model("bad"))
+        return good.result(), bad.exception()
+
+    good_result, bad_error = asyncio.run(feed())
+
+    assert good_result == {"ok": True}
+    assert isinstance(bad_error, AnalyticsError)
@@ -0,0 +1,195 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from parma_mining.producthunt.http_cache import (
+    CACHE_MAX_AGE_EXTENSION,
+    CACHE_STATUS_HEADER,
+    CachedResponse,
+    CachingTransport,
+    ResponseCache,
+)
+from parma_mining.producthunt.ph_client import ProductHuntClient
+
+URL = "https://www.producthunt.com/products/testproduct"
+BODY = b"<html><h1 class='color-darker-grey'>TestProduct</h1></html>"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl=3600, max_bytes=10**6)
+    yield cache
+    cache.close()
+
+
+class Origin:
+    """Fake origin server that supports ETag revalidation."""
+
+    def __init__(self, body: bytes = BODY, etag: str = '"v1"'):
+        self.body = body
+        self.etag = etag
+        self.requests: list[httpx.Request] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        """Answer a request, with 304 if the client has the current version."""
+        self.requests.append(request)
+        if request.headers.get("If-None-Match") == self.etag:
+            return httpx.Response(304)
+        return httpx.Response(200, headers={"ETag": self.etag}, content=self.body)
+
+
+def get(transport: httpx.AsyncBaseTransport, url: str = URL, **kwargs):
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.get(url, **kwargs)
+
+    return asyncio.run(run())
+
+
+def test_revalidates_with_etag(cache):
+    origin = Origin()
+    transport = CachingTransport(httpx.MockTransport(origin), cache)
+
+    first = get(transport)
+    second = get(transport)
+
+    assert first.headers[CACHE_STATUS_HEADER] == "MISS"
+    assert second.headers[CACHE_STATUS_HEADER] == "REVALIDATED"
+    assert second.content == BODY
+    assert second.status_code == httpx.codes.OK
+    assert origin.requests[1].headers["If-None-Match"] == '"v1"'
+
+
+def test_cache_is_used_off_the_event_loop(cache, mocker):
+    """Test that the cache is read and written outside of the event loop thread."""
+    threads = []
+    for name in ("get", "put", "touch"):
+        method = getattr(cache, name)
+
+        def record(*args, method=method):
+            threads.append(threading.get_ident())
+            return method(*args)
+
+        mocker.patch.object(cache, name, record)
+    transport = CachingTransport(httpx.MockTransport(Origin()), cache)
+
+    get(transport)
+    get(transport)
+
+    assert len(threads) == 4  # noqa: PLR2004
+    assert threading.get_ident() not in threads
+
+
+def test_changed_body_replaces_entry(cache):
+    origin = Origin()
+    transport = CachingTransport(httpx.MockTransport(origin), cache)
+    get(transport)
+
+    origin.body, origin.etag = b"<html>changed</html>", '"v2"'
+    response = get(transport)
+
+    assert response.headers[CACHE_STATUS_HEADER] == "MISS"
+    assert response.content == b"<html>changed</html>"
+    assert cache.get(URL).etag == '"v2"'
+
+
+def test_fresh_entry_is_served_without_request(cache):
+    origin = Origin()
+    transport = CachingTransport(httpx.MockTransport(origin), cache)
+
+    get(transport)
+    response = get(transport, extensions={CACHE_MAX_AGE_EXTENSION: 60})
+
+    assert response.headers[CACHE_STATUS_HEADER] == "HIT"
+    assert len(origin.requests) == 1
+
+
+def test_expired_entries_are_dropped(cache):
+    cache.put(
+        URL,
+        CachedResponse(200, [], BODY, time.time() - 7200),
+    )
+
+    assert cache.get(URL) is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    body = os.urandom(6000)  # incompressible, so the stored size is known
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl=3600, max_bytes=15000)
+    for name in ["a", "b"]:
+        cache.put(name, CachedResponse(200, [], body, time.time()))
+    cache.get("a")
+    cache.put("c", CachedResponse(200, [], body, time.time()))
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+    cache.close()
+
+
+def test_cache_tracks_stored_size(tmp_path):
+    """Test that the size of the stored bodies is kept without rescanning."""
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(path, ttl=3600, max_bytes=15000)
+    body = os.urandom(6000)
+    cache.put("a", CachedResponse(200, [], body, time.time()))
+    cache.put("a", CachedResponse(200, [], body[:3000], time.time()))
+    cache.put("b", CachedResponse(200, [], body, time.time()))
+    cache.put("c", CachedResponse(200, [], body, time.time()))
+    cache.put("old", CachedResponse(200, [], b"", time.time() - 7200))
+    stored = cache.size
+    cache.close()
+
+    reopened = ResponseCache(path, ttl=3600, max_bytes=15000)
+    (total,) = reopened._connection.execute(
+        "SELECT SUM(size) FROM http_responses"
+    ).fetchone()
+    reopened.close()
+
+    assert stored == reopened.size == total <= 15000  # noqa: PLR2004
+
+
+def test_client_serves_repeated_searches_locally(tmp_path):
+    origin = Origin(body=b"<html></html>")
+    with patch.object(
+        ProductHuntClient, "http_cache_path", str(tmp_path / "cache.sqlite")
+    ), patch("httpx.AsyncHTTPTransport", return_value=httpx.MockTransport(origin)):
+        client = ProductHuntClient()
+
+        async def search_twice():
+            await client.search_organizations("TestCompany")
+            await client.search_organizations("TestCompany")
+            await client.aclose()
+
+        asyncio.run(search_twice())
+
+    assert len(origin.requests) == 1
+    with pytest.raises(sqlite3.ProgrammingError):
+        client.response_cache.get(URL)
+
+
+def test_client_skips_parse_of_revalidated_pages(tmp_path):
+    origin = Origin()
+    with patch.object(
+        ProductHuntClient, "http_cache_path", str(tmp_path / "cache.sqlite")
+    ), patch("httpx.AsyncHTTPTransport", return_value=httpx.MockTransport(origin)):
+        client = ProductHuntClient()
+
+        async def scrape_twice():
+            first = await client.scrape_product_page(URL)
+            with patch("parma_mining.producthunt.ph_client._read_page") as read_page:
+                second = await client.scrape_product_page(URL)
+            await client.aclose()
+            return first, second, read_page
+
+        first, second, read_page = asyncio.run(scrape_twice())
+
+    read_page.assert_not_called()
+    assert second == first
+    assert second.name == "TestProduct"
@@ -0,0 +1,230 @@
+import asyncio
+from email.utils import formatdate
+
+import httpx
+import pytest
+
+from parma_mining.producthunt.rate_limiter import (
+    HostLimiter,
+    RateLimitedTransport,
+    RateLimiter,
+    TokenBucket,
+    parse_retry_after,
+)
+
+URL = "https://www.producthunt.com/products/testproduct"
+MAX_RETRIES = 3
+
+
+def limiter(**limits) -> RateLimiter:
+    return RateLimiter(
+        **{"rate": 1000, "burst": 1000, "initial_concurrency": 4, **limits}
+    )
+
+
+def transport(handler, rate_limiter: RateLimiter | None = None, **kwargs):
+    return RateLimitedTransport(
+        httpx.MockTransport(handler),
+        rate_limiter or limiter(),
+        **{"max_retries": MAX_RETRIES, "backoff": 0, **kwargs},
+    )
+
+
+async def get(transport: RateLimitedTransport, method: str = "GET"):
+    async with httpx.AsyncClient(transport=transport) as client:
+        return await client.request(method, URL)
+
+
+def test_parse_retry_after():
+    now = 1_700_000_000
+    assert parse_retry_after("5") == 5  # noqa: PLR2004
+    assert parse_retry_after(formatdate(now + 30, usegmt=True), now=now) == 30  # noqa: PLR2004
+    assert parse_retry_after(formatdate(now - 30, usegmt=True), now=now) == 0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_token_bucket_queues_requests_beyond_the_burst(mocker):
+    mocker.patch("parma_mining.producthunt.rate_limiter.time.monotonic", return_value=0)
+    bucket = TokenBucket(rate=2, burst=2)
+
+    delays = [bucket.reserve() for _ in range(4)]
+
+    assert delays == [0, 0, 0.5, 1]
+
+
+def test_host_limiter_adapts_concurrency(mocker):
+    monotonic = mocker.patch(
+        "parma_mining.producthunt.rate_limiter.time.monotonic", return_value=0
+    )
+    host = HostLimiter(
+        rate=100, burst=100, initial_concurrency=8, min_concurrency=1
+    )
+
+    async def run():
+        first = await host.acquire()
+        second = await host.acquire()
+        monotonic.return_value = 1
+        host.release(first, throttled=True)
+        # started before the decrease, part of the same congestion event
+        host.release(second, throttled=True)
+        assert host.limit == 4  # noqa: PLR2004
+
+        monotonic.return_value = 2
+        for _ in range(4):
+            host.release(await host.acquire())
+        assert host.limit == pytest.approx(5, abs=0.1)
+
+    asyncio.run(run())
+
+
+def test_host_limiter_bounds_requests_in_flight():
+    host = HostLimiter(rate=1000, burst=1000, initial_concurrency=2)
+    in_flight = 0
+    max_in_flight = 0
+
+    async def request():
+        nonlocal in_flight, max_in_flight
+        started_at = await host.acquire()
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        host.release(started_at, throttled=True)
+
+    async def run():
+        await asyncio.gather(*(request() for _ in range(6)))
+
+    asyncio.run(run())
+
+    assert max_in_flight == 2  # noqa: PLR2004
+    assert host.in_flight == 0
+
+
+def test_transport_retries_throttled_requests():
+    responses = iter(
+        [
+            httpx.Response(429, headers={"Retry-After": "0"}),
+            httpx.Response(503),
+            httpx.Response(200, text="ok"),
+        ]
+    )
+    rate_limiter = limiter()
+
+    response = asyncio.run(
+        get(transport(lambda request: next(responses), rate_limiter))
+    )
+
+    assert response.status_code == httpx.codes.OK
+    assert rate_limiter.for_host("www.producthunt.com").limit < 4  # noqa: PLR2004
+
+
+def test_transport_throttles_on_server_errors():
+    responses = iter([httpx.Response(500), httpx.Response(200)])
+    rate_limiter = limiter()
+
+    asyncio.run(get(transport(lambda request: next(responses), rate_limiter)))
+
+    assert rate_limiter.for_host("www.producthunt.com").limit < 4  # noqa: PLR2004
+
+
+def test_transport_frees_slots_of_cancelled_requests():
+    """Test that cancelled requests do not keep their host slots."""
+    rate_limiter = limiter(initial_concurrency=2)
+    host = rate_limiter.for_host("www.producthunt.com")
+
+    async def hang(request):
+        await asyncio.sleep(3600)
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport(hang, rate_limiter)) as client:
+            requests = [asyncio.create_task(client.get(URL)) for _ in range(2)]
+            await asyncio.sleep(0.01)
+            assert host.in_flight == 2  # noqa: PLR2004
+            for request in requests:
+                request.cancel()
+            await asyncio.gather(*requests, return_exceptions=True)
+
+        assert (host.in_flight, host.limit) == (0, 2)
+        ok = transport(lambda request: httpx.Response(200), rate_limiter)
+        return await asyncio.wait_for(get(ok), timeout=1)
+
+    response = asyncio.run(run())
+
+    assert response.status_code == httpx.codes.OK
+
+
+def test_transport_honors_retry_after(mocker):
+    clock = [0.0]
+    mocker.patch(
+        "parma_mining.producthunt.rate_limiter.time.monotonic",
+        side_effect=lambda: clock[0],
+    )
+
+    async def sleep(delay):
+        clock[0] += delay
+
+    mocker.patch("parma_mining.producthunt.rate_limiter.asyncio.sleep", new=sleep)
+    sent_at = []
+
+    def handler(request):
+        sent_at.append(clock[0])
+        if len(sent_at) == 1:
+            return httpx.Response(429, headers={"Retry-After": "7"})
+        return httpx.Response(200)
+
+    response = asyncio.run(get(transport(handler)))
+
+    assert response.status_code == httpx.codes.OK
+    assert sent_at == [0, 7]
+
+
+def test_transport_gives_up_on_long_retry_after():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(429, headers={"Retry-After": "3600"})
+
+    response = asyncio.run(get(transport(handler, max_retry_after=60)))
+
+    assert response.status_code == httpx.codes.TOO_MANY_REQUESTS
+    assert len(requests) == 1
+
+
+def test_transport_returns_last_response_after_exhausted_retries():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(503)
+
+    response = asyncio.run(get(transport(handler)))
+
+    assert response.status_code == httpx.codes.SERVICE_UNAVAILABLE
+    assert len(requests) == MAX_RETRIES + 1
+
+
+def test_transport_raises_last_transport_error():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        raise httpx.ConnectError("Mocked Exception", request=request)
+
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(get(transport(handler)))
+    assert len(requests) == MAX_RETRIES + 1
+
+
+def test_transport_does_not_retry_non_idempotent_requests():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(503)
+
+    response = asyncio.run(get(transport(handler), method="POST"))
+
+    assert response.status_code == httpx.codes.SERVICE_UNAVAILABLE
+    assert len(requests) == 1
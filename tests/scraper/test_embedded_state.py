@@ -0,0 +1,52 @@
+from pathlib import Path
+
+from parma_mining.producthunt.embedded_state import (
+    find_product,
+    find_reviews,
+    read_apollo_state,
+)
+from parma_mining.producthunt.ph_client import _read_page
+
+FIXTURES = Path(__file__).resolve().parent.parent / "fixtures"
+
+
+def test_read_apollo_state_from_next_data():
+    state = read_apollo_state((FIXTURES / "next_data_page.html").read_bytes())
+
+    assert state is not None
+    assert state["Product:42"]["name"] == "TestProduct"
+
+
+def test_read_apollo_state_without_next_data():
+    assert read_apollo_state((FIXTURES / "product_page.html").read_bytes()) is None
+
+
+def test_read_apollo_state_with_malformed_json():
+    content = b'<script id="__NEXT_DATA__" type="application/json">{"props":</script>'
+    assert read_apollo_state(content) is None
+
+
+def test_find_product_prefers_slug():
+    state = read_apollo_state((FIXTURES / "next_data_page.html").read_text())
+
+    assert find_product(state, "related")[0] == "Product:7"
+    assert find_product(state, "testproduct")[0] == "Product:42"
+    assert find_product({}, "testproduct") is None
+
+
+def test_find_product_without_matching_slug():
+    """Test that related products are not taken for a missing product."""
+    content = (FIXTURES / "next_data_page.html").read_bytes()
+
+    assert find_product(read_apollo_state(content), "otherproduct") is None
+    page = _read_page(content, "otherproduct")
+    assert page.product_name is None
+    assert page.reviews == []
+
+
+def test_find_reviews_filters_product_and_sorts_newest_first():
+    state = read_apollo_state((FIXTURES / "next_data_page.html").read_bytes())
+
+    reviews = find_reviews(state, "Product:42")
+
+    assert [review["id"] for review in reviews] == ["5", "4", "3"]
@@ -0,0 +1,143 @@
+import asyncio
+import sqlite3
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+from prometheus_client import REGISTRY
+
+from parma_mining.producthunt.parse_memo import ParseMemo, SQLiteMemoStore, page_digest
+from parma_mining.producthunt.ph_client import (
+    ProductHuntClient,
+    _dump_scanned_page,
+    _load_scanned_page,
+    _scan_page,
+)
+
+FIXTURES = Path(__file__).resolve().parent.parent / "fixtures"
+
+
+def lookups(result: str) -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "producthunt_parse_memo_lookups_total", {"result": result}
+        )
+        or 0
+    )
+
+
+def test_memo_counts_hits_and_misses():
+    memo: ParseMemo[str] = ParseMemo(max_entries=2)
+    hits, misses = lookups("hit"), lookups("miss")
+
+    assert memo.get("a") is None
+    memo.put("a", "page a")
+    assert memo.get("a") == "page a"
+
+    assert memo.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 1}
+    assert (lookups("hit") - hits, lookups("miss") - misses) == (1, 1)
+
+
+def test_memo_evicts_least_recently_used():
+    memo: ParseMemo[str] = ParseMemo(max_entries=2)
+    memo.put("a", "page a")
+    memo.put("b", "page b")
+    memo.get("a")
+    memo.put("c", "page c")
+
+    assert memo.get("a") == "page a"
+    assert memo.get("b") is None
+    assert memo.get("c") == "page c"
+
+
+def test_memo_requires_codec_for_backing_store(tmp_path):
+    with pytest.raises(ValueError):
+        ParseMemo(1, SQLiteMemoStore(str(tmp_path / "memo.sqlite")))
+
+
+def test_memo_reads_through_backing_store(tmp_path):
+    path = str(tmp_path / "memo.sqlite")
+    page = _scan_page((FIXTURES / "reviews_page.html").read_bytes())
+    memo = ParseMemo(
+        1, SQLiteMemoStore(path), _dump_scanned_page, _load_scanned_page
+    )
+    memo.put("key", page)
+    memo.close()
+
+    restarted = ParseMemo(
+        1, SQLiteMemoStore(path), _dump_scanned_page, _load_scanned_page
+    )
+    assert restarted.get("key") == page
+    assert restarted.hits == 1
+    restarted.close()
+
+
+def test_memo_uses_backing_store_off_the_event_loop(tmp_path, mocker):
+    """Test that the async lookups access the backing store in worker threads."""
+    store = SQLiteMemoStore(str(tmp_path / "memo.sqlite"))
+    threads = []
+    for name in ("get", "put"):
+        method = getattr(store, name)
+
+        def record(*args, method=method):
+            threads.append(threading.get_ident())
+            return method(*args)
+
+        mocker.patch.object(store, name, record)
+    memo: ParseMemo[str] = ParseMemo(1, store, str.encode, bytes.decode)
+
+    async def run():
+        assert await memo.aget("a") is None
+        await memo.aput("a", "page a")
+        await memo.aput("b", "page b")
+        return await memo.aget("a")
+
+    assert asyncio.run(run()) == "page a"
+    assert len(threads) == 4  # noqa: PLR2004
+    assert threading.get_ident() not in threads
+    assert (memo.hits, memo.misses) == (1, 1)
+    memo.close()
+
+
+def test_client_closes_memo_store(tmp_path):
+    with patch.object(
+        ProductHuntClient, "parse_memo_path", str(tmp_path / "memo.sqlite")
+    ):
+        client = ProductHuntClient()
+    asyncio.run(client.aclose())
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        client.parse_memo.backing_store.get("key")
+
+
+def test_page_digest_depends_on_content_only():
+    assert page_digest(b"<html></html>") == page_digest(b"<html></html>")
+    assert page_digest(b"<html></html>") != page_digest(b"<html> </html>")
+
+
+def test_client_skips_parse_for_identical_content():
+    async def fake_get(self, url, **kwargs):
+        name = "reviews_page.html" if "/reviews" in url else "product_page.html"
+        response = MagicMock()
+        response.content = (FIXTURES / name).read_bytes()
+        return response
+
+    async def scrape_twice(client):
+        first = await client.scrape_product_page(
+            "https://www.producthunt.com/products/testproduct"
+        )
+        with patch("parma_mining.producthunt.ph_client._read_page") as read_page:
+            second = await client.scrape_product_page(
+                "https://www.producthunt.com/products/testproduct"
+            )
+        return first, second, read_page
+
+    with patch("httpx.AsyncClient.get", new=fake_get):
+        client = ProductHuntClient()
+        first, second, read_page = asyncio.run(scrape_twice(client))
+
+    read_page.assert_not_called()
+    assert second == first
+    # only the first product page and the first reviews page were parsed
+    assert client.parse_memo.misses == 2  # noqa: PLR2004
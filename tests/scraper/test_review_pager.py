@@ -0,0 +1,173 @@
+import asyncio
+import json
+from unittest.mock import MagicMock, patch
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+
+from parma_mining.producthunt.ph_client import ProductHuntClient
+from parma_mining.producthunt.watermark_store import Watermark
+
+PRODUCT_URL = "https://www.producthunt.com/products/testproduct"
+PAGE_SIZE = 2
+TOTAL_REVIEWS = 5
+
+
+def review_page(number: int, total: int = TOTAL_REVIEWS) -> bytes:
+    """Build a reviews page with an embedded Apollo state."""
+    first = (number - 1) * PAGE_SIZE
+    state = {
+        "Product:1": {
+            "__typename": "Product",
+            "slug": "testproduct",
+            "name": "TestProduct",
+            "reviewsCount": total,
+        }
+    }
+    for index in range(first, min(first + PAGE_SIZE, total)):
+        state[f"Review:{index}"] = {
+            "__typename": "Review",
+            "id": str(index),
+            "body": f"review {index}",
+            # newer reviews have lower indexes
+            "createdAt": f"2023-11-{28 - index:02d}T10:00:00Z",
+        }
+    blob = json.dumps({"props": {"apolloState": state}})
+    return (
+        f'<html><script id="__NEXT_DATA__" type="application/json">{blob}</script>'
+        "</html>"
+    ).encode()
+
+
+def requested_page(url: str) -> int:
+    return int(parse_qs(urlsplit(url).query).get("page", ["1"])[0])
+
+
+def collect(pager) -> list:
+    async def run():
+        return [review async for review in pager.reviews()]
+
+    return asyncio.run(run())
+
+
+def fake_get_factory(requested: list[int], total: int = TOTAL_REVIEWS):
+    async def fake_get(self, url, **kwargs):
+        number = requested_page(url)
+        requested.append(number)
+        response = MagicMock()
+        response.content = review_page(number, total)
+        return response
+
+    return fake_get
+
+
+def test_pager_follows_all_pages():
+    requested: list[int] = []
+    with patch("httpx.AsyncClient.get", new=fake_get_factory(requested)):
+        pager = ProductHuntClient().review_pager(PRODUCT_URL)
+        reviews = collect(pager)
+
+    assert [review.text for review in reviews] == [
+        f"review {index}" for index in range(TOTAL_REVIEWS)
+    ]
+    assert sorted(requested) == [1, 2, 3]
+    assert pager.total == TOTAL_REVIEWS
+    assert pager.collected == TOTAL_REVIEWS
+
+
+def test_pager_stops_at_max_reviews():
+    requested: list[int] = []
+    with patch("httpx.AsyncClient.get", new=fake_get_factory(requested, total=100)):
+        client = ProductHuntClient()
+        client.max_reviews = 3
+        pager = client.review_pager(PRODUCT_URL)
+        reviews = collect(pager)
+
+    assert len(reviews) == client.max_reviews
+    assert pager.total == 100  # noqa: PLR2004
+    assert pager.collected == client.max_reviews
+
+
+def test_pager_stops_at_max_pages():
+    requested: list[int] = []
+    with patch("httpx.AsyncClient.get", new=fake_get_factory(requested, total=100)):
+        client = ProductHuntClient()
+        client.max_review_pages = 4
+        reviews = collect(client.review_pager(PRODUCT_URL))
+
+    assert max(requested) == client.max_review_pages
+    assert len(reviews) == client.max_review_pages * PAGE_SIZE
+
+
+def test_pager_stops_when_page_has_no_new_reviews():
+    """Test that a repeated page ends paging when no total is reported."""
+    requested: list[int] = []
+
+    async def fake_get(self, url, **kwargs):
+        requested.append(requested_page(url))
+        response = MagicMock()
+        response.content = (
+            b'<div class="flex direction-column" id="review-1">'
+            b'<div class="styles_htmlText__iftLe">same</div></div>'
+        )
+        return response
+
+    with patch("httpx.AsyncClient.get", new=fake_get):
+        pager = ProductHuntClient().review_pager(PRODUCT_URL)
+        reviews = collect(pager)
+
+    assert [review.text for review in reviews] == ["same"]
+    assert pager.total is None
+    # without a total the pages are not read ahead
+    assert requested == [1, 2]
+
+
+def test_pager_ends_at_missing_page_without_total():
+    """Test that a missing page past the first ends paging instead of failing."""
+    requested: list[int] = []
+
+    async def fake_get(self, url, **kwargs):
+        number = requested_page(url)
+        requested.append(number)
+        if number > 1:
+            return httpx.Response(404, request=httpx.Request("GET", url))
+        response = MagicMock()
+        response.content = (
+            b'<div class="flex direction-column" id="review-1">'
+            b'<div class="styles_htmlText__iftLe">only</div></div>'
+        )
+        return response
+
+    with patch("httpx.AsyncClient.get", new=fake_get):
+        reviews = collect(ProductHuntClient().review_pager(PRODUCT_URL))
+
+    assert [review.text for review in reviews] == ["only"]
+    assert requested == [1, 2]
+
+
+def test_scrape_product_page_reports_total_review_count():
+    requested: list[int] = []
+    with patch("httpx.AsyncClient.get", new=fake_get_factory(requested, total=100)):
+        client = ProductHuntClient()
+        client.max_reviews = 4
+        result = asyncio.run(client.scrape_product_page(PRODUCT_URL))
+
+    assert result.review_count == 100  # noqa: PLR2004
+    assert len(result.reviews) == client.max_reviews
+    assert result.reviews[0].to_wire() == {
+        "text": "review 0",
+        "date": "2023-11-28 10:00:00",
+    }
+
+
+def test_pager_stops_at_watermark():
+    """Test that incremental paging stops at the first already seen review."""
+    requested: list[int] = []
+    since = Watermark("3", "2023-11-25 10:00:00")
+    with patch("httpx.AsyncClient.get", new=fake_get_factory(requested, total=100)):
+        pager = ProductHuntClient().review_pager(PRODUCT_URL, since=since)
+        reviews = collect(pager)
+
+    assert [review.id for review in reviews] == ["0", "1", "2"]
+    assert pager.newest.id == "0"
+    assert max(requested) == 2  # noqa: PLR2004
@@ -1,11 +1,26 @@
+import asyncio
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+import httpx
 import pytest
 from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
 
+from parma_mining.mining_common.exceptions import (
+    CrawlingExternalError,
+    CrawlingInternalError,
+)
+from parma_mining.producthunt.api import main
 from parma_mining.producthunt.api.main import app
-from parma_mining.producthunt.model import ProductInfo
-from parma_mining.producthunt.ph_client import ProductHuntClient
+from parma_mining.producthunt.ph_client import (
+    ProductHuntClient,
+    normalize_product_url,
+)
+from parma_mining.producthunt.watermark_store import Watermark
+
+PAGES_PER_PRODUCT = 2
+FIXTURES = Path(__file__).resolve().parent.parent / "fixtures"
 
 
 @pytest.fixture
@@ -19,16 +34,340 @@ def mock_response(content):
     return response
 
 
-def test_scrape_product_page_failure():
-    """Test for a failed request."""
-    with patch("httpx.Client.get", side_effect=Exception("Mocked Exception")):
+def fixture_page(url: str) -> MagicMock:
+    name = "reviews_page.html" if "/reviews" in url else "product_page.html"
+    response = MagicMock()
+    response.content = (FIXTURES / name).read_bytes()
+    return response
+
+
+def test_scrape_product_page_extracts_fixture_pages():
+    """Test extraction of all fields from saved product and review pages."""
+
+    async def fake_get(self, url, **kwargs):
+        return fixture_page(url)
+
+    with patch("httpx.AsyncClient.get", new=fake_get):
         scraper = ProductHuntClient()
-        result = scraper.scrape_product_page(
-            "https://www.producthunt.com/products/testproduct"
+        result = asyncio.run(
+            scraper.scrape_product_page(
+                "https://www.producthunt.com/products/testproduct"
+            )
         )
 
-    assert isinstance(result, ProductInfo)
-    assert result.name is None
+    assert result.name == "TestProduct"
+    assert result.overall_rating == 4.8  # noqa: PLR2004
+    assert result.followers == 12500  # noqa: PLR2004
+    assert result.review_count == len(result.reviews) == 30  # noqa: PLR2004
+    assert result.reviews[0].to_wire() == {
+        "text": (
+            "Workflow design team great integration integration useful team team "
+            "clean team simple product product love support integration simple "
+            "great."
+        ),
+        "date": "2023-11-01 10:00:00",
+    }
+
+
+def test_scrape_product_page_prefers_embedded_state():
+    """Test that the embedded Next.js state is used instead of the DOM."""
+
+    async def fake_get(self, url, **kwargs):
+        response = MagicMock()
+        response.content = (FIXTURES / "next_data_page.html").read_bytes()
+        return response
+
+    with patch("httpx.AsyncClient.get", new=fake_get), patch(
+        "parma_mining.producthunt.ph_client._scan_page"
+    ) as mock_scan_page:
+        scraper = ProductHuntClient()
+        result = asyncio.run(
+            scraper.scrape_product_page(
+                "https://www.producthunt.com/products/testproduct"
+            )
+        )
+
+    mock_scan_page.assert_not_called()
+    assert result.name == "TestProduct"
+    assert result.overall_rating == 4.8  # noqa: PLR2004
+    assert result.followers == 12500  # noqa: PLR2004
+    assert [review.text for review in result.reviews] == [
+        "Newest review.",
+        "Middle review.",
+        "Older review.",
+    ]
+    assert result.reviews[0].date == "2023-11-20 09:30:00"
+
+
+def test_scrape_product_page_without_rating():
+    """Test that a missing rating does not discard the other fields."""
+
+    async def fake_get(self, url, **kwargs):
+        if "/reviews" in url:
+            return mock_response("<html><body></body></html>")
+        return fixture_page(url)
+
+    with patch("httpx.AsyncClient.get", new=fake_get):
+        scraper = ProductHuntClient()
+        result = asyncio.run(
+            scraper.scrape_product_page(
+                "https://www.producthunt.com/products/testproduct"
+            )
+        )
+
+    assert result.name == "TestProduct"
     assert result.overall_rating is None
-    assert result.followers == 0
-    assert len(result.reviews) == 0
+    assert result.review_count == 0
+
+
+def test_incremental_scrape_reports_total_review_count():
+    """Test that an incremental scrape reports the total, not the new reviews."""
+
+    async def fake_get(self, url, **kwargs):
+        return fixture_page(url)
+
+    with patch("httpx.AsyncClient.get", new=fake_get):
+        result = asyncio.run(
+            ProductHuntClient().scrape_product_page(
+                "https://www.producthunt.com/products/testproduct",
+                since=Watermark("1002", None),
+            )
+        )
+
+    assert len(result.reviews) == 2  # noqa: PLR2004
+    assert result.review_count == 30  # noqa: PLR2004
+
+
+def test_incremental_scrape_without_total_leaves_review_count_empty():
+    """Test that the number of new reviews is not taken for the review count."""
+    review = (
+        '<div class="flex direction-column" id="review-{}">'
+        '<div class="styles_htmlText__iftLe">review {}</div></div>'
+    )
+
+    async def fake_get(self, url, **kwargs):
+        if "/reviews" in url:
+            return mock_response("".join(review.format(i, i) for i in range(3)))
+        return fixture_page(url)
+
+    with patch("httpx.AsyncClient.get", new=fake_get):
+        scraper = ProductHuntClient()
+        url = "https://www.producthunt.com/products/testproduct"
+        full = asyncio.run(scraper.scrape_product_page(url))
+        new = asyncio.run(scraper.scrape_product_page(url, since=Watermark("2", None)))
+
+    assert full.review_count == 3  # noqa: PLR2004
+    assert len(new.reviews) == 2  # noqa: PLR2004
+    assert new.review_count is None
+
+
+def test_scrape_product_page_failure():
+    """Test that a failed request is reported instead of returning empty data."""
+    with patch(
+        "httpx.AsyncClient.get", side_effect=httpx.ConnectError("Mocked Exception")
+    ):
+        scraper = ProductHuntClient()
+        with pytest.raises(CrawlingExternalError):
+            asyncio.run(
+                scraper.scrape_product_page(
+                    "https://www.producthunt.com/products/testproduct"
+                )
+            )
+
+
+def test_scrape_product_page_error_status():
+    """Test that an error status left after the retries is reported."""
+    request = httpx.Request("GET", "https://www.producthunt.com/products/testproduct")
+
+    async def fake_get(self, url, **kwargs):
+        return httpx.Response(429, request=request)
+
+    with patch("httpx.AsyncClient.get", new=fake_get):
+        scraper = ProductHuntClient()
+        with pytest.raises(CrawlingExternalError):
+            asyncio.run(scraper.scrape_product_page(str(request.url)))
+
+
+def test_scrape_product_page_processing_failure():
+    """Test that a failure to process a page is reported as internal error."""
+
+    async def fake_get(self, url, **kwargs):
+        return fixture_page(url)
+
+    with patch("httpx.AsyncClient.get", new=fake_get), patch(
+        "parma_mining.producthunt.ph_client._read_page",
+        side_effect=ValueError("Mocked Exception"),
+    ):
+        scraper = ProductHuntClient()
+        with pytest.raises(CrawlingInternalError):
+            asyncio.run(
+                scraper.scrape_product_page(
+                    "https://www.producthunt.com/products/testproduct"
+                )
+            )
+
+
+def test_scrape_product_page_fetches_pages_concurrently():
+    """Test that product and review pages are requested in parallel."""
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fake_get(self, url, **kwargs):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return mock_response("<html></html>")
+
+    with patch("httpx.AsyncClient.get", new=fake_get):
+        scraper = ProductHuntClient()
+        asyncio.run(
+            scraper.scrape_product_page(
+                "https://www.producthunt.com/products/testproduct"
+            )
+        )
+
+    assert max_in_flight == PAGES_PER_PRODUCT
+
+
+def test_scrape_product_page_coalesces_equivalent_urls():
+    """Test that concurrent scrapes of one product share its fetches."""
+    fetched = []
+
+    async def fake_get(self, url, **kwargs):
+        fetched.append(url)
+        await asyncio.sleep(0.01)
+        return fixture_page(url)
+
+    async def scrape(scraper):
+        return await asyncio.gather(
+            scraper.scrape_product_page(
+                "https://www.producthunt.com/products/testproduct"
+            ),
+            scraper.scrape_product_page(
+                "https://www.producthunt.com/products/TestProduct/?ref=search"
+            ),
+            scraper.scrape_product_page(
+                "https://www.producthunt.com/products/testproduct",
+                since=Watermark("1", None),
+            ),
+        )
+
+    with patch("httpx.AsyncClient.get", new=fake_get):
+        first, second, incremental = asyncio.run(scrape(ProductHuntClient()))
+
+    assert first is second
+    assert incremental is not first
+    # one product page for the shared scrape and one for the incremental scrape
+    assert fetched.count("https://www.producthunt.com/products/testproduct") == 2  # noqa: PLR2004
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "https://www.producthunt.com/products/acme",
+        "https://www.producthunt.com/products/acme/",
+        "HTTPS://WWW.ProductHunt.com/products/Acme",
+        "https://www.producthunt.com/products/acme?ref=search#reviews",
+    ],
+)
+def test_normalize_product_url(url):
+    assert normalize_product_url(url) == "https://www.producthunt.com/products/acme"
+
+
+def test_client_reuses_pooled_session():
+    """Test that consecutive requests share one HTTP session."""
+    sessions = []
+
+    async def fake_get(self, url, **kwargs):
+        sessions.append(self)
+        return mock_response("<html></html>")
+
+    async def crawl(scraper):
+        await scraper.open()
+        await scraper.scrape_product_page("https://www.producthunt.com/products/a")
+        await scraper.search_organizations("a")
+        session = scraper.client
+        await scraper.aclose()
+        return session
+
+    with patch("httpx.AsyncClient.get", new=fake_get):
+        scraper = ProductHuntClient()
+        session = asyncio.run(crawl(scraper))
+
+    assert all(s is session for s in sessions)
+    assert session.is_closed
+
+
+def test_app_lifespan_manages_session():
+    """Test that the app lifespan opens and closes the shared session."""
+    with TestClient(main.app):
+        session = main.producthunt_scraper._client
+        assert session is not None
+        assert not session.is_closed
+
+    assert session.is_closed
+    assert main.producthunt_scraper._client is None
+
+
+def test_scrape_product_page_records_metrics():
+    """Test that fetches, downloaded bytes and scraped products are counted."""
+
+    def sample(name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def fetches():
+        return sample("producthunt_fetch_seconds_count", target="reviews_page")
+
+    def downloaded_bytes():
+        return sample("producthunt_downloaded_bytes_total", target="product_page")
+
+    def products():
+        return sample("producthunt_scraped_products_total")
+
+    async def fake_get(self, url, **kwargs):
+        return fixture_page(url)
+
+    before = fetches(), downloaded_bytes(), products()
+    with patch("httpx.AsyncClient.get", new=fake_get):
+        asyncio.run(
+            ProductHuntClient().scrape_product_page(
+                "https://www.producthunt.com/products/testproduct"
+            )
+        )
+
+    page_size = len((FIXTURES / "product_page.html").read_bytes())
+    assert fetches() > before[0]
+    assert downloaded_bytes() == before[1] + page_size
+    assert products() == before[2] + 1
+
+
+def test_scrape_product_page_parses_in_process_pool():
+    """Test that pages are read in the parse process pool once it is open."""
+
+    async def fake_get(self, url, **kwargs):
+        return fixture_page(url)
+
+    async def scrape():
+        scraper = ProductHuntClient()
+        scraper.parse_workers = 1
+        await scraper.open()
+        try:
+            assert scraper.parse_executor is not None
+            return await scraper.scrape_product_page(
+                "https://www.producthunt.com/products/testproduct"
+            )
+        finally:
+            await scraper.aclose()
+            assert scraper.parse_executor is None
+
+    with patch("httpx.AsyncClient.get", new=fake_get), patch(
+        "parma_mining.producthunt.ph_client._scan_page",
+        side_effect=AssertionError("parsed in the event loop"),
+    ):
+        result = asyncio.run(scrape())
+
+    assert result.name == "TestProduct"
+    assert result.followers == 12500  # noqa: PLR2004
+    assert result.review_count == len(result.reviews) == 30  # noqa: PLR2004
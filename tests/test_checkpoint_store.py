@@ -0,0 +1,74 @@
+import pytest
+
+from parma_mining.producthunt.checkpoint_store import (
+    InMemoryCheckpointStore,
+    SQLiteCheckpointStore,
+    TaskCheckpoint,
+)
+
+REQUEST = '{"task_id": 1, "companies": {}}'
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        store = InMemoryCheckpointStore()
+    else:
+        store = SQLiteCheckpointStore(str(tmp_path / "checkpoints.sqlite"))
+    yield store
+    store.close()
+
+
+def test_store_tracks_unfinished_tasks(store):
+    store.start_task(1, REQUEST, "token")
+    store.mark_fed(1, "c1", "https://www.producthunt.com/products/a")
+    store.mark_fed(1, "c1", "https://www.producthunt.com/products/a")
+
+    assert store.unfinished_tasks() == [TaskCheckpoint(1, REQUEST, "token")]
+    assert store.fed_handles(1) == {("c1", "https://www.producthunt.com/products/a")}
+    assert store.fed_handles(2) == set()
+
+
+def test_store_keeps_fed_handles_when_task_is_restarted(store):
+    store.start_task(1, REQUEST, "token")
+    store.mark_fed(1, "c1", "a")
+    store.start_task(1, REQUEST, "new-token")
+
+    assert store.unfinished_tasks() == [
+        TaskCheckpoint(1, REQUEST, "new-token", attempts=2)
+    ]
+    assert store.fed_handles(1) == {("c1", "a")}
+
+
+def test_store_forgets_finished_tasks(store):
+    store.start_task(1, REQUEST, "token")
+    store.mark_fed(1, "c1", "a")
+    store.finish_task(1)
+
+    assert store.unfinished_tasks() == []
+    assert store.fed_handles(1) == set()
+
+
+def test_store_expires_tasks(store):
+    store.start_task(1, REQUEST, "token", expires_at=100)
+    store.mark_fed(1, "c1", "a")
+    store.start_task(2, REQUEST, "token", expires_at=200)
+    store.start_task(3, REQUEST, "token")
+
+    assert store.expire_tasks(now=50) == []
+    assert store.expire_tasks(now=150) == [1]
+    assert [task.task_id for task in store.unfinished_tasks()] == [2, 3]
+    assert store.fed_handles(1) == set()
+
+
+def test_sqlite_store_survives_restart(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite")
+    store = SQLiteCheckpointStore(path)
+    store.start_task(1, REQUEST, "token")
+    store.mark_fed(1, "c1", "a")
+    store.close()
+
+    reopened = SQLiteCheckpointStore(path)
+    assert reopened.unfinished_tasks() == [TaskCheckpoint(1, REQUEST, "token")]
+    assert reopened.fed_handles(1) == {("c1", "a")}
+    reopened.close()
@@ -1,11 +1,36 @@
+import os
+import time
 from unittest.mock import patch
 
 import pytest
+from jose import jwt
 from jose.exceptions import ExpiredSignatureError, JWTError
 
 from parma_mining.mining_common.jwt_handler import JWTHandler
 
 
+@pytest.fixture(autouse=True)
+def clear_jwt_cache():
+    JWTHandler.clear_cache()
+    yield
+    JWTHandler.clear_cache()
+
+
+@pytest.fixture
+def rotate_back():
+    secret_key = JWTHandler.SHARED_SECRET_KEY
+    previous_keys = JWTHandler.PREVIOUS_SECRET_KEYS
+    expire_at = JWTHandler._previous_keys_expire_at
+    yield
+    JWTHandler.rotate_keys(
+        secret_key, previous_keys, previous_keys_expire_at=expire_at
+    )
+
+
+def make_token(key: str = JWTHandler.SHARED_SECRET_KEY, **claims) -> str:
+    return jwt.encode(claims, key, algorithm=JWTHandler.ALGORITHM)
+
+
 @pytest.fixture
 def valid_jwt():
     return "valid.jwt.token"
@@ -43,3 +68,140 @@ def test_verify_jwt_with_invalid_token(invalid_jwt):
         mock_decode.assert_called_once_with(
             invalid_jwt, JWTHandler.SHARED_SECRET_KEY, algorithms=[JWTHandler.ALGORITHM]
         )
+
+
+def test_verify_jwt_caches_verified_tokens():
+    token = make_token(exp=int(time.time()) + 3600)
+    with patch("jose.jwt.decode", wraps=jwt.decode) as mock_decode:
+        assert JWTHandler.verify_jwt(token) is True
+        assert JWTHandler.verify_jwt(token) is True
+
+    mock_decode.assert_called_once()
+
+
+def test_verify_jwt_does_not_cache_invalid_tokens():
+    token = make_token("another key")
+    with patch("jose.jwt.decode", wraps=jwt.decode) as mock_decode:
+        assert JWTHandler.verify_jwt(token) is False
+        assert JWTHandler.verify_jwt(token) is False
+
+    assert mock_decode.call_count == 2  # noqa: PLR2004
+
+
+def test_verify_jwt_rejects_cached_token_after_expiry():
+    now = time.time()
+    token = make_token(exp=int(now) + 60)
+    assert JWTHandler.verify_jwt(token) is True
+
+    with patch(
+        "parma_mining.mining_common.jwt_handler.time.time", return_value=now + 120
+    ), patch("jose.jwt.decode") as mock_decode:
+        assert JWTHandler.verify_jwt(token) is False
+    mock_decode.assert_not_called()
+
+
+def test_verify_jwt_reverifies_after_cache_max_age():
+    now = time.time()
+    token = make_token()
+    assert JWTHandler.verify_jwt(token) is True
+
+    with patch(
+        "parma_mining.mining_common.jwt_handler.time.time",
+        return_value=now + JWTHandler.CACHE_MAX_AGE + 1,
+    ), patch("jose.jwt.decode", return_value={}) as mock_decode:
+        assert JWTHandler.verify_jwt(token) is True
+    mock_decode.assert_called_once()
+
+
+def test_rotate_keys_accepts_previous_key(rotate_back):
+    old_token = make_token()
+    assert JWTHandler.verify_jwt(old_token) is True
+
+    JWTHandler.rotate_keys("new key")
+
+    assert JWTHandler.verify_jwt(make_token("new key")) is True
+    assert JWTHandler.verify_jwt(old_token) is True
+
+    JWTHandler.rotate_keys("newest key", previous_keys=[])
+
+    assert JWTHandler.verify_jwt(old_token) is False
+    assert JWTHandler.verify_jwt(make_token("new key")) is False
+
+
+def test_rotate_keys_rejects_previous_key_after_ttl(rotate_back):
+    old_token = make_token()
+    assert JWTHandler.verify_jwt(old_token) is True
+
+    JWTHandler.rotate_keys("new key", previous_keys_ttl=60)
+    now = time.time()
+
+    # the verification with the previous key is cached within the grace period
+    assert JWTHandler.verify_jwt(old_token) is True
+    with patch(
+        "parma_mining.mining_common.jwt_handler.time.time", return_value=now + 120
+    ):
+        assert JWTHandler.verify_jwt(old_token) is False
+        assert JWTHandler.verify_jwt(make_token("new key")) is True
+
+
+def test_rotate_keys_defaults_to_configured_ttl(mocker, rotate_back):
+    mocker.patch.object(JWTHandler, "PREVIOUS_KEYS_TTL", 0)
+    old_token = make_token()
+
+    JWTHandler.rotate_keys("new key")
+
+    assert JWTHandler.verify_jwt(old_token) is False
+
+
+def test_verify_jwt_accepts_configured_previous_keys_until_expiry(mocker):
+    now = time.time()
+    mocker.patch.object(JWTHandler, "PREVIOUS_SECRET_KEYS", ["old key"])
+    mocker.patch.object(JWTHandler, "_previous_keys_expire_at", now + 60)
+    old_token = make_token("old key")
+
+    assert JWTHandler.verify_jwt(old_token) is True
+    JWTHandler.clear_cache()
+    with patch(
+        "parma_mining.mining_common.jwt_handler.time.time", return_value=now + 120
+    ):
+        assert JWTHandler.verify_jwt(old_token) is False
+
+
+def test_key_file_keeps_expiry_of_configured_previous_keys(
+    tmp_path, mocker, rotate_back
+):
+    """Test that loading the key file on start does not extend the grace period."""
+    key_file = tmp_path / "secret"
+    key_file.write_text("file key")
+    mocker.patch.object(JWTHandler, "SHARED_SECRET_KEY_FILE", str(key_file))
+    mocker.patch.object(JWTHandler, "KEY_FILE_CHECK_INTERVAL", 0)
+    mocker.patch.object(JWTHandler, "_key_file_mtime", None)
+    mocker.patch.object(JWTHandler, "PREVIOUS_SECRET_KEYS", ["old key"])
+    mocker.patch.object(JWTHandler, "_previous_keys_expire_at", time.time() - 1)
+
+    assert JWTHandler.verify_jwt(make_token("file key")) is True
+    assert JWTHandler.verify_jwt(make_token("old key")) is False
+
+
+def test_verify_jwt_reloads_rotated_key_file(tmp_path, mocker, rotate_back):
+    key_file = tmp_path / "secret"
+    key_file.write_text("file key\n")
+    mocker.patch.object(JWTHandler, "SHARED_SECRET_KEY_FILE", str(key_file))
+    mocker.patch.object(JWTHandler, "KEY_FILE_CHECK_INTERVAL", 0)
+    mocker.patch.object(JWTHandler, "_key_file_mtime", None)
+
+    assert JWTHandler.verify_jwt(make_token("file key")) is True
+    assert JWTHandler.verify_jwt(make_token()) is False
+
+    key_file.write_text("rotated key")
+    os.utime(key_file, (time.time() + 10, time.time() + 10))
+
+    assert JWTHandler.verify_jwt(make_token("rotated key")) is True
+    # the replaced key is accepted while the new key rolls out
+    assert JWTHandler.verify_jwt(make_token("file key")) is True
+
+
+def test_token_expiry():
+    assert JWTHandler.token_expiry(make_token(exp=1700000000)) == 1700000000  # noqa: PLR2004
+    assert JWTHandler.token_expiry(make_token(sub="user")) is None
+    assert JWTHandler.token_expiry("no.jwt") is None
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import sqlite3
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from parma_mining.producthunt.metrics import PRODUCT_PAGE, REVIEWS_PAGE
+from parma_mining.producthunt.page_archive import ArchivedCrawl, PageArchive
+from parma_mining.producthunt.ph_client import ProductHuntClient
+from parma_mining.producthunt.reextract import archived_products, reextract
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+PRODUCT_URLS = [
+    "https://www.producthunt.com/products/otherproduct",
+    "https://www.producthunt.com/products/testproduct",
+]
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = PageArchive(str(tmp_path / "archive"))
+    yield archive
+    archive.close()
+
+
+def test_page_archive_stores_content_once(archive):
+    """Test that unchanged pages share one object and every fetch is indexed."""
+    url = PRODUCT_URLS[1]
+    crawls = [ArchivedCrawl(str(n), url, started_at=n) for n in (1, 2, 3)]
+    first = archive.store(crawls[0], url, b"<html>v1</html>", PRODUCT_PAGE, 1)
+    second = archive.store(crawls[1], url, b"<html>v1</html>", PRODUCT_PAGE, 2)
+    changed = archive.store(crawls[2], url, b"<html>v2</html>", PRODUCT_PAGE, 3)
+
+    assert first == second != changed
+    assert len(list(archive.objects.rglob("*.*"))) == 2  # noqa: PLR2004
+    assert archive.load(first) == b"<html>v1</html>"
+    assert [page.fetched_at for page in archive.history(url)] == [1, 2, 3]
+    assert [crawl for crawl, _ in archive.crawls()] == crawls[::-1]
+    assert [crawl for crawl, _ in archive.crawls(until=2)] == crawls[1::-1]
+
+
+def test_archived_products_groups_review_pages(archive):
+    """Test that reviews pages are ordered by page number under their product."""
+    url = PRODUCT_URLS[1]
+    crawl = ArchivedCrawl("1", url, started_at=1)
+    product = archive.store(crawl, url, b"product", PRODUCT_PAGE, 1)
+    page_2 = archive.store(
+        crawl, url + "/reviews?order=LATEST&page=2", b"page 2", REVIEWS_PAGE, 3
+    )
+    page_1 = archive.store(
+        crawl, url + "/reviews?order=LATEST", b"page 1", REVIEWS_PAGE, 2
+    )
+    # without its first reviews page a product can not be extracted
+    other = ArchivedCrawl("2", PRODUCT_URLS[0], started_at=1)
+    archive.store(other, PRODUCT_URLS[0], b"other", PRODUCT_PAGE, 1)
+
+    assert [tuple(product) for product in archived_products(archive)] == [
+        (url, 1, False, product, [page_1, page_2])
+    ]
+
+
+def test_archived_products_reads_one_crawl(archive):
+    """Test that an incremental crawl is not mixed with pages of older crawls."""
+    url = PRODUCT_URLS[1]
+    full = ArchivedCrawl("1", url, started_at=1)
+    archive.store(full, url, b"product", PRODUCT_PAGE, 1)
+    archive.store(full, url + "/reviews?order=LATEST", b"old 1", REVIEWS_PAGE, 2)
+    archive.store(
+        full, url + "/reviews?order=LATEST&page=2", b"old 2", REVIEWS_PAGE, 3
+    )
+    incremental = ArchivedCrawl("2", url, started_at=10, incremental=True)
+    product = archive.store(incremental, url, b"product", PRODUCT_PAGE, 10)
+    page_1 = archive.store(
+        incremental, url + "/reviews?order=LATEST", b"new 1", REVIEWS_PAGE, 11
+    )
+    # a crawl that failed before its first reviews page is skipped
+    failed = ArchivedCrawl("3", url, started_at=20)
+    archive.store(failed, url, b"product", PRODUCT_PAGE, 20)
+
+    assert [tuple(product) for product in archived_products(archive)] == [
+        (url, 10, True, product, [page_1])
+    ]
+    assert archived_products(archive, until=5)[0].crawled_at == 1
+
+
+def _crawl(path: Path) -> dict:
+    async def fake_get(self, url, **kwargs):
+        name = "reviews_page.html" if "/reviews" in url else "product_page.html"
+        response = MagicMock()
+        response.content = (FIXTURES / name).read_bytes()
+        return response
+
+    async def scrape_all(scraper):
+        return await asyncio.gather(
+            *(scraper.scrape_product_page(url) for url in PRODUCT_URLS)
+        )
+
+    with patch("httpx.AsyncClient.get", new=fake_get), patch.object(
+        ProductHuntClient, "page_archive_path", str(path)
+    ):
+        scraper = ProductHuntClient()
+        products = asyncio.run(scrape_all(scraper))
+        asyncio.run(scraper.aclose())
+    return dict(zip(PRODUCT_URLS, products, strict=True))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_reextract_matches_crawled_products(tmp_path, workers):
+    """Test that archived pages are extracted to the products that were crawled."""
+    path = tmp_path / "archive"
+    crawled = _crawl(path)
+
+    reextracted = list(reextract(str(path), workers=workers))
+
+    assert [product.url for product, _ in reextracted] == PRODUCT_URLS
+    for product, info in reextracted:
+        assert info.model_dump() == crawled[product.url].model_dump()
+        assert info.newest_review == crawled[product.url].newest_review
+
+
+def test_aclose_closes_page_archive(tmp_path):
+    """Test that closing the client closes the archive index."""
+    with patch.object(ProductHuntClient, "page_archive_path", str(tmp_path)):
+        scraper = ProductHuntClient()
+    asyncio.run(scraper.aclose())
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        list(scraper.page_archive.crawls())
+
+
+def test_reextract_command_writes_ndjson(tmp_path):
+    """Test that the command line writes one product per line."""
+    typer_testing = pytest.importorskip("typer.testing")
+    cli = pytest.importorskip("parma_mining.producthunt.cli")
+
+    path = tmp_path / "archive"
+    crawled = _crawl(path)
+    output = tmp_path / "products.ndjson"
+
+    result = typer_testing.CliRunner().invoke(
+        cli.app, ["reextract", str(path), "--output", str(output), "--workers", "1"]
+    )
+
+    assert result.exit_code == 0, result.output
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [line["url"] for line in lines] == PRODUCT_URLS
+    assert lines[1]["product"] == crawled[PRODUCT_URLS[1]].model_dump(mode="json")
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from parma_mining.producthunt.model import ProductInfo, ResponseModel, Review
+from parma_mining.producthunt.ph_client import ScannedReview, _extract_review
+from parma_mining.producthunt.text_pool import TextPool
+
+
+def test_review_is_compact():
+    """Test that reviews carry no instance dict."""
+    review = Review.from_date("1", "Great", "2023-11-01T10:00:00.000Z")
+
+    assert not hasattr(review, "__dict__")
+    assert isinstance(review.timestamp, int)
+
+
+@pytest.mark.parametrize(
+    "date, expected",
+    [
+        ("2023-11-01T10:00:00.000Z", "2023-11-01 10:00:00"),
+        ("2023-11-01T10:00:00.123+05:30", "2023-11-01 10:00:00"),
+        ("2023-11-01 10:00:00", "2023-11-01 10:00:00"),
+        (None, None),
+    ],
+)
+def test_review_keeps_wall_clock_date(date, expected):
+    assert Review.from_date(None, "text", date).date == expected
+
+
+def test_reviews_are_serialized_to_wire_format():
+    """Test that reviews are converted to dicts only when the data is sent."""
+    review = Review.from_date("42", "Great", "2023-11-01T10:00:00Z")
+    data = ResponseModel(
+        source_name="producthunt",
+        company_id="c1",
+        raw_data=ProductInfo(reviews=[review], newest_review=review),
+    )
+
+    assert data.raw_data.reviews[0] is review
+    payload = json.loads(data.model_dump_json())
+    assert payload["raw_data"]["reviews"] == [
+        {"text": "Great", "date": "2023-11-01 10:00:00"}
+    ]
+    assert data.model_dump()["raw_data"]["reviews"] == payload["raw_data"]["reviews"]
+
+
+def test_extracted_review_texts_are_pooled():
+    """Test that equal short texts share one object and long texts are kept."""
+    texts = TextPool(max_entries=10, max_length=20)
+    # built at runtime, so the texts are distinct objects before pooling
+    parts = ["Great ", "product!"]
+    long = "x" * 21
+
+    first = _extract_review(ScannedReview("1", "".join(parts), None), texts)
+    second = _extract_review(ScannedReview("2", "".join(parts), None), texts)
+    _extract_review(ScannedReview("3", long, None), texts)
+
+    assert first.text is second.text
+    assert len(texts) == 1
+
+
+def test_text_pool_is_bounded():
+    texts = TextPool(max_entries=2)
+    for text in ["a", "b", "c"]:
+        texts.intern(text)
+
+    assert len(texts) == 1
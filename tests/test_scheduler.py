@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+
+from parma_mining.producthunt.scheduler import FAILED, FINISHED, JobScheduler
+
+JOBS_PER_TASK = 3
+
+
+def test_scheduler_interleaves_tasks_fairly():
+    """Test that free workers are handed to the waiting tasks in turn."""
+    scheduler = JobScheduler(max_workers=1)
+    order = []
+
+    def crawl(task_id):
+        async def job(number):
+            order.append((task_id, number))
+            await asyncio.sleep(0)
+
+        async def run(task):
+            await asyncio.gather(
+                *(
+                    scheduler.run_job(task.task_id, lambda n=n: job(n))
+                    for n in range(JOBS_PER_TASK)
+                )
+            )
+
+        return run
+
+    async def run():
+        first = scheduler.submit(1, crawl(1), total=JOBS_PER_TASK)
+        second = scheduler.submit(2, crawl(2), total=JOBS_PER_TASK)
+        while scheduler._runners:
+            await asyncio.sleep(0.001)
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert [task_id for task_id, _ in order] == [1, 2, 1, 2, 1, 2]
+    assert first.status == second.status == FINISHED
+    assert first.completed == second.completed == JOBS_PER_TASK
+
+
+def test_scheduler_bounds_workers():
+    """Test that no more than max_workers jobs run at the same time."""
+    scheduler = JobScheduler(max_workers=2)
+    in_flight = 0
+    max_in_flight = 0
+
+    async def job():
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    async def crawl(task):
+        await asyncio.gather(*(scheduler.run_job(task.task_id, job) for _ in range(5)))
+
+    async def run():
+        scheduler.submit(1, crawl)
+        scheduler.submit(2, crawl)
+        while scheduler._runners:
+            await asyncio.sleep(0.001)
+
+    asyncio.run(run())
+
+    assert max_in_flight == 2  # noqa: PLR2004
+
+
+def test_scheduler_counts_failed_jobs_and_tasks():
+    """Test that failed jobs and failed tasks are reported in the progress."""
+    scheduler = JobScheduler(max_workers=2)
+
+    async def failing_job():
+        raise ValueError("Mocked Exception")
+
+    async def crawl(task):
+        with pytest.raises(ValueError):
+            await scheduler.run_job(task.task_id, failing_job)
+        raise RuntimeError("Mocked Exception")
+
+    async def run():
+        task = scheduler.submit(1, crawl)
+        while scheduler._runners:
+            await asyncio.sleep(0.001)
+        return task
+
+    task = asyncio.run(run())
+
+    assert task.failed == 1
+    assert task.status == FAILED
+    assert task.finished_at is not None
+
+
+def test_scheduler_returns_running_task_on_resubmission():
+    """Test that a running task is not started twice."""
+    scheduler = JobScheduler(max_workers=1)
+    started = 0
+
+    async def crawl(task):
+        nonlocal started
+        started += 1
+        await asyncio.sleep(0.01)
+
+    async def run():
+        first = scheduler.submit(1, crawl)
+        second = scheduler.submit(1, crawl)
+        await scheduler.shutdown()
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first is second
+    assert started <= 1
+
+
+def test_scheduler_counts_cancelled_waiting_jobs_as_failed():
+    """Test that jobs cancelled before they got a worker count as failed."""
+    scheduler = JobScheduler(max_workers=1)
+
+    async def run(task):
+        jobs = [
+            asyncio.create_task(
+                scheduler.run_job(task.task_id, lambda: asyncio.sleep(10))
+            )
+            for _ in range(JOBS_PER_TASK)
+        ]
+        await asyncio.sleep(0.01)
+        for job in jobs:
+            job.cancel()
+        await asyncio.gather(*jobs, return_exceptions=True)
+
+    async def main():
+        progress = scheduler.submit(1, run, total=JOBS_PER_TASK)
+        while scheduler._runners:
+            await asyncio.sleep(0.001)
+        return progress
+
+    progress = asyncio.run(main())
+
+    assert progress.failed == JOBS_PER_TASK
+    assert scheduler._busy == 0
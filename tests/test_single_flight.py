@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from parma_mining.producthunt.single_flight import SingleFlight
+
+
+def test_single_flight_shares_concurrent_calls():
+    """Test that concurrent callers of a key share one call."""
+    flights: SingleFlight[str, int] = SingleFlight()
+    calls = []
+
+    async def call(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def run():
+        results = await asyncio.gather(
+            flights.do("a", lambda: call("a")),
+            flights.do("a", lambda: call("a")),
+            flights.do("b", lambda: call("b")),
+        )
+        assert not flights.in_flight("a")
+        later = await flights.do("a", lambda: call("a"))
+        return results, later
+
+    results, later = asyncio.run(run())
+
+    assert results[0] == results[1]
+    assert calls == ["a", "b", "a"]
+    assert later == len(calls)
+
+
+def test_single_flight_shares_errors():
+    """Test that every caller receives the error of the shared call."""
+    flights: SingleFlight[str, int] = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(
+            flights.do("a", fail), flights.do("a", fail), return_exceptions=True
+        )
+
+    errors = asyncio.run(run())
+
+    assert all(isinstance(error, ValueError) for error in errors)
+
+
+def test_single_flight_cancels_call_without_waiters():
+    """Test that the call survives one cancelled caller but not all of them."""
+    flights: SingleFlight[str, str] = SingleFlight()
+    cancelled = []
+
+    async def call():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return "done"
+
+    async def run():
+        first = asyncio.create_task(flights.do("a", call))
+        second = asyncio.create_task(flights.do("a", call))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        assert flights.in_flight("a")
+        assert not cancelled
+        second.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await second
+        await asyncio.sleep(0)
+        assert not flights.in_flight("a")
+
+    asyncio.run(run())
+    assert cancelled == [True]
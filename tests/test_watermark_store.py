@@ -0,0 +1,52 @@
+import pytest
+
+from parma_mining.producthunt.model import Review
+from parma_mining.producthunt.watermark_store import (
+    InMemoryWatermarkStore,
+    SQLiteWatermarkStore,
+    Watermark,
+)
+
+PRODUCT_URL = "https://www.producthunt.com/products/testproduct"
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        store = InMemoryWatermarkStore()
+    else:
+        store = SQLiteWatermarkStore(str(tmp_path / "watermarks.sqlite"))
+    yield store
+    store.close()
+
+
+def test_store_roundtrip(store):
+    watermark = Watermark("42", "2023-11-01 10:00:00")
+
+    assert store.get("c1", PRODUCT_URL) is None
+    store.set("c1", PRODUCT_URL, watermark)
+
+    assert store.get("c1", PRODUCT_URL) == watermark
+    assert store.get("c1", PRODUCT_URL.upper() + "/") == watermark
+    assert store.get("c2", PRODUCT_URL) is None
+
+
+def test_sqlite_store_persists(tmp_path):
+    path = str(tmp_path / "watermarks.sqlite")
+    store = SQLiteWatermarkStore(path)
+    store.set("c1", PRODUCT_URL, Watermark("42", "2023-11-01 10:00:00"))
+    store.close()
+
+    reopened = SQLiteWatermarkStore(path)
+    assert reopened.get("c1", PRODUCT_URL) == Watermark("42", "2023-11-01 10:00:00")
+    reopened.close()
+
+
+def test_watermark_covers_seen_reviews():
+    watermark = Watermark("42", "2023-11-01 10:00:00")
+
+    assert watermark.covers(Review.from_date("42", None, "2023-11-01 10:00:00"))
+    assert watermark.covers(Review.from_date("41", None, "2023-10-01 10:00:00"))
+    assert not watermark.covers(
+        Review.from_date("43", None, "2023-11-02 10:00:00")
+    )
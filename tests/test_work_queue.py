@@ -0,0 +1,273 @@
+import asyncio
+import multiprocessing
+import sqlite3
+from collections.abc import Awaitable, Callable
+
+import pytest
+
+from parma_mining.producthunt.model import ErrorInfoModel
+from parma_mining.producthunt.scheduler import FINISHED, QUEUED, RUNNING
+from parma_mining.producthunt.work_queue import (
+    InMemoryWorkQueue,
+    QueueWorker,
+    RedisWorkQueue,
+    SQLiteWorkQueue,
+    WorkQueue,
+    WorkUnit,
+    create_work_queue,
+)
+
+HANDLES = [("c1", "a"), ("c1", "b"), ("c2", "c")]
+WORKER_PROCESSES = 3
+PROCESS_HANDLES = 30
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def queue(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryWorkQueue()
+    if request.param == "sqlite":
+        return SQLiteWorkQueue(str(tmp_path / "queue.db"))
+    fakeredis = pytest.importorskip("fakeredis")
+    # the claims, heartbeats and completions are Lua scripts
+    pytest.importorskip("lupa")
+    return RedisWorkQueue(client=fakeredis.FakeAsyncRedis())
+
+
+def run(queue: WorkQueue, scenario: Callable[[], Awaitable]):
+    """Run a scenario against a queue and close the queue on the same loop."""
+
+    async def main():
+        try:
+            return await scenario()
+        finally:
+            await queue.aclose()
+
+    return asyncio.run(main())
+
+
+def test_work_queue_claims_round_robin(queue):
+    """Test that units are claimed across tasks in turn."""
+
+    async def scenario():
+        await queue.enqueue(1, "token-1", HANDLES)
+        await queue.enqueue(2, "token-2", HANDLES[:1])
+        claimed = [await queue.claim("worker", lease=30) for _ in range(5)]
+        return claimed, await queue.status(1)
+
+    claimed, task = run(queue, scenario)
+
+    assert [(unit.task_id, unit.handle) for unit in claimed[:4]] == [
+        (1, "a"),
+        (2, "a"),
+        (1, "b"),
+        (1, "c"),
+    ]
+    assert claimed[0].token == "token-1"
+    assert claimed[4] is None
+    assert task.status == RUNNING
+
+
+def test_work_queue_finishes_task_with_last_unit(queue):
+    """Test that only the last completion returns the outcome of the task."""
+    invalid = ErrorInfoModel(error_type="ClientInvalidBodyError", error_description="")
+    failure = ErrorInfoModel(error_type="CrawlingError", error_description="blocked")
+
+    async def scenario():
+        task = await queue.enqueue(1, "token", HANDLES, {"c3": invalid})
+        assert (task.status, task.total) == (QUEUED, len(HANDLES))
+        units = [await queue.claim("worker", lease=30) for _ in HANDLES]
+        outcomes = [
+            await queue.complete(units[0], "worker"),
+            await queue.complete(units[1], "worker", failure),
+            await queue.complete(units[2], "worker"),
+        ]
+        assert await queue.complete(units[2], "worker") is None
+        return outcomes, await queue.status(1)
+
+    outcomes, task = run(queue, scenario)
+
+    assert outcomes[:2] == [None, None]
+    assert outcomes[2].token == "token"
+    assert outcomes[2].errors == {"c1": failure, "c3": invalid}
+    assert (task.status, task.completed, task.failed) == (FINISHED, 2, 1)
+    assert task.finished_at is not None
+
+
+def test_work_queue_reclaims_expired_leases(queue):
+    """Test that an abandoned unit is claimed again and its old owner ignored."""
+
+    async def scenario():
+        await queue.enqueue(1, "token", HANDLES[:1])
+        first = await queue.claim("dead", lease=-1)
+        second = await queue.claim("alive", lease=30)
+
+        assert second == first
+        assert not await queue.heartbeat(first, "dead", lease=30)
+        assert await queue.heartbeat(second, "alive", lease=30)
+        assert await queue.complete(first, "dead") is None
+        assert await queue.complete(second, "alive") is not None
+
+    run(queue, scenario)
+
+
+def test_work_queue_does_not_requeue_running_task(queue):
+    """Test that enqueueing an unfinished task again keeps its units."""
+
+    async def scenario():
+        await queue.enqueue(1, "token", HANDLES)
+        await queue.enqueue(1, "token", HANDLES)
+        return [await queue.claim("worker", lease=30) for _ in range(len(HANDLES) + 1)]
+
+    assert run(queue, scenario)[-1] is None
+
+
+def test_work_queue_hands_out_deadline(queue):
+    """Test that the deadline of a task is handed out with its units."""
+
+    async def scenario():
+        await queue.enqueue(1, "token", HANDLES[:1], deadline=1700000000.5)
+        await queue.enqueue(2, "token", HANDLES[:1])
+        return [await queue.claim("worker", lease=30) for _ in range(2)]
+
+    assert [unit.deadline for unit in run(queue, scenario)] == [1700000000.5, None]
+
+
+def test_sqlite_work_queue_waits_for_locks_off_the_event_loop(tmp_path):
+    """Test that a claim waiting for another process keeps the event loop free."""
+    path = str(tmp_path / "queue.db")
+    queue = SQLiteWorkQueue(path)
+    other_process = sqlite3.connect(path, isolation_level=None)
+    other_process.execute("BEGIN IMMEDIATE")
+
+    async def scenario():
+        claim = asyncio.create_task(queue.claim("worker", lease=30))
+        for _ in range(5):
+            await asyncio.sleep(0.01)
+        assert not claim.done()
+        other_process.execute("COMMIT")
+        return await claim
+
+    assert run(queue, scenario) is None
+    other_process.close()
+
+
+def test_create_work_queue(tmp_path):
+    assert isinstance(create_work_queue("memory://"), InMemoryWorkQueue)
+    sqlite_queue = create_work_queue(f"sqlite:///{tmp_path / 'queue.db'}")
+    assert isinstance(sqlite_queue, SQLiteWorkQueue)
+    asyncio.run(sqlite_queue.aclose())
+
+
+def test_queue_worker_reports_unexpected_errors():
+    """Test that a failing unit is completed with its error."""
+    queue = InMemoryWorkQueue()
+    finished = []
+
+    async def process(unit):
+        raise ValueError("broken page")
+
+    async def finish(task):
+        finished.append(task)
+
+    async def crawl():
+        await queue.enqueue(1, "token", HANDLES[:1])
+        worker = QueueWorker(
+            queue, process, finish, concurrency=1, lease=30, poll_interval=0.01
+        )
+        worker.start()
+        while not finished:
+            await asyncio.sleep(0.01)
+        await worker.stop()
+
+    asyncio.run(crawl())
+
+    assert finished[0].errors["c1"].error_type == "ValueError"
+
+
+def test_work_unit_repr_leaves_out_token(caplog):
+    """Test that logging a failing unit does not leak the token of its task."""
+    queue = InMemoryWorkQueue()
+    unit = WorkUnit(1, 0, "c1", "a", "secret-token")
+
+    async def process(unit):
+        raise ValueError("broken page")
+
+    async def finish(task):
+        pass
+
+    worker = QueueWorker(queue, process, finish, concurrency=1)
+    asyncio.run(worker.run_unit(unit))
+
+    assert "secret-token" not in repr(unit)
+    assert "WorkUnit(task_id=1, unit_id=0" in caplog.text
+    assert "secret-token" not in caplog.text
+
+
+def _record(path: str, statement: str, values: tuple):
+    with sqlite3.connect(path, timeout=30) as connection:
+        connection.execute(statement, values)
+
+
+def _run_worker_process(path: str, results: str, ready):
+    queue = SQLiteWorkQueue(path)
+    # start claiming together, so every process gets a share
+    ready.wait()
+
+    async def process(unit: WorkUnit):
+        await asyncio.sleep(0.01)
+        _record(
+            results,
+            "INSERT INTO processed VALUES (?, ?)",
+            (unit.handle, worker.owner),
+        )
+
+    async def finish(task):
+        _record(results, "INSERT INTO finished VALUES (?)", (task.task_id,))
+
+    async def crawl():
+        worker.start()
+        while (task := await queue.status(1)) is None or task.status != FINISHED:
+            await asyncio.sleep(0.01)
+        await worker.stop()
+        await queue.aclose()
+
+    worker = QueueWorker(
+        queue, process, finish, concurrency=2, lease=5, poll_interval=0.01
+    )
+    asyncio.run(crawl())
+
+
+def test_work_queue_shared_by_processes(tmp_path):
+    """Test that several processes share the units of a task."""
+    path = str(tmp_path / "queue.db")
+    results = str(tmp_path / "results.db")
+    _record(results, "CREATE TABLE processed (handle TEXT, owner TEXT)", ())
+    _record(results, "CREATE TABLE finished (task_id INTEGER)", ())
+    handles = [("c1", f"handle-{i}") for i in range(PROCESS_HANDLES)]
+    queue = SQLiteWorkQueue(path)
+
+    async def enqueue():
+        await queue.enqueue(1, "token", handles)
+        await queue.aclose()
+
+    asyncio.run(enqueue())
+
+    context = multiprocessing.get_context("spawn")
+    ready = context.Barrier(WORKER_PROCESSES)
+    processes = [
+        context.Process(target=_run_worker_process, args=(path, results, ready))
+        for _ in range(WORKER_PROCESSES)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    with sqlite3.connect(results) as connection:
+        processed = connection.execute("SELECT handle, owner FROM processed").fetchall()
+        finished = connection.execute("SELECT task_id FROM finished").fetchall()
+    assert sorted(handle for handle, _ in processed) == sorted(h for _, h in handles)
+    assert len({owner for _, owner in processed}) > 1
+    assert finished == [(1,)]